@@ -4,7 +4,7 @@ Instagram Video Dashboard - Versión Flask Completa
 Incluye todas las funcionalidades del dashboard Streamlit
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, g, Response
 import os
 import json
 from datetime import datetime
@@ -118,6 +118,53 @@ except Exception as e:
     image_generator = MockComponent()
     subtitle_generator = MockComponent()
 
+# Cola de trabajos en segundo plano para los pipelines largos
+from utils.job_queue import job_queue
+from utils.ffmpeg_runner import ffmpeg_runner
+from utils.dynamic_pipeline import run_dynamic_pipeline
+
+job_queue.register_handler('generate_dynamic', run_dynamic_pipeline)
+
+# Borradores rápidos: operaciones de render que se pueden promover a calidad final
+from utils.render_profiles import render_profiles
+from utils.dynamic_video_processor import dynamic_video_processor
+from utils.video_composer import video_composer
+
+render_profiles.register_operation('image_audio', video_composer.video_processor.create_video_from_image_and_audio)
+render_profiles.register_operation('dynamic', dynamic_video_processor.create_dynamic_video)
+render_profiles.register_operation('template', video_composer.video_templates.apply_template_to_video)
+render_profiles.register_operation('compose', video_composer.compose_video)
+
+def promote_draft(ctx, draft_path: str):
+    """Volver a renderizar un borrador con calidad final (en segundo plano)"""
+    with ctx.step('render') as step:
+        result = render_profiles.promote(draft_path)
+        if not result[0]:
+            raise RuntimeError(f"Error promoviendo borrador: {result[1]}")
+        step['message'] = 'Render final completado'
+    ctx.add_artifact('video_file', result[1])
+    
+    return {
+        'video_file': result[1],
+        'promoted_from': draft_path,
+        'message': f'🎉 Borrador promovido a calidad final: {os.path.basename(result[1])}'
+    }
+
+job_queue.register_handler('promote_draft', promote_draft)
+
+# Cachés de imágenes, audio y metadatos de medios (estadísticas en /api/status)
+from utils.image_cache import image_cache
+from utils.audio_cache import audio_cache
+from utils.segment_cache import segment_cache
+from utils.media_metadata import media_metadata
+
+# Cliente HTTP compartido y enrutador de APIs (estadísticas en /api/status)
+from utils.http_client import http_client
+from utils.api_router import api_router
+
+# Trazas del pipeline (visor en /traces)
+from utils.tracing import tracer
+
 # Configuración de carpetas
 UPLOAD_FOLDER = 'videos/pending'
 PROCESSED_FOLDER = 'videos/processed'
@@ -127,6 +174,74 @@ PUBLISHED_FOLDER = 'videos/published'
 for folder in [UPLOAD_FOLDER, PROCESSED_FOLDER, PUBLISHED_FOLDER]:
     os.makedirs(folder, exist_ok=True)
 
+# =============================================================================
+# MÉTRICAS (/metrics)
+# =============================================================================
+
+from utils.metrics import metrics
+
+QUEUE_JOBS = metrics.gauge('job_queue_jobs', 'Trabajos en la cola por estado', ['status'])
+QUEUE_WORKERS = metrics.gauge('job_queue_workers', 'Trabajadores de la cola de trabajos')
+FFMPEG_ACTIVE = metrics.gauge('ffmpeg_active_runs', 'Procesos de FFmpeg en marcha')
+PUBLISH_QUEUE = metrics.gauge('scheduler_publish_queue', 'Videos esperando en la cola de publicación')
+
+def collect_runtime_metrics():
+    """Profundidad de colas y FFmpeg activos en el momento del scrape"""
+    queue_stats = job_queue.get_queue_stats()
+    for status in ('queued', 'running'):
+        QUEUE_JOBS.set(queue_stats.get(status, 0), status=status)
+    QUEUE_WORKERS.set(queue_stats['workers'])
+
+    FFMPEG_ACTIVE.set(len(ffmpeg_runner.get_active()))
+
+    if hasattr(auto_scheduler, 'get_publish_queue'):
+        PUBLISH_QUEUE.set(len(auto_scheduler.get_publish_queue()))
+
+metrics.register_collector(collect_runtime_metrics)
+metrics.watch_directories({
+    'pending': UPLOAD_FOLDER,
+    'processed': PROCESSED_FOLDER,
+    'published': PUBLISHED_FOLDER,
+    'dynamic': str(dynamic_video_processor.output_dir),
+    'drafts': str(render_profiles.drafts_dir),
+    'image_cache': str(image_cache.cache_dir),
+    'audio_cache': str(audio_cache.cache_dir),
+    'segment_cache': str(segment_cache.cache_dir)
+})
+
+# =============================================================================
+# TRAZAS DE PETICIONES
+# =============================================================================
+
+# Rutas sin traza: estáticos, el propio visor, los sondeos periódicos de trabajos y los scrapes
+UNTRACED_ENDPOINTS = {'static', 'traces', 'api_traces', 'api_trace', 'api_job_status', 'api_job_progress',
+                      'metrics_endpoint'}
+
+@app.before_request
+def start_request_trace():
+    """Abrir un span raíz por petición; los trabajos que encola tienen su propia traza"""
+    if request.endpoint in UNTRACED_ENDPOINTS:
+        return
+    
+    route = request.url_rule.rule if request.url_rule else request.path
+    g.trace_span, g.trace_token = tracer.start_span(f"{request.method} {route}", kind='request',
+                                                    method=request.method, path=request.path)
+
+@app.after_request
+def record_request_status(response):
+    span = g.get('trace_span')
+    if span:
+        span['attributes']['status_code'] = response.status_code
+        if response.status_code >= 500:
+            span['status'] = 'error'
+    return response
+
+@app.teardown_request
+def finish_request_trace(error=None):
+    span = g.pop('trace_span', None)
+    if span:
+        tracer.end_span(span, g.pop('trace_token', None), error)
+
 # =============================================================================
 # RUTAS PRINCIPALES
 # =============================================================================
@@ -286,7 +401,8 @@ def generate_ai_videos():
         'script': '', 'script_file': '', 'theme': '',
         'audio': '', 'audio_file': '',
         'image': '', 'image_file': '',
-        'message': '', 'error': '', 'step': 'config'
+        'message': '', 'error': '', 'step': 'config',
+        'job_id': ''
     }
     
     # Verificar configuración de APIs
@@ -296,6 +412,22 @@ def generate_ai_videos():
         'image_gen': image_generator.is_configured()
     }
     
+    # Recuperar un trabajo dinámico tras recargar la página
+    job_id = request.args.get('job', '')
+    if request.method == 'GET' and job_id:
+        job = job_queue.get_job(job_id)
+        if job:
+            state.update({'job_id': job_id, 'theme': job['params'].get('theme', '')})
+            if job['status'] == 'completed' and job['result']:
+                state.update(job['result'])
+                state['step'] = 'complete'
+            elif job['status'] in ('failed', 'interrupted', 'cancelled'):
+                state['error'] = f"❌ {job['error']}"
+            else:
+                state.update({'message': f'⏳ Generación dinámica en curso (trabajo {job_id})', 'step': 'queued'})
+        else:
+            state['error'] = f'❌ Trabajo no encontrado: {job_id}'
+    
     if request.method == 'POST':
         action = request.form.get('action', '')
         
@@ -345,65 +477,23 @@ def generate_ai_videos():
             else:
                 state['error'] = '❌ No hay guion para generar imagen'
         
-        # 4. Generación dinámica (NUEVA FUNCIONALIDAD)
+        # 4. Generación dinámica (NUEVA FUNCIONALIDAD) - se ejecuta en segundo plano
         elif action == 'generate_dynamic':
             theme = request.form.get('theme', 'mindset')
             style = request.form.get('style', 'luxury')
             language = request.form.get('language', 'es')
+            draft = request.form.get('draft') == 'on'
             
             try:
-                # Paso 1: Generar guión
-                success, script, script_file = script_generator.generate_script(theme)
-                if not success:
-                    state['error'] = f'❌ Error generando guión: {script}'
-                    return render_template('generate_ai_videos.html', state=state, api_status=api_status)
-                
-                # Paso 2: Analizar guión para extraer conceptos visuales
-                from utils.script_analyzer import script_analyzer
-                success, visual_concepts, analysis_api = script_analyzer.analyze_script_for_visuals(script, 60)
-                
-                if not success or not visual_concepts:
-                    state['error'] = '❌ Error analizando guión para conceptos visuales'
-                    return render_template('generate_ai_videos.html', state=state, api_status=api_status)
-                
-                # Paso 3: Generar múltiples imágenes basadas en el análisis
-                from utils.dynamic_image_generator import dynamic_image_generator
-                success, generated_images, img_summary = dynamic_image_generator.generate_images_from_analysis(visual_concepts, style)
-                
-                if not success or not generated_images:
-                    state['error'] = f'❌ Error generando imágenes dinámicas: {img_summary}'
-                    return render_template('generate_ai_videos.html', state=state, api_status=api_status)
-                
-                # Paso 4: Generar audio
-                success, audio_path = local_tts.text_to_speech_gtts(script, language)
-                if not success:
-                    state['error'] = f'❌ Error generando audio: {audio_path}'
-                    return render_template('generate_ai_videos.html', state=state, api_status=api_status)
-                
-                # Paso 5: Crear video dinámico con transiciones
-                from utils.dynamic_video_processor import dynamic_video_processor
-                success, video_path, video_message = dynamic_video_processor.create_dynamic_video(
-                    audio_path, generated_images, f"{theme}_dynamic"
-                )
-                
-                if success:
-                    state.update({
-                        'script': script,
-                        'script_file': script_file,
-                        'audio_file': audio_path,
-                        'video_file': video_path,
-                        'theme': theme,
-                        'message': f'🎉 ¡Video dinámico creado! {video_message}. Análisis: {analysis_api}. {img_summary}',
-                        'step': 'complete',
-                        'dynamic_info': {
-                            'total_images': len(generated_images),
-                            'visual_concepts': len(visual_concepts),
-                            'analysis_api': analysis_api
-                        }
-                    })
-                else:
-                    state['error'] = f'❌ Error creando video dinámico: {video_message}'
-            
+                job_id = job_queue.submit('generate_dynamic', {
+                    'theme': theme, 'style': style, 'language': language, 'draft': draft
+                })
+                state.update({
+                    'theme': theme,
+                    'job_id': job_id,
+                    'message': f'⏳ Generación dinámica en cola (trabajo {job_id})',
+                    'step': 'queued'
+                })
             except Exception as e:
                 state['error'] = f'❌ Error en generación dinámica: {str(e)}'
         
@@ -505,42 +595,19 @@ def process_videos():
 def manage_library():
     """Página de gestión de biblioteca"""
     try:
-        # Datos simulados para demostración
-        pending_videos = [
-            {
-                'id': 1,
-                'filename': 'video_subido_1.mp4',
-                'size': '25.3 MB',
-                'duration': '1:15',
-                'created_date': 'Hace 2 horas',
-                'type': 'Subido'
-            },
-            {
-                'id': 2,
-                'filename': 'script_mindset_generado.mp4',
-                'size': '18.7 MB',
-                'duration': '0:58',
-                'created_date': 'Hace 4 horas',
-                'type': 'IA Generado'
-            }
-        ]
-        
-        processed_videos = [
-            {
-                'id': 3,
-                'filename': 'video_procesado_1.mp4',
-                'duration': '1:00',
-                'final_size': '15.2 MB',
-                'processed_date': 'Hace 1 día'
-            },
-            {
-                'id': 4,
-                'filename': 'reel_dinamico_crypto.mp4',
-                'duration': '0:45',
-                'final_size': '12.8 MB',
-                'processed_date': 'Hace 2 días'
-            }
-        ]
+        # Videos reales con duración del índice de metadatos (sin ffprobe si no cambiaron)
+        if hasattr(file_manager, 'get_videos_with_metadata'):
+            pending_videos = [
+                {**video, 'created_date': video['modified']}
+                for video in file_manager.get_videos_with_metadata('pending')
+            ]
+            processed_videos = [
+                {**video, 'final_size': video['size'], 'processed_date': video['modified']}
+                for video in file_manager.get_videos_with_metadata('processed')
+            ]
+        else:
+            pending_videos = []
+            processed_videos = []
         
         published_videos = [
             {
@@ -743,6 +810,11 @@ def settings():
                                datetime=datetime,
                                error=str(e))
 
+@app.route('/traces')
+def traces():
+    """Visor de trazas: cascada de spans por reel o petición"""
+    return render_template('traces.html')
+
 # =============================================================================
 # APIs
 # =============================================================================
@@ -760,7 +832,14 @@ def api_status_endpoint():
             'pending_videos': pending_count,
             'processed_videos': processed_count,
             'published_videos': published_count,
-            'total_videos': pending_count + processed_count + published_count
+            'total_videos': pending_count + processed_count + published_count,
+            'image_cache': image_cache.get_stats(),
+            'audio_cache': audio_cache.get_stats(),
+            'segment_cache': segment_cache.get_stats(),
+            'media_metadata': media_metadata.get_stats(),
+            'http_pools': http_client.get_pool_stats(),
+            'api_routing': api_router.get_stats(),
+            'tracing': tracer.get_stats()
         })
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
@@ -919,6 +998,8 @@ def api_create_video():
         add_watermark = data.get('add_watermark', True)
         video_template = data.get('video_template', 'luxury_gold')
         video_name = data.get('video_name', f'video_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
+        language = data.get('language', 'es')
+        draft = bool(data.get('draft', False))
         
         if not all([script, audio_path, image_path]):
             return jsonify({
@@ -939,16 +1020,24 @@ def api_create_video():
                 'message': f'Archivo de audio no encontrado: {audio_path}'
             })
         
-        # Crear video base usando el componente video_processor
-        success, video_path = video_processor.create_video_from_image_and_audio(
-            image_path, audio_path, 
-            output_path=f"videos/processed/{video_name}.mp4"
+        # Componer video final (base, subtítulos, marca de agua y template) en un solo render
+        success, video_path, timings = video_composer.compose_video(
+            image_path, audio_path, script,
+            output_path=f"videos/processed/{video_name}.mp4",
+            subtitle_style=subtitle_style,
+            add_watermark=add_watermark,
+            watermark_text="@yourusername",
+            watermark_position="bottom-right",
+            template_name=video_template,
+            language=language,
+            draft=draft
         )
         
         if not success:
             return jsonify({
                 'success': False,
                 'message': f'Error creando video base: {video_path}',
+                'timings': timings,
                 'debug_info': {
                     'image_exists': os.path.exists(image_path),
                     'audio_exists': os.path.exists(audio_path),
@@ -957,66 +1046,14 @@ def api_create_video():
                 }
             })
         
-        current_video_path = video_path
-        
-        # Agregar subtítulos si se solicita
-        if subtitle_style != 'none' and script:
-            try:
-                # Obtener duración del audio para sincronizar subtítulos
-                import subprocess
-                cmd = ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', '-of', 'csv=p=0', audio_path]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                audio_duration = float(result.stdout.strip()) if result.returncode == 0 else None
-                
-                # Agregar subtítulos al video con el estilo seleccionado
-                subtitled_path = current_video_path.replace('.mp4', '_subtitled.mp4')
-                success_add, final_path = video_processor.add_subtitles_to_video(current_video_path, script, subtitled_path, subtitle_style)
-                
-                if success_add:
-                    current_video_path = final_path
-            except Exception as e:
-                print(f"Error agregando subtítulos: {e}")
-                # Continuar sin subtítulos
-        
-        # Agregar marca de agua si se solicita
-        if add_watermark:
-            try:
-                watermarked_path = video_processor.process_video(
-                    current_video_path,
-                    add_watermark=True,
-                    watermark_text="@yourusername",
-                    watermark_position="bottom-right"
-                )
-                if watermarked_path:
-                    current_video_path = watermarked_path
-            except Exception as e:
-                print(f"Error agregando marca de agua: {e}")
-                # Continuar sin marca de agua
-        
-        # Aplicar template de video si se especifica
-        if video_template and video_template != 'none':
-            try:
-                # Importar y usar video templates
-                from utils.video_templates import VideoTemplates
-                templates = VideoTemplates()
-                
-                templated_path = current_video_path.replace('.mp4', '_templated.mp4')
-                success_template, final_templated_path = templates.apply_template_to_video(
-                    current_video_path, script, video_template, templated_path
-                )
-                
-                if success_template:
-                    current_video_path = final_templated_path
-            except Exception as e:
-                print(f"Error aplicando template: {e}")
-                # Continuar sin template
-        
         return jsonify({
             'success': True,
-            'video_path': current_video_path,
+            'video_path': video_path,
             'template_used': video_template,
             'subtitle_style': subtitle_style,
-            'message': 'Video creado exitosamente con todos los componentes y efectos'
+            'timings': timings,
+            'draft': draft,
+            'message': 'Borrador creado: promuévelo a final cuando esté listo' if draft else 'Video creado exitosamente con todos los componentes y efectos'
         })
         
     except Exception as e:
@@ -1039,29 +1076,45 @@ def api_auto_generate_complete():
             'errors': []
         }
         
+        from utils.pipeline_dag import PipelineDAG
+        
         # Paso 1: Generar script
-        success, script, script_file = script_generator.generate_script(theme, '', 't.me/tucanalgratis')
-        if success:
-            results['script'] = script
-        else:
-            results['errors'].append(f'Error generando script: {script}')
+        def generate_script(step_results):
+            success, script, script_file = script_generator.generate_script(theme, '', 't.me/tucanalgratis')
+            if success:
+                results['script'] = script
+            else:
+                results['errors'].append(f'Error generando script: {script}')
         
-        # Paso 2: Generar audio
-        if script:
-            success, audio_path = local_tts.text_to_speech_gtts(script, language)
+        # Paso 2: Generar audio (en paralelo con la imagen)
+        def generate_audio(step_results):
+            if not results['script']:
+                return
+            success, audio_path = local_tts.text_to_speech_gtts(results['script'], language)
             if success:
                 results['audio_path'] = audio_path
             else:
                 results['errors'].append(f'Error generando audio: {audio_path}')
         
-        # Paso 3: Generar imagen
-        if script:
-            success, image_path, image_url, api_used = image_generator.generate_from_script(script, theme)
+        # Paso 3: Generar imagen (en paralelo con el audio)
+        def generate_image(step_results):
+            if not results['script']:
+                return
+            success, image_path, image_url, api_used = image_generator.generate_from_script(results['script'], theme)
             if success:
                 results['image_path'] = image_path
             else:
                 results['errors'].append(f'Error generando imagen: {api_used}')
         
+        # Audio e imagen solo dependen del script; cada rama registra su propio error
+        dag = PipelineDAG('auto_generate_complete')
+        dag.add_step('script', generate_script)
+        dag.add_step('tts', generate_audio, depends_on=['script'])
+        dag.add_step('image', generate_image, depends_on=['script'])
+        
+        _, report = dag.run()
+        results['pipeline_report'] = report
+        
         # Verificar si todo fue exitoso
         if results['errors']:
             results['success'] = False
@@ -1078,6 +1131,168 @@ def api_auto_generate_complete():
             'errors': [str(e)]
         })
 
+def build_dynamic_job_params(data):
+    """Parámetros de generate_dynamic desde el cuerpo de /api/jobs"""
+    params = {
+        'theme': data.get('theme', 'mindset'),
+        'style': data.get('style', 'luxury'),
+        'language': data.get('language', 'es')
+    }
+    
+    for key, value in params.items():
+        if not isinstance(value, str) or not value:
+            raise ValueError(f"'{key}' debe ser un texto no vacío")
+    
+    draft = data.get('draft', False)
+    if not isinstance(draft, bool):
+        raise ValueError("'draft' debe ser true o false")
+    params['draft'] = draft
+    
+    return params
+
+# Tipos de trabajo que se pueden encolar por /api/jobs y cómo se construyen sus parámetros
+JOB_PARAM_BUILDERS = {
+    'generate_dynamic': build_dynamic_job_params
+}
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def api_jobs():
+    """API para encolar trabajos en segundo plano y listar los recientes"""
+    try:
+        if request.method == 'GET':
+            return jsonify({
+                'success': True,
+                'jobs': job_queue.list_jobs(int(request.args.get('limit', 20))),
+                'stats': job_queue.get_queue_stats()
+            })
+        
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'message': 'Se esperaba un cuerpo JSON'}), 400
+        
+        # Solo los tipos pensados para esta API; promote_draft tiene la suya con validación propia
+        job_type = data.get('type', 'generate_dynamic')
+        if job_type not in JOB_PARAM_BUILDERS:
+            return jsonify({'success': False, 'message': f'Tipo de trabajo no permitido: {job_type}'}), 400
+        
+        try:
+            params = JOB_PARAM_BUILDERS[job_type](data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        job_id = job_queue.submit(job_type, params)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}',
+            'message': 'Trabajo encolado'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """API para consultar pasos, tiempos y artefactos de un trabajo"""
+    job = job_queue.get_job(job_id)
+    
+    if not job:
+        return jsonify({'success': False, 'message': 'Trabajo no encontrado'}), 404
+    
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/api/jobs/<job_id>/progress')
+def api_job_progress(job_id):
+    """API de progreso en tiempo real: porcentaje, fps y velocidad de los FFmpeg del trabajo"""
+    job = job_queue.get_job(job_id)
+    
+    if not job:
+        return jsonify({'success': False, 'message': 'Trabajo no encontrado'}), 404
+    
+    running_step = next((step['name'] for step in reversed(job['steps']) if step['status'] == 'running'), None)
+    
+    return jsonify({
+        'success': True,
+        'status': job['status'],
+        'step': running_step,
+        'ffmpeg': ffmpeg_runner.get_progress(job_id)
+    })
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def api_job_cancel(job_id):
+    """API para cancelar un trabajo en cola o en marcha"""
+    status = job_queue.cancel(job_id)
+    
+    if status is None:
+        return jsonify({'success': False, 'message': 'Trabajo no encontrado'}), 404
+    
+    if status not in ('cancelled', 'running'):
+        return jsonify({'success': False, 'status': status, 'message': f'El trabajo ya terminó ({status})'}), 409
+    
+    return jsonify({
+        'success': True,
+        'status': status,
+        'message': 'Trabajo cancelado' if status == 'cancelled' else 'Cancelación solicitada'
+    })
+
+@app.route('/api/drafts')
+def api_drafts():
+    """API para listar los borradores con su receta"""
+    return jsonify({'success': True, 'drafts': render_profiles.list_drafts()})
+
+@app.route('/api/drafts/promote', methods=['POST'])
+def api_promote_draft():
+    """API para volver a renderizar un borrador con calidad final en segundo plano"""
+    data = request.json or {}
+    draft_path = data.get('draft_path', '')
+    
+    if not render_profiles.get_recipe(draft_path):
+        return jsonify({'success': False, 'message': f'Borrador no encontrado: {draft_path}'}), 404
+    
+    job_id = job_queue.submit('promote_draft', {'draft_path': draft_path})
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': f'/api/jobs/{job_id}',
+        'message': 'Render final encolado'
+    }), 202
+
+@app.route('/api/traces')
+def api_traces():
+    """API para listar las trazas más recientes (?limit=50)"""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'success': True, 'traces': tracer.list_traces(limit), 'stats': tracer.get_stats()})
+
+@app.route('/api/traces/<trace_id>')
+def api_trace(trace_id):
+    """API con todos los spans de una traza para la cascada"""
+    trace = tracer.get_trace(trace_id)
+    
+    if not trace:
+        return jsonify({'success': False, 'message': 'Traza no encontrada'}), 404
+    
+    return jsonify({'success': True, 'trace': trace})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métricas en formato de exposición de Prometheus para scrapear y alertar"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/webhooks/replicate', methods=['POST'])
+def api_replicate_webhook():
+    """Webhook de Replicate: despierta la espera de la predicción terminada"""
+    from utils.prediction_waiter import prediction_waiter
+    
+    if not prediction_waiter.verify_webhook(request.get_data(), request.headers):
+        return jsonify({'success': False, 'message': 'Firma inválida'}), 401
+    
+    prediction = request.get_json(silent=True) or {}
+    delivered = prediction_waiter.notify(prediction)
+    
+    return jsonify({'success': True, 'delivered': delivered})
+
 # =============================================================================
 # RUTAS PARA SERVIR ARCHIVOS GENERADOS
 # =============================================================================
@@ -1093,6 +1308,7 @@ def serve_generated_file(filename):
             'generated/scripts',
             'generated/subtitles',
             'videos/processed',
+            'videos/drafts',
             'videos/pending',
             'videos/published'
         ]
@@ -1424,17 +1640,36 @@ def api_dashboard_stats():
         }
         
         # Estadísticas básicas
+        pending_count = len(file_manager.get_pending_videos()) if hasattr(file_manager, 'get_pending_videos') else 0
+        processed_count = len(file_manager.get_processed_videos()) if hasattr(file_manager, 'get_processed_videos') else 0
+        published_count = len(file_manager.get_published_videos()) if hasattr(file_manager, 'get_published_videos') else 0
+        ai_generated = len(file_manager.scan_folder_for_videos(str(dynamic_video_processor.output_dir))) \
+            if hasattr(file_manager, 'scan_folder_for_videos') else 0
+        scheduled = len(auto_scheduler.get_publish_queue()) if hasattr(auto_scheduler, 'get_publish_queue') else 0
+        
         stats = {
-            'total_videos': 0,
-            'ai_generated': 0,
-            'published': 0,
-            'scheduled': 0,
+            'total_videos': pending_count + processed_count + published_count,
+            'ai_generated': ai_generated,
+            'published': published_count,
+            'scheduled': scheduled,
             'configured_apis': sum([1 for status in api_status.values() if status])
         }
         
+        # Rendimiento desde el arranque (las mismas series que /metrics)
+        throughput = {
+            'reels_completed': metrics.value('jobs_total', status='completed'),
+            'reels_failed': metrics.value('jobs_total', status='failed'),
+            'renders': metrics.value('ffmpeg_runs_total', status='ok'),
+            'realtime_factor': metrics.get('ffmpeg_realtime_factor').stats(profile='final')['mean'],
+            'published_ok': metrics.value('publish_total', status='ok'),
+            'publish_errors': metrics.value('publish_total', status='error'),
+            'queue': job_queue.get_queue_stats()
+        }
+        
         return jsonify({
             'status': 'ok',
             'stats': stats,
+            'throughput': throughput,
             'api_status': api_status,
             'timestamp': datetime.now().isoformat()
         })
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del pipeline dinámico completo con proveedores simulados en local
+Guión -> análisis -> imágenes + TTS -> render -> publicación en Telegram, sin llamar a APIs de pago;
+reporta percentiles de latencia por etapa y reels por hora a distintos niveles de concurrencia
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+from utils.http_client import http_client
+from utils.mock_providers import MockProviderServer, PROVIDER_ORIGINS
+
+# Claves ficticias para que todos los proveedores simulados se consideren configurados;
+# las de pago sin servidor simulado se vacían para no gastar nunca en un benchmark
+MOCK_API_KEYS = {
+    'GROQ_API_KEY': 'mock',
+    'COHERE_API_KEY': 'mock',
+    'HUGGINGFACE_API_KEY': 'mock',
+    'REPLICATE_API_KEY': 'mock',
+    'DEEPAI_API_KEY': 'mock',
+    'GETIMG_API_KEY': 'mock',
+    'STABILITY_API_KEY': '',
+    'OPENAI_API_KEY': '',
+    'ELEVENLABS_API_KEY': ''
+}
+
+STAGES = ['script', 'analysis', 'images', 'tts', 'render', 'publish', 'total']
+
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled', 'interrupted')
+
+def parse_pairs(values, cast=str):
+    """['groq=fixed:0.5', ...] -> {'groq': 'fixed:0.5'}"""
+    pairs = {}
+    for value in values or []:
+        if '=' not in value:
+            raise ValueError(f"Se esperaba proveedor=valor: {value}")
+        provider, setting = value.split('=', 1)
+        pairs[provider.strip()] = cast(setting.strip())
+    return pairs
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return round(ordered[index], 3)
+
+def summarize(durations):
+    return {
+        'count': len(durations),
+        'p50': percentile(durations, 0.50),
+        'p90': percentile(durations, 0.90),
+        'p95': percentile(durations, 0.95),
+        'max': round(max(durations), 3) if durations else None
+    }
+
+def remove_outputs(job):
+    """Borrar los archivos generados por un reel del benchmark"""
+    artifacts = job.get('artifacts', {})
+    paths = [artifacts.get('video_file'), artifacts.get('audio_file'), artifacts.get('script_file')]
+    paths.extend(artifacts.get('images') or [])
+
+    for path in paths:
+        if path and os.path.isfile(path):
+            os.remove(path)
+
+def run_level(concurrency, reels, params, handler, work_dir, keep_outputs):
+    """Lanzar todos los reels en una cola con `concurrency` trabajadores y esperar a que terminen"""
+    from utils.job_queue import JobQueue
+
+    queue = JobQueue(max_workers=concurrency, jobs_dir=os.path.join(work_dir, f"jobs_{concurrency}"))
+    queue.register_handler('benchmark_reel', handler)
+
+    start = time.perf_counter()
+    job_ids = [queue.submit('benchmark_reel', params) for _ in range(reels)]
+
+    while True:
+        jobs = [queue.get_job(job_id) for job_id in job_ids]
+        if all(job['status'] in TERMINAL_STATUSES for job in jobs):
+            break
+        time.sleep(0.2)
+
+    wall_time = time.perf_counter() - start
+    queue.executor.shutdown(wait=True)
+
+    durations = {stage: [] for stage in STAGES}
+    errors = []
+
+    for job in jobs:
+        for step in job['steps']:
+            if step['status'] == 'completed' and step['name'] in durations:
+                durations[step['name']].append(step['duration'])
+
+        if job['status'] == 'completed':
+            durations['total'].append(job['duration'])
+        else:
+            errors.append(job.get('error'))
+
+        if not keep_outputs:
+            remove_outputs(job)
+
+    completed = len(durations['total'])
+
+    return {
+        'concurrency': concurrency,
+        'reels': reels,
+        'completed': completed,
+        'failed': reels - completed,
+        'errors': [error for error in errors if error][:5],
+        'wall_time': round(wall_time, 3),
+        'reels_per_hour': round(completed / wall_time * 3600, 1) if wall_time else 0.0,
+        'stages': {stage: summarize(values) for stage, values in durations.items()}
+    }
+
+def print_level(level):
+    print(f"\n⚙️  Concurrencia {level['concurrency']}: {level['completed']}/{level['reels']} reels en "
+          f"{level['wall_time']:.1f}s -> {level['reels_per_hour']:.1f} reels/hora")
+    print(f"   {'Etapa':<10} | {'p50 (s)':>8} | {'p90 (s)':>8} | {'p95 (s)':>8} | {'máx (s)':>8}")
+
+    for stage, stats in level['stages'].items():
+        if not stats['count']:
+            continue
+        print(f"   {stage:<10} | {stats['p50']:>8.2f} | {stats['p90']:>8.2f} | {stats['p95']:>8.2f} | {stats['max']:>8.2f}")
+
+    for error in level['errors']:
+        print(f"   ❌ {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Medir el pipeline dinámico completo contra proveedores simulados")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4],
+                        help="Reels simultáneos a probar (trabajadores de la cola)")
+    parser.add_argument('--reels', type=int, default=None,
+                        help="Reels por nivel (por defecto el doble de la concurrencia)")
+    parser.add_argument('--theme', default='mindset')
+    parser.add_argument('--style', default='luxury')
+    parser.add_argument('--draft', action='store_true', help="Renderizar como borrador rápido")
+    parser.add_argument('--latency', action='append', default=[],
+                        help="Latencia de un proveedor, p. ej. replicate=lognormal:8:20, groq=fixed:0.5 o deepai=uniform:2:6")
+    parser.add_argument('--failure-rate', action='append', default=[],
+                        help="Fracción de llamadas que fallan, p. ej. groq=0.2")
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help="Multiplicador de todas las latencias simuladas (0.1 para pruebas rápidas)")
+    parser.add_argument('--warm-caches', action='store_true',
+                        help="Mantener activas las cachés de imágenes, audio y segmentos")
+    parser.add_argument('--keep-outputs', action='store_true', help="Conservar videos, audios e imágenes generados")
+    parser.add_argument('--output', default=None,
+                        help="Informe JSON (por defecto generated/benchmarks/pipeline_<fecha>.json)")
+    args = parser.parse_args()
+
+    try:
+        latencies = parse_pairs(args.latency)
+        failure_rates = parse_pairs(args.failure_rate, float)
+        server = MockProviderServer(latencies=latencies, failure_rates=failure_rates,
+                                    latency_scale=args.latency_scale)
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        return 1
+
+    if not shutil.which('ffmpeg'):
+        print("❌ FFmpeg no está disponible")
+        return 1
+
+    # Las claves se leen al crear las instancias globales: fijarlas antes de importarlas
+    os.environ.update(MOCK_API_KEYS)
+
+    from utils.api_router import api_router
+    from utils.image_cache import image_cache
+    from utils.audio_cache import audio_cache
+    from utils.segment_cache import segment_cache
+    from utils.tts_local import local_tts
+    from utils.telegram_bot import TelegramBot
+    from utils.dynamic_pipeline import run_dynamic_pipeline
+
+    work_dir = tempfile.mkdtemp(prefix='benchmark_pipeline_')
+
+    # Sin cachés cada reel paga todas sus llamadas y renders, como uno nuevo en producción
+    if not args.warm_caches:
+        image_cache.enabled = False
+        audio_cache.enabled = False
+        segment_cache.enabled = False
+
+    # Las estadísticas del enrutador del benchmark no se mezclan con las reales
+    api_router.stats_file = Path(work_dir) / 'api_router_stats.json'
+    api_router.stats = {}
+
+    server.start()
+    http_client.set_overrides(server.overrides())
+
+    # gTTS llama a Google con su propio cliente: la síntesis pasa por el endpoint simulado
+    def synthesize_gtts(clean_text, language, output_path):
+        with open(output_path, 'wb') as f:
+            f.write(server.synthesize_speech(clean_text, language))
+
+    local_tts.gtts_available = True
+    local_tts._synthesize_gtts = synthesize_gtts
+
+    telegram_bot = TelegramBot()
+    telegram_bot.bot_token = 'mock'
+    telegram_bot.chat_id = 'mock'
+    telegram_bot.base_url = f"{PROVIDER_ORIGINS['telegram']}/botmock"
+
+    def benchmark_reel(ctx, theme, style, draft):
+        result = run_dynamic_pipeline(ctx, theme=theme, style=style, draft=draft)
+
+        with ctx.step('publish') as step:
+            success, message = telegram_bot.send_video(result['video_file'], f"Benchmark {theme}")
+            if not success:
+                raise RuntimeError(f"Error publicando en Telegram: {message}")
+            step['message'] = message
+
+        return result
+
+    params = {'theme': args.theme, 'style': args.style, 'draft': args.draft}
+    levels = []
+
+    print("🧪 BENCHMARK DEL PIPELINE DINÁMICO")
+    print("=" * 60)
+
+    try:
+        for concurrency in args.concurrency:
+            reels = args.reels or concurrency * 2
+            level = run_level(concurrency, reels, params, benchmark_reel, work_dir, args.keep_outputs)
+            levels.append(level)
+            print_level(level)
+
+    finally:
+        http_client.set_overrides({})
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'params': dict(params, latency_scale=args.latency_scale, warm_caches=args.warm_caches),
+        'latencies': {provider: distribution.spec for provider, distribution in server.latencies.items()},
+        'failure_rates': server.failure_rates,
+        'levels': levels,
+        'providers': server.get_stats()
+    }
+
+    output_path = args.output or os.path.join(
+        'generated', 'benchmarks', f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    temp_file = f"{output_path}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, output_path)
+
+    print(f"\n💾 Informe: {output_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de video con imagen fija: codificación completa vs segmento único repetido con stream copy
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from utils.video_processor import VideoProcessor
+from utils.media_metadata import media_metadata
+
+def create_inputs(work_dir, duration):
+    """Imagen de prueba y audio sintético de la duración indicada"""
+    image_path = os.path.join(work_dir, 'still.png')
+    audio_path = os.path.join(work_dir, 'voice.mp3')
+
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=s=1024x1024',
+        '-frames:v', '1', image_path
+    ], check=True, timeout=60)
+
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', f"sine=frequency=220:duration={duration}",
+        '-c:a', 'libmp3lame', '-b:a', '64k', audio_path
+    ], check=True, timeout=60)
+
+    return image_path, audio_path
+
+def describe(video_path):
+    """Resumen de compatibilidad del MP4 generado"""
+    data = media_metadata.probe(video_path)
+    video = media_metadata.get_stream(data, 'video') or {}
+    audio = media_metadata.get_stream(data, 'audio') or {}
+
+    return (f"{video.get('codec_name')}/{video.get('profile')}/{video.get('pix_fmt')} "
+            f"{audio.get('codec_name')}@{audio.get('sample_rate')}Hz "
+            f"{media_metadata.duration_from_probe(data) or 0:.2f}s "
+            f"{os.path.getsize(video_path) / (1024 * 1024):.1f}MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar la ruta rápida de imagen fija con la codificación completa")
+    parser.add_argument('--durations', type=float, nargs='+', default=[15, 30, 60, 90],
+                        help="Duraciones de audio a probar (segundos)")
+    args = parser.parse_args()
+
+    processor = VideoProcessor()
+    if not processor.ffmpeg_available:
+        print("❌ FFmpeg no está disponible")
+        return 1
+
+    work_dir = tempfile.mkdtemp()
+
+    print("🧪 BENCHMARK DE VIDEO CON IMAGEN FIJA")
+    print("=" * 60)
+
+    try:
+        for duration in args.durations:
+            image_path, audio_path = create_inputs(work_dir, duration)
+            full_path = os.path.join(work_dir, f"full_{int(duration)}.mp4")
+            fast_path = os.path.join(work_dir, f"fast_{int(duration)}.mp4")
+
+            start = time.perf_counter()
+            full_ok, full_result = processor._create_video_full_encode(image_path, audio_path, full_path, duration)
+            full_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            fast_ok, fast_result = processor._create_still_video_fast(image_path, audio_path, fast_path, duration)
+            fast_time = time.perf_counter() - start
+
+            print(f"\n⏱️  Audio de {duration:.0f}s")
+            print(f"   Codificación completa: {full_time:6.2f}s  {describe(full_path) if full_ok else full_result[-200:]}")
+            print(f"   Segmento + copy:       {fast_time:6.2f}s  {describe(fast_path) if fast_ok else fast_result[-200:]}")
+            if full_ok and fast_ok and fast_time:
+                print(f"   🚀 Mejora: {full_time / fast_time:.1f}x")
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
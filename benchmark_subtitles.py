@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de subtítulos animados: cadena drawtext por palabra vs un único archivo ASS karaoke
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+from utils.video_processor import VideoProcessor
+from utils.ass_subtitles import karaoke_subtitles
+
+SAMPLE_TEXT = (
+    "La productividad no depende de trabajar más horas sino de elegir bien qué hacer primero. "
+    "Empieza el día con la tarea más importante y deja el correo para después. "
+    "Guarda este video y compártelo con alguien que lo necesite."
+)
+
+def build_script(word_count):
+    """Repetir el texto de ejemplo hasta tener el número de palabras pedido"""
+    base_words = SAMPLE_TEXT.split()
+    words = [base_words[i % len(base_words)] for i in range(word_count)]
+    return ' '.join(words)
+
+def render(filter_chain, duration, width, height):
+    """Renderizar un fondo liso con los subtítulos y descartar la salida; devuelve (segundos, ok)"""
+    cmd = [
+        'ffmpeg', '-y', '-hide_banner',
+        '-f', 'lavfi', '-i', f"color=c=0x202020:s={width}x{height}:r=30:d={duration}",
+        '-vf', filter_chain,
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-f', 'null', '-'
+    ]
+
+    start = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        print(f"   ❌ FFmpeg: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'error'}")
+
+    return elapsed, result.returncode == 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparar drawtext por palabra con subtítulos ASS")
+    parser.add_argument('--words', type=int, nargs='+', default=[25, 100, 250, 500],
+                        help="Número de palabras a probar")
+    parser.add_argument('--duration', type=float, default=30, help="Duración del video en segundos")
+    parser.add_argument('--width', type=int, default=1080)
+    parser.add_argument('--height', type=int, default=1920)
+    args = parser.parse_args()
+
+    processor = VideoProcessor()
+    if not processor.ffmpeg_available:
+        print("❌ FFmpeg no está disponible")
+        return 1
+
+    print("🧪 BENCHMARK DE SUBTÍTULOS ANIMADOS")
+    print("=" * 60)
+    print(f"{'Palabras':>9} | {'drawtext (s)':>12} | {'nodos':>6} | {'ASS (s)':>8} | {'mejora':>7}")
+    print("-" * 60)
+
+    temp_dir = tempfile.mkdtemp()
+
+    for word_count in args.words:
+        script_text = build_script(word_count)
+
+        # Render heredado: un drawtext por palabra
+        drawtext_filters = processor._build_animated_subtitle_filters(script_text, args.duration)
+        drawtext_time, drawtext_ok = render(','.join(drawtext_filters), args.duration, args.width, args.height)
+
+        # Render ASS: un único filtro
+        ass_path = os.path.join(temp_dir, f"bench_{word_count}.ass")
+        karaoke_subtitles.write_ass_file(script_text, args.duration, ass_path)
+        ass_time, ass_ok = render(karaoke_subtitles.build_filter(ass_path), args.duration, args.width, args.height)
+        os.remove(ass_path)
+
+        speedup = f"{drawtext_time / ass_time:.1f}x" if drawtext_ok and ass_ok and ass_time else "n/a"
+        print(f"{word_count:>9} | {drawtext_time:>12.2f} | {len(drawtext_filters):>6} | {ass_time:>8.2f} | {speedup:>7}")
+
+    os.rmdir(temp_dir)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de templates: renderiza un clip sintético con cada template, estilo de subtítulos y marca de agua
+Guarda tiempo, factor de tiempo real, memoria pico de FFmpeg y bitrate en JSON/CSV y compara con una línea base
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import itertools
+import subprocess
+from datetime import datetime
+
+from utils.video_processor import VideoProcessor
+from utils.video_templates import VideoTemplates
+from utils.ass_subtitles import karaoke_subtitles
+from utils.media_metadata import media_metadata
+from utils.template_layers import template_layers
+
+SAMPLE_TEXT = (
+    "La productividad no depende de trabajar más horas sino de elegir bien qué hacer primero. "
+    "Empieza el día con la tarea más importante y deja el correo para después. "
+    "Guarda este video y compártelo con alguien que lo necesite."
+)
+
+SUBTITLE_STYLES = ['none', 'simple', 'animated']
+
+REPORT_FIELDS = [
+    'template', 'subtitles', 'watermark', 'ok', 'prepare_s', 'wall_s',
+    'realtime_factor', 'peak_rss_mb', 'bitrate_kbps', 'filters'
+]
+
+def create_input(work_dir, duration):
+    """Clip vertical sintético (testsrc2 + tono) de la duración indicada"""
+    clip_path = os.path.join(work_dir, 'input.mp4')
+
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f"testsrc2=s=1080x1920:r=30:d={duration}",
+        '-f', 'lavfi', '-i', f"sine=frequency=220:duration={duration}",
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', '128k', '-shortest', clip_path
+    ], check=True, timeout=300)
+
+    return clip_path
+
+def build_graph(processor, templates, template_name, subtitle_style, watermark, duration, work_dir):
+    """
+    Grafo de filtros igual al del compositor para una combinación
+
+    Returns:
+        (filter_complex, ruta de la capa de template o None, número de filtros)
+    """
+    filters = ["scale=in_range=full:out_range=tv,format=yuv420p"]
+
+    if subtitle_style == 'animated':
+        ass_path = os.path.join(work_dir, 'bench.ass')
+        karaoke_subtitles.write_ass_file(SAMPLE_TEXT, duration, ass_path)
+        filters.append(karaoke_subtitles.build_filter(ass_path))
+    elif subtitle_style != 'none':
+        srt_path = os.path.join(work_dir, 'bench.srt')
+        processor._write_srt_file(SAMPLE_TEXT, duration, srt_path)
+        filters.append(processor._build_simple_subtitle_filter(srt_path))
+
+    if watermark:
+        filters.append(processor._build_watermark_filter('@redes_auto', 'bottom-right'))
+
+    layers = None
+    if template_name != 'none':
+        layers = templates.build_template_layers(SAMPLE_TEXT, template_name, work_dir)
+        if layers:
+            filters.extend(layers['before'])
+        else:
+            filters.extend(templates.build_template_filters(SAMPLE_TEXT, template_name))
+
+    if layers:
+        output_filters = layers['after'] + ["format=yuv420p"]
+        graph = (f"[0:v]{','.join(filters)}[base];"
+                 f"[base][1:v]{layers['overlay']},{','.join(output_filters)}[final]")
+        return graph, layers['layer'], len(filters) + len(output_filters) + 1
+
+    filters.append("format=yuv420p")
+    return f"[0:v]{','.join(filters)}[final]", None, len(filters)
+
+def render(clip_path, filter_complex, layer_path, output_path):
+    """
+    Renderizar con la codificación del compositor midiendo el proceso de FFmpeg
+
+    Returns:
+        (segundos, ok, memoria pico en MB o None)
+    """
+    cmd = ['ffmpeg', '-y', '-hide_banner', '-i', clip_path]
+    if layer_path:
+        cmd.extend(['-i', layer_path])
+    cmd.extend([
+        '-filter_complex', filter_complex,
+        '-map', '[final]', '-map', '0:a',
+        '-c:v', 'libx264', '-preset', 'fast', '-pix_fmt', 'yuv420p',
+        '-profile:v', 'baseline', '-level', '3.0',
+        '-c:a', 'aac', '-b:a', '128k', '-ar', '44100', '-ac', '2',
+        '-r', '30', output_path
+    ])
+
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr)
+
+        # wait4 da el uso de recursos de este proceso (no disponible en Windows)
+        peak_rss_mb = None
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(process.pid, 0)
+            # Igual que os.waitstatus_to_exitcode (3.9+): negativo si lo mató una señal
+            process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+            # ru_maxrss: KB en Linux, bytes en macOS
+            divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+            peak_rss_mb = round(usage.ru_maxrss / divisor, 1)
+        else:
+            process.wait()
+
+        elapsed = time.perf_counter() - start
+
+        if process.returncode != 0:
+            stderr.seek(0)
+            lines = stderr.read().decode('utf-8', errors='replace').strip().splitlines()
+            print(f"   ❌ FFmpeg: {lines[-1] if lines else 'error'}")
+
+    return elapsed, process.returncode == 0, peak_rss_mb
+
+def bitrate_kbps(video_path):
+    """Bitrate total del MP4 generado según ffprobe"""
+    data = media_metadata.probe(video_path) or {}
+    bit_rate = data.get('format', {}).get('bit_rate')
+    return round(int(bit_rate) / 1000) if bit_rate else None
+
+def combo_key(row):
+    return f"{row['template']}|{row['subtitles']}|{'wm' if row['watermark'] else 'no_wm'}"
+
+def write_report(rows, output_base, meta):
+    """Guardar el informe en JSON (con metadatos) y CSV"""
+    os.makedirs(os.path.dirname(output_base) or '.', exist_ok=True)
+
+    json_path = f"{output_base}.json"
+    temp_file = f"{json_path}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': rows}, f, indent=2, ensure_ascii=False)
+    os.replace(temp_file, json_path)
+
+    csv_path = f"{output_base}.csv"
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    return json_path, csv_path
+
+def compare_with_baseline(rows, baseline_path, threshold):
+    """Imprimir la variación de tiempo frente a la línea base; devuelve las combinaciones más lentas"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {combo_key(row): row for row in json.load(f).get('results', [])}
+
+    regressions = []
+
+    print(f"\n📊 Comparación con {baseline_path} (umbral {threshold:.0f}%)")
+    print("-" * 72)
+
+    for row in rows:
+        previous = baseline.get(combo_key(row))
+        if not previous or not previous.get('ok') or not row['ok'] or not previous.get('wall_s'):
+            continue
+
+        change = (row['wall_s'] - previous['wall_s']) / previous['wall_s'] * 100
+        flag = ''
+        if change > threshold:
+            flag = '⚠️  regresión'
+            regressions.append(combo_key(row))
+        elif change < -threshold:
+            flag = '🚀 mejora'
+
+        print(f"{combo_key(row):<40} {previous['wall_s']:>7.2f}s -> {row['wall_s']:>7.2f}s "
+              f"{change:>+7.1f}% {flag}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Medir el coste de render de cada template de VideoTemplates")
+    parser.add_argument('--templates', nargs='+', default=None,
+                        help="Templates a probar (por defecto todos y 'none')")
+    parser.add_argument('--subtitles', nargs='+', default=SUBTITLE_STYLES, choices=SUBTITLE_STYLES)
+    parser.add_argument('--watermark', choices=['both', 'on', 'off'], default='both')
+    parser.add_argument('--duration', type=float, default=10, help="Duración del clip sintético en segundos")
+    parser.add_argument('--no-layers', action='store_true',
+                        help="Forzar drawtext en lugar de capas de template precompuestas")
+    parser.add_argument('--output', default=None,
+                        help="Ruta base del informe sin extensión (por defecto generated/benchmarks/templates_<fecha>)")
+    parser.add_argument('--baseline', default=None, help="Informe JSON anterior con el que comparar")
+    parser.add_argument('--save-baseline', default=None, help="Guardar también este informe como línea base")
+    parser.add_argument('--threshold', type=float, default=10, help="Porcentaje de variación que cuenta como regresión")
+    args = parser.parse_args()
+
+    processor = VideoProcessor()
+    if not processor.ffmpeg_available:
+        print("❌ FFmpeg no está disponible")
+        return 1
+
+    templates = VideoTemplates()
+    template_names = args.templates or ['none'] + list(templates.templates.keys())
+    unknown = [name for name in template_names if name != 'none' and name not in templates.templates]
+    if unknown:
+        print(f"❌ Templates desconocidos: {', '.join(unknown)}")
+        return 1
+
+    if args.no_layers:
+        template_layers.enabled = False
+
+    watermarks = {'both': [False, True], 'on': [True], 'off': [False]}[args.watermark]
+    output_base = args.output or os.path.join(
+        'generated', 'benchmarks', f"templates_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+
+    work_dir = tempfile.mkdtemp()
+    rows = []
+
+    print("🧪 BENCHMARK DE TEMPLATES")
+    print("=" * 96)
+    print(f"{'Template':<18} | {'Subtítulos':<10} | {'Marca':<5} | {'prep (s)':>8} | {'render (s)':>10} | "
+          f"{'x tiempo real':>13} | {'RSS (MB)':>8} | {'kbps':>6}")
+    print("-" * 96)
+
+    try:
+        clip_path = create_input(work_dir, args.duration)
+
+        for template_name, subtitle_style, watermark in itertools.product(template_names, args.subtitles, watermarks):
+            combo_dir = tempfile.mkdtemp(dir=work_dir)
+            output_path = os.path.join(combo_dir, 'output.mp4')
+
+            # Preparación: subtítulos y capa del template (la capa puede venir de la caché de segmentos)
+            start = time.perf_counter()
+            filter_complex, layer_path, filter_count = build_graph(
+                processor, templates, template_name, subtitle_style, watermark, args.duration, combo_dir
+            )
+            prepare_time = time.perf_counter() - start
+
+            wall_time, ok, peak_rss_mb = render(clip_path, filter_complex, layer_path, output_path)
+
+            row = {
+                'template': template_name,
+                'subtitles': subtitle_style,
+                'watermark': watermark,
+                'ok': ok,
+                'prepare_s': round(prepare_time, 3),
+                'wall_s': round(wall_time, 3),
+                'realtime_factor': round(args.duration / wall_time, 2) if ok and wall_time else None,
+                'peak_rss_mb': peak_rss_mb,
+                'bitrate_kbps': bitrate_kbps(output_path) if ok else None,
+                'filters': filter_count
+            }
+            rows.append(row)
+
+            print(f"{template_name:<18} | {subtitle_style:<10} | {'sí' if watermark else 'no':<5} | "
+                  f"{prepare_time:>8.2f} | {wall_time:>10.2f} | {row['realtime_factor'] or 0:>13.2f} | "
+                  f"{peak_rss_mb or 0:>8.1f} | {row['bitrate_kbps'] or 0:>6}")
+
+            shutil.rmtree(combo_dir, ignore_errors=True)
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    meta = {
+        'created_at': datetime.now().isoformat(),
+        'duration': args.duration,
+        'template_layers': template_layers.enabled,
+        'platform': sys.platform
+    }
+
+    json_path, csv_path = write_report(rows, output_base, meta)
+    print(f"\n💾 Informe: {json_path} / {csv_path}")
+
+    if args.save_baseline:
+        write_report(rows, os.path.splitext(args.save_baseline)[0], meta)
+        print(f"💾 Línea base: {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(rows, args.baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} combinaciones más lentas que la línea base")
+            return 2
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
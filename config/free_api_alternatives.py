@@ -5,9 +5,10 @@ Alternativas gratuitas a APIs de pago
 """
 
 import os
-import requests
 from dotenv import load_dotenv
 
+from utils.http_client import http_client
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -150,8 +151,8 @@ class FreeAPIConfig:
         
         try:
             headers = {"Authorization": f"Bearer {self.huggingface_api_key}"}
-            response = requests.get("https://api-inference.huggingface.co/models/gpt2", 
-                                  headers=headers, timeout=10)
+            response = http_client.get("https://api-inference.huggingface.co/models/gpt2", 
+                                     headers=headers, timeout=10)
             return response.status_code == 200, f"Status: {response.status_code}"
         except Exception as e:
             return False, str(e)
@@ -163,8 +164,8 @@ class FreeAPIConfig:
         
         try:
             headers = {"Authorization": f"Bearer {self.groq_api_key}"}
-            response = requests.get("https://api.groq.com/openai/v1/models", 
-                                  headers=headers, timeout=10)
+            response = http_client.get("https://api.groq.com/openai/v1/models", 
+                                     headers=headers, timeout=10)
             return response.status_code == 200, f"Status: {response.status_code}"
         except Exception as e:
             return False, str(e)
@@ -176,8 +177,8 @@ class FreeAPIConfig:
         
         try:
             headers = {"Authorization": f"Bearer {self.cohere_api_key}"}
-            response = requests.get("https://api.cohere.ai/v1/models", 
-                                  headers=headers, timeout=10)
+            response = http_client.get("https://api.cohere.ai/v1/models", 
+                                     headers=headers, timeout=10)
             return response.status_code == 200, f"Status: {response.status_code}"
         except Exception as e:
             return False, str(e)
@@ -189,8 +190,8 @@ class FreeAPIConfig:
         
         try:
             headers = {"Authorization": f"Token {self.replicate_api_key}"}
-            response = requests.get("https://api.replicate.com/v1/models", 
-                                  headers=headers, timeout=10)
+            response = http_client.get("https://api.replicate.com/v1/models", 
+                                     headers=headers, timeout=10)
             return response.status_code == 200, f"Status: {response.status_code}"
         except Exception as e:
             return False, str(e)
@@ -202,8 +203,8 @@ class FreeAPIConfig:
         
         try:
             headers = {"api-key": self.deepai_api_key}
-            response = requests.get("https://api.deepai.org/api/text2img", 
-                                  headers=headers, timeout=10)
+            response = http_client.get("https://api.deepai.org/api/text2img", 
+                                     headers=headers, timeout=10)
             return response.status_code in [200, 400], f"Status: {response.status_code}"
         except Exception as e:
             return False, str(e)
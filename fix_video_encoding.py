@@ -8,26 +8,49 @@ Convierte videos con problemas de compatibilidad a formato ultra compatible
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 from datetime import datetime
 
+from utils.media_metadata import media_metadata
+from utils.parallel_encoder import parallel_encoder
+from utils.ffmpeg_runner import ffmpeg_runner
+from utils.batch_engine import batch_engine
+
+# Filtros de video para forzar conversión correcta
+COMPATIBLE_VIDEO_FILTER = 'scale=in_range=full:out_range=tv,format=yuv420p'
+
+# Configuración de video ULTRA COMPATIBLE
+ULTRA_COMPATIBLE_VIDEO_ARGS = [
+    '-c:v', 'libx264',
+    '-preset', 'fast',
+    '-crf', '23',  # Calidad balanceada
+    '-pix_fmt', 'yuv420p',  # CRÍTICO: Formato compatible
+    '-profile:v', 'baseline',  # Perfil más compatible
+    '-level', '3.0',  # Nivel compatible con dispositivos antiguos
+    '-colorspace', 'bt709',  # Espacio de color estándar
+    '-color_primaries', 'bt709',
+    '-color_trc', 'bt709',
+    '-color_range', 'tv',  # Rango de color TV (limitado)
+]
+
+# Configuración de audio ULTRA COMPATIBLE
+ULTRA_COMPATIBLE_AUDIO_ARGS = [
+    '-c:a', 'aac',
+    '-b:a', '128k',  # Bitrate fijo
+    '-ar', '44100',  # Sample rate estándar
+    '-ac', '2',  # Estéreo
+    '-aac_coder', 'twoloop',  # Codificador AAC más compatible
+]
+
 def check_video_compatibility(video_path):
     """Verificar si un video tiene problemas de compatibilidad"""
     
     try:
-        # Obtener información del video con ffprobe
-        cmd = [
-            'ffprobe', '-v', 'quiet', '-print_format', 'json', 
-            '-show_format', '-show_streams', video_path
-        ]
+        # Obtener información del video con ffprobe (vía índice de metadatos)
+        info = media_metadata.probe(video_path)
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            return False, f"Error ejecutando ffprobe: {result.stderr}"
-        
-        info = json.loads(result.stdout)
+        if info is None:
+            return False, "Error ejecutando ffprobe"
         
         # Verificar streams
         video_stream = None
@@ -74,33 +97,33 @@ def fix_video_encoding(input_path, output_path=None):
     print(f"🔧 Corrigiendo codificación: {os.path.basename(input_path)}")
     
     try:
+        # Videos largos: segmentos codificados en paralelo y unidos sin recodificar
+        if parallel_encoder.should_split(input_path):
+            print(f"   📝 Ejecutando recodificación paralela ({parallel_encoder.workers} procesos)...")
+            success, result = parallel_encoder.encode(
+                input_path, output_path,
+                video_args=ULTRA_COMPATIBLE_VIDEO_ARGS,
+                audio_args=ULTRA_COMPATIBLE_AUDIO_ARGS,
+                video_filter=COMPATIBLE_VIDEO_FILTER,
+                output_args=['-movflags', '+faststart']
+            )
+            
+            if success:
+                return _verify_fixed_video(input_path, output_path)
+            print(f"   ⚠️  Recodificación paralela falló, usando un solo proceso: {result}")
+        
         # Comando FFmpeg para recodificar con configuración ultra compatible
         cmd = [
             'ffmpeg', '-y',
             '-i', input_path,
             
             # Filtros de video para forzar conversión correcta
-            '-vf', 'scale=in_range=full:out_range=tv,format=yuv420p',
+            '-vf', COMPATIBLE_VIDEO_FILTER,
             
-            # Configuración de video ULTRA COMPATIBLE
-            '-c:v', 'libx264',
-            '-preset', 'fast',
-            '-crf', '23',  # Calidad balanceada
-            '-pix_fmt', 'yuv420p',  # CRÍTICO: Formato compatible
-            '-profile:v', 'baseline',  # Perfil más compatible
-            '-level', '3.0',  # Nivel compatible con dispositivos antiguos
+            *ULTRA_COMPATIBLE_VIDEO_ARGS,
             '-movflags', '+faststart',  # Optimización para streaming
-            '-colorspace', 'bt709',  # Espacio de color estándar
-            '-color_primaries', 'bt709',
-            '-color_trc', 'bt709',
-            '-color_range', 'tv',  # Rango de color TV (limitado)
             
-            # Configuración de audio ULTRA COMPATIBLE
-            '-c:a', 'aac',
-            '-b:a', '128k',  # Bitrate fijo
-            '-ar', '44100',  # Sample rate estándar
-            '-ac', '2',  # Estéreo
-            '-aac_coder', 'twoloop',  # Codificador AAC más compatible
+            *ULTRA_COMPATIBLE_AUDIO_ARGS,
             
             # Optimizaciones adicionales
             '-avoid_negative_ts', 'make_zero',
@@ -111,26 +134,10 @@ def fix_video_encoding(input_path, output_path=None):
         ]
         
         print(f"   📝 Ejecutando recodificación...")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        result = ffmpeg_runner.run(cmd, duration=media_metadata.get_duration(input_path))
         
         if result.returncode == 0 and os.path.exists(output_path):
-            # Verificar que el video corregido es compatible
-            is_compatible, issues = check_video_compatibility(output_path)
-            
-            if is_compatible:
-                print(f"   ✅ Video corregido exitosamente")
-                
-                # Mostrar información del archivo corregido
-                original_size = os.path.getsize(input_path) / (1024 * 1024)
-                fixed_size = os.path.getsize(output_path) / (1024 * 1024)
-                
-                print(f"   📊 Tamaño original: {original_size:.1f}MB")
-                print(f"   📊 Tamaño corregido: {fixed_size:.1f}MB")
-                
-                return True, output_path
-            else:
-                print(f"   ⚠️  Video corregido pero aún tiene problemas: {issues}")
-                return False, f"Problemas persistentes: {issues}"
+            return _verify_fixed_video(input_path, output_path)
         else:
             print(f"   ❌ Error en FFmpeg: {result.stderr}")
             return False, f"Error FFmpeg: {result.stderr}"
@@ -139,6 +146,58 @@ def fix_video_encoding(input_path, output_path=None):
         print(f"   ❌ Error corrigiendo video: {str(e)}")
         return False, f"Error: {str(e)}"
 
+def _verify_fixed_video(input_path, output_path):
+    """Verificar que el video corregido es compatible"""
+    is_compatible, issues = check_video_compatibility(output_path)
+    
+    if is_compatible:
+        print(f"   ✅ Video corregido exitosamente")
+        
+        # Mostrar información del archivo corregido
+        original_size = os.path.getsize(input_path) / (1024 * 1024)
+        fixed_size = os.path.getsize(output_path) / (1024 * 1024)
+        
+        print(f"   📊 Tamaño original: {original_size:.1f}MB")
+        print(f"   📊 Tamaño corregido: {fixed_size:.1f}MB")
+        
+        return True, output_path
+    else:
+        print(f"   ⚠️  Video corregido pero aún tiene problemas: {issues}")
+        return False, f"Problemas persistentes: {issues}"
+
+def _fix_batch_video(video_path, problems, replace_originals):
+    """Corregir un video del lote con backup y restauración si se reemplaza el original"""
+    print(f"\n{'='*60}")
+    print(f"🎬 Procesando: {os.path.basename(video_path)}")
+    print(f"   Problemas: {', '.join(problems)}")
+    
+    # Determinar ruta de salida
+    if replace_originals:
+        # Crear backup del original (si ya existe, viene de un lote interrumpido)
+        backup_path = video_path.replace('.mp4', '_backup.mp4')
+        if not os.path.exists(backup_path):
+            os.rename(video_path, backup_path)
+        output_path = video_path
+        print(f"   💾 Backup creado: {os.path.basename(backup_path)}")
+    else:
+        output_path = video_path.replace('.mp4', '_fixed.mp4')
+    
+    # Corregir video
+    success, result = fix_video_encoding(video_path if not replace_originals else backup_path, output_path)
+    
+    if success:
+        if replace_originals:
+            # Eliminar backup si la corrección fue exitosa
+            os.remove(backup_path)
+            print(f"   🗑️  Backup eliminado (corrección exitosa)")
+    else:
+        if replace_originals:
+            # Restaurar backup si falló
+            os.replace(backup_path, video_path)
+            print(f"   🔄 Original restaurado desde backup")
+    
+    return success, result
+
 def batch_fix_videos(video_folders, replace_originals=False):
     """Corregir múltiples videos en lote"""
     
@@ -148,77 +207,66 @@ def batch_fix_videos(video_folders, replace_originals=False):
     # Buscar videos en las carpetas especificadas
     videos_to_fix = []
     
-    for folder in video_folders:
+    for folder_index, folder in enumerate(video_folders):
         if os.path.exists(folder):
             print(f"📁 Escaneando carpeta: {folder}")
             
-            for file in os.listdir(folder):
-                if file.endswith('.mp4') and not file.endswith('_fixed.mp4'):
-                    video_path = os.path.join(folder, file)
-                    
-                    # Verificar si necesita corrección
-                    is_compatible, problems = check_video_compatibility(video_path)
-                    
-                    if not is_compatible:
-                        videos_to_fix.append({
-                            'path': video_path,
-                            'problems': problems
-                        })
-                        print(f"   ⚠️  {file}: {len(problems)} problemas")
-                    else:
-                        print(f"   ✅ {file}: Compatible")
+            video_paths = [
+                os.path.join(folder, file) for file in os.listdir(folder)
+                if file.endswith('.mp4') and not file.endswith(('_fixed.mp4', '_backup.mp4'))
+            ]
+            
+            # Sondear toda la carpeta de una vez (en paralelo y con caché)
+            media_metadata.probe_many(video_paths)
+            
+            for video_path in video_paths:
+                file = os.path.basename(video_path)
+                
+                # Verificar si necesita corrección
+                is_compatible, problems = check_video_compatibility(video_path)
+                
+                if not is_compatible:
+                    videos_to_fix.append({
+                        'id': video_path,
+                        'input': video_path,
+                        'problems': problems,
+                        # Las carpetas listadas primero se corrigen antes
+                        'priority': len(video_folders) - folder_index
+                    })
+                    print(f"   ⚠️  {file}: {len(problems)} problemas")
+                else:
+                    print(f"   ✅ {file}: Compatible")
     
     if not videos_to_fix:
         print("\n🎉 ¡Todos los videos ya son compatibles!")
         return
     
     print(f"\n📊 Videos que necesitan corrección: {len(videos_to_fix)}")
+    print(f"⚙️  {batch_engine.workers} videos en paralelo, {batch_engine.threads_per_job} hilos de FFmpeg por video")
     
-    # Procesar cada video
-    fixed_count = 0
+    def fix_one(job):
+        return _fix_batch_video(job['input'], job['problems'], replace_originals)
     
-    for video_info in videos_to_fix:
-        video_path = video_info['path']
-        problems = video_info['problems']
-        
-        print(f"\n{'='*60}")
-        print(f"🎬 Procesando: {os.path.basename(video_path)}")
-        print(f"   Problemas: {', '.join(problems)}")
+    def report(job):
+        name = os.path.basename(job['input'])
+        resumed = " (reanudado)" if job.get('resumed') else ""
         
-        # Determinar ruta de salida
-        if replace_originals:
-            # Crear backup del original
-            backup_path = video_path.replace('.mp4', '_backup.mp4')
-            os.rename(video_path, backup_path)
-            output_path = video_path
-            print(f"   💾 Backup creado: {os.path.basename(backup_path)}")
+        if job['status'] == 'done':
+            print(f"   ✅ {name}: corregido{resumed}")
         else:
-            output_path = video_path.replace('.mp4', '_fixed.mp4')
-        
-        # Corregir video
-        success, result = fix_video_encoding(video_path if not replace_originals else backup_path, output_path)
-        
-        if success:
-            fixed_count += 1
-            
-            if replace_originals:
-                # Eliminar backup si la corrección fue exitosa
-                os.remove(backup_path)
-                print(f"   🗑️  Backup eliminado (corrección exitosa)")
-        else:
-            print(f"   ❌ Error: {result}")
-            
-            if replace_originals:
-                # Restaurar backup si falló
-                os.rename(backup_path, video_path)
-                print(f"   🔄 Original restaurado desde backup")
+            print(f"   ❌ {name}: {job.get('error')}{resumed}")
+    
+    # Procesar los videos en paralelo; relanzar el mismo lote tras un corte lo reanuda
+    batch_id = batch_engine.make_batch_id('fix_video_encoding', video_folders, replace_originals)
+    finished = batch_engine.run(batch_id, videos_to_fix, fix_one, on_result=report)
+    fixed_count = sum(1 for job in finished if job['status'] == 'done')
     
     print(f"\n{'='*60}")
     print(f"📊 RESULTADO FINAL:")
-    print(f"   ✅ Videos corregidos: {fixed_count}/{len(videos_to_fix)}")
-    print(f"   📁 Videos procesados en total: {len(videos_to_fix)}")
+    print(f"   ✅ Videos corregidos: {fixed_count}/{len(finished)}")
+    print(f"   📁 Videos procesados en total: {len(finished)}")
     
-    if fixed_count == len(videos_to_fix):
+    if fixed_count == len(finished):
         print("🎉 ¡TODOS LOS VIDEOS FUERON CORREGIDOS EXITOSAMENTE!")
         print("   ✅ Ahora todos los videos son compatibles con cualquier reproductor")
         print("   ✅ Optimizados para redes sociales y streaming")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la lógica pura del pipeline (sin FFmpeg ni APIs)
+DAG de pasos, tiempos karaoke, reparto de segmentos, caché LRU y percentiles del benchmark
+"""
+
+import os
+import re
+import time
+import tempfile
+
+from utils.pipeline_dag import PipelineDAG
+from utils.ass_subtitles import KaraokeSubtitleRenderer
+from utils.transition_renderer import TransitionRenderer
+from utils.content_cache import ContentCache
+from benchmark_pipeline import percentile
+
+def test_pipeline_dag_runs_branches_in_parallel():
+    """Las ramas independientes se solapan y el camino crítico sigue a la más lenta"""
+    def sleeper(seconds, value):
+        def step(results):
+            time.sleep(seconds)
+            return value
+        return step
+
+    dag = PipelineDAG('test')
+    dag.add_step('root', sleeper(0.05, 'root'))
+    dag.add_step('slow', sleeper(0.4, 'slow'), depends_on=['root'])
+    dag.add_step('fast', sleeper(0.1, 'fast'), depends_on=['root'])
+    dag.add_step('join', lambda results: results['slow'] + results['fast'], depends_on=['slow', 'fast'])
+
+    results, report = dag.run()
+    steps = report['steps']
+
+    assert results['join'] == 'slowfast'
+    assert steps['fast']['start'] < steps['slow']['end']
+    assert steps['slow']['start'] < steps['fast']['end']
+    assert report['wall_time'] < report['sequential_time']
+    assert report['critical_path'] == ['root', 'slow', 'join']
+
+def _ass_seconds(value):
+    hours, minutes, seconds = value.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def test_karaoke_timeline_adds_up_to_audio_duration():
+    """Las pausas (\\k) y las palabras (\\kf) de cada evento suman su duración, y los eventos cubren el audio"""
+    word_timings = [
+        {'word': 'Hola', 'start': 0.0, 'end': 0.333},
+        {'word': 'mundo.', 'start': 0.8, 'end': 1.21},
+        {'word': 'Esto', 'start': 1.9, 'end': 2.2},
+        {'word': 'es', 'start': 2.2, 'end': 2.35},
+        {'word': 'karaoke', 'start': 2.9, 'end': 3.5}
+    ]
+
+    renderer = KaraokeSubtitleRenderer(words_per_line=3)
+    ass_path = os.path.join(tempfile.mkdtemp(), 'test.ass')
+    renderer.write_ass_file('', 3.5, ass_path, word_timings)
+
+    with open(ass_path, 'r', encoding='utf-8') as f:
+        events = [line.split(',', 9) for line in f if line.startswith('Dialogue:')]
+
+    assert len(events) == 2
+    assert '{\\k47}' in events[0][9]
+
+    for event in events:
+        start, end, text = _ass_seconds(event[1]), _ass_seconds(event[2]), event[9]
+        centiseconds = sum(int(value) for value in re.findall(r'\\kf?(\d+)', text))
+        assert centiseconds == round((end - start) * 100)
+
+    assert _ass_seconds(events[0][1]) == 0.0
+    assert _ass_seconds(events[-1][2]) == 3.5
+
+def test_plan_segments_covers_every_frame():
+    """Tramos propios más transiciones suman exactamente los fotogramas del audio"""
+    renderer = TransitionRenderer(fps=30, transition_duration=0.5, motion_preset='static')
+    images = [
+        {'image_path': 'a.png', 'end_time': 3.0},
+        {'image_path': 'b.png', 'end_time': 7.2},
+        {'image_path': 'c.png', 'end_time': 10.0}
+    ]
+
+    clips = renderer.plan_segments(images, 10.0)
+    transition_frames = int(round(0.5 * 30))
+
+    assert len(clips) == 3
+    assert clips[0]['frames'][0] == 0 and clips[-1]['frames'][2] == 0
+    bodies = sum(clip['frames'][1] for clip in clips)
+    assert bodies + (len(clips) - 1) * transition_frames == 300
+
+def test_plan_segments_rejects_overlapping_windows():
+    """Ventanas más cortas que una transición no se pueden segmentar"""
+    renderer = TransitionRenderer(fps=30, transition_duration=0.5, motion_preset='static')
+    images = [
+        {'image_path': 'a.png', 'end_time': 3.0},
+        {'image_path': 'b.png', 'end_time': 3.1},
+        {'image_path': 'c.png', 'end_time': 10.0}
+    ]
+
+    assert renderer.plan_segments(images, 10.0) == []
+
+def test_content_cache_evicts_least_recently_used():
+    """Al pasar del límite sale la entrada usada hace más tiempo, no la más antigua"""
+    work_dir = tempfile.mkdtemp()
+    cache = ContentCache(os.path.join(work_dir, 'cache'), 'TEST_CACHE', 'pruebas', max_size_mb=1, enabled=True)
+
+    def put(key):
+        path = os.path.join(work_dir, f"{key}.bin")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(400 * 1024))
+        return cache.put(key, path)
+
+    put('a')
+    put('b')
+    time.sleep(0.01)
+    assert cache.get('a')
+    put('c')
+
+    assert cache.get('a') and cache.get('c')
+    assert cache.get('b') is None
+    assert cache.get_stats()['evictions'] == 1
+
+def test_percentile_nearest_rank():
+    """Percentil por rango más cercano: ceil(fracción * n)"""
+    values = list(range(10, 0, -1))
+
+    assert percentile(values, 0.50) == 5
+    assert percentile(values, 0.90) == 9
+    assert percentile(values, 0.95) == 10
+    assert percentile(values, 0.0) == 1
+    assert percentile([4.2], 0.99) == 4.2
+    assert percentile([], 0.5) is None
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
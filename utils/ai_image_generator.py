@@ -5,7 +5,6 @@ Utiliza APIs gratuitas para generar fondos de lujo
 """
 
 import os
-import requests
 import json
 import random
 from datetime import datetime
@@ -13,6 +12,11 @@ from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 import tempfile
 import base64
+import hashlib
+
+from utils.image_cache import image_cache
+from utils.prediction_waiter import prediction_waiter
+from utils.http_client import http_client
 
 class AIImageGenerator:
     def __init__(self):
@@ -126,8 +130,8 @@ class AIImageGenerator:
         """Obtener estilos disponibles"""
         return self.styles
     
-    def generate_image(self, prompt: str, style: str = 'luxury') -> Tuple[bool, str, str, str]:
-        """Generar imagen con IA"""
+    def generate_image(self, prompt: str, style: str = 'luxury', use_cache: bool = True) -> Tuple[bool, str, str, str]:
+        """Generar imagen con IA (reutiliza la caché si el prompt ya se generó)"""
         if not self.is_configured():
             return False, "No hay APIs de generación de imágenes configuradas", "", "Error"
         
@@ -140,17 +144,24 @@ class AIImageGenerator:
         api_used = None
         
         if self.replicate_api_key:
-            success, result, url, api = self._generate_with_replicate(enhanced_prompt)
+            model = "flux-schnell" if self._is_person_prompt(enhanced_prompt) else "sdxl"
+            success, result, url, api = self._generate_cached(
+                'replicate', model, enhanced_prompt, 1080, 1920, self._generate_with_replicate, use_cache
+            )
             if success:
                 image_path, image_url, api_used = result, url, api
         
         if not image_path and self.deepai_api_key:
-            success, result, url, api = self._generate_with_deepai(enhanced_prompt)
+            success, result, url, api = self._generate_cached(
+                'deepai', 'text2img', enhanced_prompt, 0, 0, self._generate_with_deepai, use_cache
+            )
             if success:
                 image_path, image_url, api_used = result, url, api
         
         if not image_path and self.getimg_api_key:
-            success, result, url, api = self._generate_with_getimg(enhanced_prompt)
+            success, result, url, api = self._generate_cached(
+                'getimg', 'stable-diffusion-v1-5', enhanced_prompt, 1024, 1024, self._generate_with_getimg, use_cache
+            )
             if success:
                 image_path, image_url, api_used = result, url, api
         
@@ -161,6 +172,28 @@ class AIImageGenerator:
         
         return bool(image_path), image_path, image_url or "", api_used
     
+    def _generate_cached(self, provider: str, model: str, prompt: str, width: int, height: int,
+                         generate, use_cache: bool = True) -> Tuple[bool, str, str, str]:
+        """Consultar la caché de imágenes antes de llamar al proveedor y guardar el resultado"""
+        if not use_cache:
+            return generate(prompt)
+        
+        key = image_cache.make_key(provider, model, prompt, width, height)
+        # Copia propia en generated/images: la expulsión de la caché no puede borrar el artefacto
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        cached_path = image_cache.checkout(key, str(self.images_dir / f"image_{provider}_{timestamp}.jpg"))
+        
+        if cached_path:
+            print(f"♻️ Imagen recuperada de caché ({provider})")
+            return True, cached_path, "", f"{provider.capitalize()} (caché)"
+        
+        success, image_path, image_url, api_used = generate(prompt)
+        
+        if success and image_path:
+            image_cache.put(key, image_path, {'provider': provider, 'model': model, 'api_used': api_used})
+        
+        return success, image_path, image_url, api_used
+    
     def generate_from_script(self, script: str, style: str = 'luxury') -> Tuple[bool, str, str, str]:
         """Generar imagen basada en un script"""
         # Extraer conceptos clave del script
@@ -286,6 +319,10 @@ class AIImageGenerator:
         # Agregar palabras clave del estilo
         enhanced = f"{prompt}, {', '.join(style_keywords[:3])}"
         
+        # Modificadores elegidos de forma determinista para que el mismo
+        # prompt y estilo produzcan siempre la misma clave de caché
+        rng = random.Random(hashlib.sha256(f"{prompt}|{style}".encode('utf-8')).hexdigest())
+        
         if is_person_style:
             # Modificadores específicos para personas
             person_modifiers = [
@@ -293,14 +330,14 @@ class AIImageGenerator:
                 "modern fashion", "Instagram worthy", "high-end photography",
                 "natural lighting", "sharp facial details", "charismatic presence"
             ]
-            enhanced += f", {', '.join(random.sample(person_modifiers, 4))}"
+            enhanced += f", {', '.join(rng.sample(person_modifiers, 4))}"
         else:
             # Modificadores para objetos/paisajes
             quality_modifiers = [
                 "high quality", "professional photography", "ultra realistic",
                 "4K resolution", "cinematic lighting", "detailed", "premium"
             ]
-            enhanced += f", {', '.join(random.sample(quality_modifiers, 3))}"
+            enhanced += f", {', '.join(rng.sample(quality_modifiers, 3))}"
         
         return enhanced
     
@@ -372,21 +409,13 @@ class AIImageGenerator:
     def _generate_with_replicate(self, prompt: str) -> Tuple[bool, str, str, str]:
         """Generar imagen con Replicate usando Flux para personas realistas"""
         try:
-            import time
-            
-            url = "https://api.replicate.com/v1/predictions"
             headers = {
                 "Authorization": f"Token {self.replicate_api_key}",
                 "Content-Type": "application/json"
             }
             
             # Detectar si el prompt es para personas y usar el modelo apropiado
-            is_person_prompt = any(keyword in prompt.lower() for keyword in [
-                'person', 'man', 'woman', 'people', 'human', 'face', 'portrait',
-                'businessman', 'entrepreneur', 'influencer', 'speaker', 'trader'
-            ])
-            
-            if is_person_prompt:
+            if self._is_person_prompt(prompt):
                 # Usar Flux para personas realistas
                 model_version = "black-forest-labs/flux-schnell"
                 enhanced_prompt = self._enhance_person_prompt(prompt)
@@ -416,41 +445,30 @@ class AIImageGenerator:
                     }
                 }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            # Respuesta síncrona si el modelo termina rápido; si no, webhook o backoff
+            prediction = prediction_waiter.run(headers, data, timeout=300)
             
-            if response.status_code == 201:
-                prediction = response.json()
-                prediction_id = prediction['id']
-                
-                # Esperar a que se complete la generación
-                for _ in range(30):  # Máximo 30 intentos (5 minutos)
-                    time.sleep(10)
-                    
-                    status_response = requests.get(
-                        f"https://api.replicate.com/v1/predictions/{prediction_id}",
-                        headers=headers,
-                        timeout=10
-                    )
-                    
-                    if status_response.status_code == 200:
-                        status_data = status_response.json()
-                        
-                        if status_data['status'] == 'succeeded':
-                            image_url = status_data['output'][0]
-                            image_path = self._download_image(image_url, 'replicate')
-                            return True, image_path, image_url, "Replicate (SDXL)"
-                        
-                        elif status_data['status'] == 'failed':
-                            return False, "", "", "Replicate Failed"
-                
+            if prediction['status'] == 'succeeded':
+                image_url = prediction['output'][0]
+                image_path = self._download_image(image_url, 'replicate')
+                return True, image_path, image_url, "Replicate (SDXL)"
+            
+            elif prediction['status'] == 'timeout':
                 return False, "", "", "Replicate Timeout"
-            else:
-                return False, "", "", f"Replicate Error: {response.status_code}"
+            
+            return False, "", "", "Replicate Failed"
         
         except Exception as e:
             print(f"Error con Replicate: {str(e)}")
             return False, "", "", f"Replicate Exception: {str(e)}"
     
+    def _is_person_prompt(self, prompt: str) -> bool:
+        """Detectar si el prompt describe personas (Flux) u objetos/paisajes (SDXL)"""
+        return any(keyword in prompt.lower() for keyword in [
+            'person', 'man', 'woman', 'people', 'human', 'face', 'portrait',
+            'businessman', 'entrepreneur', 'influencer', 'speaker', 'trader'
+        ])
+    
     def _enhance_person_prompt(self, base_prompt: str) -> str:
         """Mejorar prompts específicamente para generar personas realistas"""
         
@@ -498,7 +516,7 @@ class AIImageGenerator:
             headers = {"api-key": self.deepai_api_key}
             data = {"text": prompt}
             
-            response = requests.post(url, headers=headers, data=data, timeout=60)
+            response = http_client.post(url, headers=headers, data=data, timeout=60)
             
             if response.status_code == 200:
                 result = response.json()
@@ -530,7 +548,7 @@ class AIImageGenerator:
                 "guidance": 7.5
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=60)
+            response = http_client.post(url, headers=headers, json=data, timeout=60)
             
             if response.status_code == 200:
                 result = response.json()
@@ -548,7 +566,7 @@ class AIImageGenerator:
     def _download_image(self, image_url: str, api_name: str) -> str:
         """Descargar imagen desde URL"""
         try:
-            response = requests.get(image_url, timeout=30)
+            response = http_client.get(image_url, timeout=30)
             
             if response.status_code == 200:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
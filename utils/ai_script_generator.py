@@ -5,13 +5,15 @@ Utiliza APIs gratuitas de IA para generar contenido
 """
 
 import os
-import requests
 import json
 import random
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 
+from utils.http_client import http_client
+from utils.tracing import tracer
+
 class AIScriptGenerator:
     def __init__(self):
         # APIs de IA gratuitas
@@ -326,8 +328,10 @@ El tren está saliendo de la estación.
                 'scripts': scripts
             }
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with tracer.span('file.write', kind='file', path=str(file_path)) as span:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                span['attributes']['bytes'] = os.path.getsize(file_path)
             
             return str(file_path)
         
@@ -411,7 +415,7 @@ El tren está saliendo de la estación.
                 "temperature": 0.7
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -446,7 +450,7 @@ El tren está saliendo de la estación.
                 }
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -482,7 +486,7 @@ El tren está saliendo de la estación.
                 "return_likelihoods": "NONE"
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Enrutador de APIs por tiempo esperado de respuesta
+Latencia EWMA + histograma (p95), tasa de errores, límites de uso (429) y circuit breaker por proveedor
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from utils.metrics import metrics
+
+# Límites superiores (segundos) de los cubos del histograma de latencia
+LATENCY_BUCKETS = [0.5, 1, 2, 5, 10, 20, 30, 60, 120, float('inf')]
+
+# Latencia supuesta para proveedores sin muestras (se exploran antes que uno lento conocido)
+DEFAULT_LATENCY = {'script': 5.0, 'image': 30.0, 'tts': 5.0}
+
+# Latencia de cada llamada a un proveedor de IA (script, imagen, tts) y su resultado
+PROVIDER_SECONDS = metrics.histogram('provider_call_seconds', 'Latencia de las llamadas a proveedores de IA',
+                                     ['kind', 'provider', 'status'])
+
+class APIRouter:
+    def __init__(self, stats_file: str = 'config/api_router_stats.json', alpha: float = 0.3,
+                 failure_threshold: int = None, cooldown: float = None):
+        self.stats_file = Path(stats_file)
+        self.alpha = alpha
+
+        # Fallos consecutivos que abren el circuito y segundos que el proveedor queda fuera
+        self.failure_threshold = failure_threshold or int(os.getenv('API_CIRCUIT_FAILURES', '3'))
+        self.cooldown = cooldown or float(os.getenv('API_CIRCUIT_COOLDOWN', '120'))
+
+        self.lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, Dict]] = self._load_stats()
+
+    def record(self, api_type: str, api_id: str, latency: float, success: bool,
+               rate_limited: bool = False):
+        """Registrar el resultado de una llamada"""
+        PROVIDER_SECONDS.observe(latency, kind=api_type, provider=api_id,
+                                 status='ok' if success else ('rate_limited' if rate_limited else 'error'))
+
+        with self.lock:
+            stats = self._get_stats(api_type, api_id)
+
+            stats['calls'] += 1
+            stats['last_call'] = time.time()
+
+            if success:
+                stats['ewma_latency'] = latency if stats['ewma_latency'] is None else \
+                    self.alpha * latency + (1 - self.alpha) * stats['ewma_latency']
+
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if latency <= bound:
+                        stats['histogram'][i] += 1
+                        break
+
+                stats['consecutive_failures'] = 0
+                stats['open_until'] = 0
+            else:
+                stats['failures'] += 1
+                stats['consecutive_failures'] += 1
+
+            if rate_limited:
+                stats['rate_limited'] += 1
+
+            stats['error_rate'] = self.alpha * (0.0 if success else 1.0) + (1 - self.alpha) * stats['error_rate']
+
+            # Un 429 expulsa al proveedor de inmediato; los errores tras N seguidos
+            if rate_limited or stats['consecutive_failures'] >= self.failure_threshold:
+                stats['open_until'] = time.time() + self.cooldown
+                stats['circuit_opens'] += 1
+
+            self._save_stats()
+
+    def rank(self, api_type: str, candidates: List[Dict]) -> List[Dict]:
+        """
+        Ordenar candidatos ({'id', 'priority', ...}) por tiempo esperado de respuesta
+
+        Los proveedores con el circuito abierto se descartan; si todos lo están,
+        se devuelven ordenados por cuál se reabre antes.
+        """
+        now = time.time()
+
+        with self.lock:
+            closed = [api for api in candidates
+                      if self._get_stats(api_type, api['id'])['open_until'] <= now]
+
+            if not closed:
+                return sorted(candidates, key=lambda api: self._get_stats(api_type, api['id'])['open_until'])
+
+            return sorted(closed, key=lambda api: (self._expected_time(api_type, api['id']), api.get('priority', 0)))
+
+    def get_stats(self) -> Dict:
+        """Resumen por proveedor: EWMA, p95, errores, 429 y estado del circuito"""
+        now = time.time()
+        summary = {}
+
+        with self.lock:
+            for api_type, providers in self.stats.items():
+                summary[api_type] = {}
+
+                for api_id, stats in providers.items():
+                    summary[api_type][api_id] = {
+                        'calls': stats['calls'],
+                        'failures': stats['failures'],
+                        'rate_limited': stats['rate_limited'],
+                        'error_rate': round(stats['error_rate'], 3),
+                        'ewma_latency': round(stats['ewma_latency'], 2) if stats['ewma_latency'] is not None else None,
+                        'p95_latency': self._percentile(stats['histogram'], 0.95),
+                        'expected_time': round(self._expected_time(api_type, api_id), 2),
+                        'circuit': 'open' if stats['open_until'] > now else 'closed',
+                        'reopens_in': max(0, round(stats['open_until'] - now)),
+                        'circuit_opens': stats['circuit_opens']
+                    }
+
+        return summary
+
+    def _expected_time(self, api_type: str, api_id: str) -> float:
+        """Latencia esperada contando reintentos: EWMA / probabilidad de éxito"""
+        stats = self._get_stats(api_type, api_id)
+        latency = stats['ewma_latency'] if stats['ewma_latency'] is not None else DEFAULT_LATENCY.get(api_type, 10.0)
+        success_probability = max(0.1, 1.0 - stats['error_rate'])
+
+        return latency / success_probability
+
+    def _percentile(self, histogram: List[int], percentile: float):
+        """Percentil aproximado: límite superior del cubo que lo contiene"""
+        total = sum(histogram)
+        if not total:
+            return None
+
+        threshold = total * percentile
+        cumulative = 0
+
+        for count, bound in zip(histogram, LATENCY_BUCKETS):
+            cumulative += count
+            if cumulative >= threshold:
+                return bound if bound != float('inf') else f">{LATENCY_BUCKETS[-2]}"
+
+        return None
+
+    def _get_stats(self, api_type: str, api_id: str) -> Dict:
+        providers = self.stats.setdefault(api_type, {})
+
+        if api_id not in providers:
+            providers[api_id] = {
+                'calls': 0,
+                'failures': 0,
+                'rate_limited': 0,
+                'consecutive_failures': 0,
+                'error_rate': 0.0,
+                'ewma_latency': None,
+                'histogram': [0] * len(LATENCY_BUCKETS),
+                'open_until': 0,
+                'circuit_opens': 0,
+                'last_call': None
+            }
+
+        return providers[api_id]
+
+    def _load_stats(self) -> Dict:
+        """Cargar estadísticas previas para que el enrutado arranque en caliente"""
+        try:
+            if self.stats_file.exists():
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error cargando estadísticas de APIs: {str(e)}")
+
+        return {}
+
+    def _save_stats(self):
+        """Guardar estadísticas de forma atómica"""
+        try:
+            self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.stats_file.with_suffix('.json.tmp')
+
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, indent=2)
+
+            os.replace(temp_file, self.stats_file)
+
+        except Exception as e:
+            print(f"Error guardando estadísticas de APIs: {str(e)}")
+
+# Crear instancia global
+api_router = APIRouter()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Subtítulos animados en un único archivo ASS
+Resaltado palabra por palabra con etiquetas karaoke (\\kf) que se queman con un solo filtro 'ass'
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# Rangos de emojis que libass no sabe dibujar con las fuentes por defecto
+EMOJI_PATTERN = re.compile("["
+                           u"\U0001F600-\U0001F64F"
+                           u"\U0001F300-\U0001F5FF"
+                           u"\U0001F680-\U0001F6FF"
+                           u"\U0001F1E0-\U0001F1FF"
+                           u"\U00002702-\U000027B0"
+                           u"\U000024C2-\U0001F251"
+                           "]+", flags=re.UNICODE)
+
+class KaraokeSubtitleRenderer:
+    def __init__(self, width: int = 1080, height: int = 1920, words_per_line: int = 3,
+                 font: str = 'Arial', font_size: int = 64,
+                 highlight_color: str = '&H0000FFFF', base_color: str = '&H00FFFFFF',
+                 outline_color: str = '&H00000000', margin_bottom: int = 320):
+        # Resolución de referencia del script: coincide con el video para que las medidas sean en píxeles
+        self.width = width
+        self.height = height
+
+        # Palabras visibles a la vez (el render drawtext mostraba 3)
+        self.words_per_line = words_per_line
+
+        # Colores ASS en &HAABBGGRR: la palabra pasa de base_color a highlight_color al pronunciarse
+        self.font = font
+        self.font_size = font_size
+        self.highlight_color = highlight_color
+        self.base_color = base_color
+        self.outline_color = outline_color
+        self.margin_bottom = margin_bottom
+
+    def write_ass_file(self, script_text: str, duration: float, ass_path: str,
+                       word_timings: Optional[List[Dict]] = None) -> str:
+        """
+        Escribir el archivo ASS con resaltado palabra por palabra
+
+        Args:
+            script_text: Texto del guión
+            duration: Duración total del audio/video en segundos
+            ass_path: Ruta del archivo a escribir
+            word_timings: Lista opcional de {'word', 'start', 'end'}; si no se da,
+                          el tiempo se reparte según la longitud de cada palabra
+
+        Returns:
+            Ruta del archivo ASS
+        """
+        if word_timings is None:
+            word_timings = self.estimate_word_timings(script_text, duration)
+        else:
+            # Los tiempos alineados traen las palabras tal cual del guión
+            word_timings = [dict(timing, word=self.clean_text(timing['word'])) for timing in word_timings]
+            word_timings = [timing for timing in word_timings if timing['word']]
+
+        with open(ass_path, 'w', encoding='utf-8') as f:
+            f.write(self._build_header())
+            for line in self._group_lines(word_timings):
+                f.write(self._build_dialogue(line))
+
+        return ass_path
+
+    def build_filter(self, ass_path: str) -> str:
+        """Filtro FFmpeg que quema el archivo ASS (un solo nodo sin importar el número de palabras)"""
+        return f"ass='{self._escape_filter_path(ass_path)}'"
+
+    def estimate_word_timings(self, script_text: str, duration: float) -> List[Dict]:
+        """Repartir la duración entre palabras en proporción a sus caracteres"""
+        words = self.clean_text(script_text).split()
+        if not words or duration <= 0:
+            return []
+
+        # Una palabra corta también necesita un mínimo de tiempo en pantalla
+        weights = [max(len(word), 2) for word in words]
+        total_weight = sum(weights)
+
+        timings = []
+        current = 0.0
+        for word, weight in zip(words, weights):
+            word_duration = duration * weight / total_weight
+            timings.append({'word': word, 'start': current, 'end': current + word_duration})
+            current += word_duration
+
+        timings[-1]['end'] = duration
+        return timings
+
+    def clean_text(self, text: str) -> str:
+        """Quitar emojis y caracteres con significado especial en ASS"""
+        clean = EMOJI_PATTERN.sub('', text or '')
+
+        # Llaves y barras invertidas abren etiquetas de override en ASS
+        clean = clean.replace('\\', '').replace('{', '(').replace('}', ')')
+
+        return re.sub(r'\s+', ' ', clean).strip()
+
+    def _group_lines(self, word_timings: List[Dict]) -> List[List[Dict]]:
+        """Agrupar palabras en líneas cortas, cortando también al final de cada frase"""
+        lines = []
+        current = []
+
+        for timing in word_timings:
+            current.append(timing)
+            ends_sentence = timing['word'][-1:] in '.!?'
+
+            if len(current) >= self.words_per_line or ends_sentence:
+                lines.append(current)
+                current = []
+
+        if current:
+            lines.append(current)
+
+        return lines
+
+    def _build_dialogue(self, line: List[Dict]) -> str:
+        """Un evento Dialogue por línea con un \\kf por palabra"""
+        start = line[0]['start']
+        end = line[-1]['end']
+
+        parts = []
+        elapsed = 0
+        for timing in line:
+            # Las pausas entre palabras van en un \k vacío; si no, el resaltado se adelanta al audio.
+            # Se redondea cada límite respecto al inicio del evento para que la suma no derive
+            gap = round((timing['start'] - start) * 100) - elapsed
+            pause = f"{{\\k{gap}}}" if gap > 0 else ''
+            elapsed += max(gap, 0)
+
+            # \kf va en centésimas de segundo y rellena la palabra de izquierda a derecha
+            centiseconds = max(1, round((timing['end'] - start) * 100) - elapsed)
+            elapsed += centiseconds
+            parts.append(f"{pause}{{\\kf{centiseconds}}}{timing['word']}")
+
+        return (f"Dialogue: 0,{self._seconds_to_ass_time(start)},{self._seconds_to_ass_time(end)},"
+                f"Karaoke,,0,0,0,,{' '.join(parts)}\n")
+
+    def _build_header(self) -> str:
+        return f"""[Script Info]
+Title: Instagram Karaoke Subtitles
+ScriptType: v4.00+
+PlayResX: {self.width}
+PlayResY: {self.height}
+WrapStyle: 2
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Karaoke,{self.font},{self.font_size},{self.highlight_color},{self.base_color},{self.outline_color},&H64000000,1,0,0,0,100,100,0,0,1,3,1,2,60,60,{self.margin_bottom},1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+    def _seconds_to_ass_time(self, seconds: float) -> str:
+        """Formato de tiempo ASS: H:MM:SS.cc"""
+        centiseconds = int(round(max(0.0, seconds) * 100))
+        hours, centiseconds = divmod(centiseconds, 360000)
+        minutes, centiseconds = divmod(centiseconds, 6000)
+        secs, centiseconds = divmod(centiseconds, 100)
+
+        return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+    def _escape_filter_path(self, path: str) -> str:
+        """Escapar la ruta para usarla dentro de un grafo de filtros (Windows incluido)"""
+        return path.replace('\\', '/').replace(':', '\\:')
+
+# Crear instancia global
+karaoke_subtitles = KaraokeSubtitleRenderer()
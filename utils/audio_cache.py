@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de audio TTS direccionada por contenido
+Reutiliza locuciones completas y frases sueltas (CTAs, ganchos, guiones de respaldo)
+"""
+
+from utils.content_cache import ContentCache
+
+class AudioCache(ContentCache):
+    def __init__(self, cache_dir: str = 'generated/audio_cache', max_size_mb: int = None,
+                 enabled: bool = None):
+        # AUDIO_CACHE_ENABLED / AUDIO_CACHE_MAX_MB
+        super().__init__(cache_dir, 'AUDIO_CACHE', 'audio', max_size_mb, enabled, default_max_mb=200)
+
+    def make_key(self, text: str, language: str, engine: str = 'gtts', speed: str = 'normal') -> str:
+        """Clave de contenido a partir del texto ya limpiado para TTS"""
+        return super().make_key(
+            text=text.strip(),
+            language=language,
+            engine=engine,
+            speed=speed
+        )
+
+# Crear instancia global
+audio_cache = AudioCache()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de lotes para trabajos de FFmpeg
+Pool de workers acotado por núcleos, prioridades, progreso por trabajo y reanudación tras un corte
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.ffmpeg_runner import ffmpeg_runner
+
+# Estados que no se vuelven a ejecutar al reanudar un lote
+FINISHED_STATUSES = ('done', 'failed')
+
+# Lotes que se conservan en el archivo de estado
+MAX_SAVED_BATCHES = 50
+
+class BatchEngine:
+    def __init__(self, state_file: str = 'generated/batch_state.json', workers: int = None,
+                 threads_per_job: int = None):
+        cpu_count = os.cpu_count() or 1
+
+        # Trabajos simultáneos y hilos de FFmpeg por trabajo: workers × hilos ≈ núcleos
+        self.workers = workers or int(os.getenv('BATCH_WORKERS', '0')) or max(1, cpu_count // 2)
+        self.threads_per_job = threads_per_job or int(os.getenv('BATCH_FFMPEG_THREADS', '0')) or \
+            max(1, cpu_count // self.workers)
+
+        self.state_file = Path(state_file)
+        self.lock = threading.Lock()
+        self.batches: Dict[str, Dict] = self._load_state()
+
+    def make_batch_id(self, *parts) -> str:
+        """Id estable a partir de las entradas: relanzar el mismo lote lo reanuda"""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def run(self, batch_id: str, jobs: List[Dict], handler: Callable[[Dict], Tuple[bool, object]],
+            on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Ejecutar un lote de trabajos
+
+        Args:
+            batch_id: Id del lote; si ya existe en el estado, los trabajos terminados se saltan
+            jobs: Lista de {'id', 'input', 'priority' (mayor primero), ...datos del handler}
+            handler: Función job -> (success, result) que hace el trabajo
+            on_result: Callback llamado con cada trabajo en cuanto termina
+
+        Returns:
+            Trabajos en orden de prioridad con status, result, error y progress
+        """
+        batch = self._prepare_batch(batch_id, jobs)
+        ordered = sorted(batch['jobs'].values(), key=lambda job: (-job['priority'], job['order']))
+
+        # Trabajos ya terminados antes de un corte: se informan sin volver a ejecutarlos
+        for job in ordered:
+            if job['status'] in FINISHED_STATUSES and on_result:
+                on_result(dict(job, resumed=True))
+
+        pending = [job for job in ordered if job['status'] not in FINISHED_STATUSES]
+
+        if pending:
+            # El pool toma los trabajos en orden de envío: los de mayor prioridad salen antes
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(self._run_job, batch_id, job, handler): job for job in pending}
+
+                for future in as_completed(futures):
+                    job = futures[future]
+                    if on_result:
+                        try:
+                            on_result(dict(job))
+                        except Exception as e:
+                            print(f"Error informando resultado de {job['id']}: {str(e)}")
+
+        with self.lock:
+            batch['finished_at'] = time.time()
+            self._save_state()
+
+        return [dict(job) for job in ordered]
+
+    def get_batch(self, batch_id: str) -> Optional[Dict]:
+        """Estado de un lote con resumen de trabajos por estado"""
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            if not batch:
+                return None
+
+            jobs = sorted(batch['jobs'].values(), key=lambda job: (-job['priority'], job['order']))
+            summary = {}
+            for job in jobs:
+                summary[job['status']] = summary.get(job['status'], 0) + 1
+
+            return {
+                'id': batch_id,
+                'created_at': batch['created_at'],
+                'finished_at': batch.get('finished_at'),
+                'summary': summary,
+                'jobs': [dict(job) for job in jobs]
+            }
+
+    def _run_job(self, batch_id: str, job: Dict, handler: Callable):
+        with self.lock:
+            job.update({'status': 'running', 'started_at': time.time(), 'error': None,
+                        'progress': {'percent': 0.0}})
+            self._save_state()
+
+        def on_progress(progress: Dict):
+            # El progreso vive en memoria; solo los cambios de estado van a disco
+            job['progress'] = progress
+
+        try:
+            # Todas las llamadas a FFmpeg del handler heredan el límite de hilos y el progreso
+            with ffmpeg_runner.context(threads=self.threads_per_job, on_progress=on_progress):
+                success, result = handler(job)
+
+            status = 'done' if success else 'failed'
+            error = None if success else str(result)
+
+        except Exception as e:
+            success, result = False, None
+            status, error = 'failed', str(e)
+
+        with self.lock:
+            job.update({
+                'status': status,
+                'result': result if success else None,
+                'error': error,
+                'finished_at': time.time()
+            })
+            if success:
+                job['progress'] = dict(job.get('progress') or {}, percent=100.0)
+            self._save_state()
+
+    def _prepare_batch(self, batch_id: str, jobs: List[Dict]) -> Dict:
+        """Crear el lote o fusionarlo con el interrumpido; lo que quedó 'running' se vuelve a ejecutar"""
+        with self.lock:
+            batch = self.batches.get(batch_id)
+
+            # Solo se reanuda un lote que no llegó a terminar; uno completo empieza de cero
+            if batch is None or batch.get('finished_at'):
+                batch = {'created_at': time.time(), 'finished_at': None, 'jobs': {}}
+                self.batches[batch_id] = batch
+                self._prune_batches()
+
+            for order, spec in enumerate(jobs):
+                job_id = str(spec.get('id') or spec.get('input') or order)
+                saved = batch['jobs'].get(job_id)
+
+                if saved and saved['status'] in FINISHED_STATUSES:
+                    saved['order'] = order
+                    continue
+
+                job = dict(spec)
+                job.update({
+                    'id': job_id,
+                    'priority': spec.get('priority', 0),
+                    'order': order,
+                    'status': 'pending',
+                    'progress': None,
+                    'result': None,
+                    'error': None
+                })
+                if saved and saved['status'] == 'running':
+                    job['resumed'] = True
+                batch['jobs'][job_id] = job
+
+            self._save_state()
+            return batch
+
+    def _prune_batches(self):
+        """Olvidar los lotes más antiguos"""
+        if len(self.batches) <= MAX_SAVED_BATCHES:
+            return
+
+        oldest = sorted(self.batches, key=lambda batch_id: self.batches[batch_id]['created_at'])
+        for batch_id in oldest[:len(self.batches) - MAX_SAVED_BATCHES]:
+            del self.batches[batch_id]
+
+    def _load_state(self) -> Dict:
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error cargando estado de lotes: {str(e)}")
+
+        return {}
+
+    def _save_state(self):
+        """Guardar el estado de forma atómica (se llama con el lock tomado)"""
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.state_file.with_suffix('.json.tmp')
+
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.batches, f, indent=2, default=str)
+
+            os.replace(temp_file, self.state_file)
+
+        except Exception as e:
+            print(f"Error guardando estado de lotes: {str(e)}")
+
+# Crear instancia global
+batch_engine = BatchEngine()
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Caché en disco direccionada por contenido
+Base común de las cachés de imágenes y audio: índice JSON, estadísticas y expulsión LRU
+"""
+
+import os
+import json
+import time
+import atexit
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.metrics import metrics
+
+# Tasa de aciertos = rate(cache_lookups_total{result="hit"}) / rate(cache_lookups_total)
+CACHE_LOOKUPS = metrics.counter('cache_lookups_total', 'Búsquedas en las cachés de contenido por resultado',
+                                ['cache', 'result'])
+
+class ContentCache:
+    def __init__(self, cache_dir: str, env_prefix: str, label: str, max_size_mb: int = None,
+                 enabled: bool = None, default_max_mb: int = 500):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / 'index.json'
+        self.label = label
+        # Etiqueta de métricas sin acentos: image, audio, segment
+        self.metric_label = env_prefix.lower().replace('_cache', '')
+
+        # <PREFIJO>_ENABLED=false desactiva la caché sin tocar código
+        if enabled is None:
+            enabled = os.getenv(f'{env_prefix}_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+
+        max_size_mb = max_size_mb or int(os.getenv(f'{env_prefix}_MAX_MB', str(default_max_mb)))
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self.index: Dict[str, Dict] = self._load_index()
+
+        # Los aciertos solo cambian last_access/hits: se guardan en memoria y el índice se
+        # escribe como mucho cada CACHE_INDEX_FLUSH_SECONDS (put, expulsión y clear escriben al momento)
+        self.flush_interval = float(os.getenv('CACHE_INDEX_FLUSH_SECONDS', '30'))
+        self.index_dirty = False
+        self.index_saved_at = time.time()
+        atexit.register(self.flush)
+
+    def make_key(self, **parts) -> str:
+        """Clave de contenido: sha256 de las partes normalizadas"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Devolver la ruta del archivo en caché o None
+
+        La ruta pertenece a la caché: la expulsión LRU o clear() pueden borrarla.
+        Para usar el archivo como artefacto de un trabajo, usar checkout().
+        """
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            return self._lookup(key)
+
+    def checkout(self, key: str, target_path: str, link: bool = False) -> Optional[str]:
+        """
+        Copiar (o enlazar) una entrada a una ruta del llamador y devolver esa ruta, o None si no está
+
+        La extensión de target_path se sustituye por la del archivo cacheado. El enlace duro
+        evita copiar archivos grandes y sobrevive a la expulsión; solo debe usarse si nadie
+        reescribe el archivo en su sitio. Todo ocurre bajo el lock, así que la expulsión no
+        puede borrar la entrada entre la búsqueda y la copia.
+        """
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            cached_path = self._lookup(key)
+            if not cached_path:
+                return None
+
+            target = Path(target_path).with_suffix(Path(cached_path).suffix)
+
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if target.exists():
+                    target.unlink()
+
+                if link:
+                    try:
+                        os.link(cached_path, target)
+                    except OSError:
+                        shutil.copyfile(cached_path, target)
+                else:
+                    shutil.copyfile(cached_path, target)
+
+                return str(target)
+
+            except OSError as e:
+                print(f"Error copiando desde la caché de {self.label}: {str(e)}")
+                return None
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Buscar la entrada y actualizar las estadísticas (con el lock tomado)"""
+        entry = self.index.get(key)
+
+        if entry and os.path.exists(entry['path']):
+            entry['last_access'] = time.time()
+            entry['hits'] = entry.get('hits', 0) + 1
+            self.stats['hits'] += 1
+            CACHE_LOOKUPS.inc(cache=self.metric_label, result='hit')
+            self._mark_dirty()
+            return entry['path']
+
+        if entry:
+            # El archivo desapareció del disco: limpiar la entrada
+            del self.index[key]
+            self._mark_dirty()
+
+        self.stats['misses'] += 1
+        CACHE_LOOKUPS.inc(cache=self.metric_label, result='miss')
+        return None
+
+    def put(self, key: str, file_path: str, metadata: Dict = None) -> Optional[str]:
+        """Copiar un archivo generado a la caché y devolver su ruta en caché"""
+        if not self.enabled or not file_path or not os.path.exists(file_path):
+            return None
+
+        try:
+            extension = Path(file_path).suffix
+            cached_path = self.cache_dir / f"{key}{extension}"
+            temp_path = cached_path.with_suffix(f"{extension}.tmp")
+
+            shutil.copyfile(file_path, temp_path)
+            os.replace(temp_path, cached_path)
+            self._register(key, cached_path, metadata)
+
+            return str(cached_path)
+
+        except Exception as e:
+            print(f"Error guardando en caché de {self.label}: {str(e)}")
+            return None
+
+    def put_bytes(self, key: str, data: bytes, extension: str, metadata: Dict = None) -> Optional[str]:
+        """Guardar contenido en memoria directamente en la caché"""
+        if not self.enabled:
+            return None
+
+        try:
+            cached_path = self.cache_dir / f"{key}{extension}"
+            temp_path = cached_path.with_suffix(f"{extension}.tmp")
+
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+
+            os.replace(temp_path, cached_path)
+            self._register(key, cached_path, metadata)
+
+            return str(cached_path)
+
+        except Exception as e:
+            print(f"Error guardando en caché de {self.label}: {str(e)}")
+            return None
+
+    def _register(self, key: str, cached_path: Path, metadata: Dict = None):
+        """Agregar la entrada al índice y aplicar el límite de tamaño"""
+        with self.lock:
+            now = time.time()
+            self.index[key] = {
+                'path': str(cached_path),
+                'size': cached_path.stat().st_size,
+                'created_at': now,
+                'last_access': now,
+                'hits': 0,
+                'metadata': metadata or {}
+            }
+            self.stats['stores'] += 1
+            self._evict_if_needed()
+            self._save_index()
+
+    def clear(self):
+        """Vaciar la caché por completo"""
+        with self.lock:
+            for entry in self.index.values():
+                try:
+                    os.remove(entry['path'])
+                except OSError:
+                    pass
+
+            self.index = {}
+            self._save_index()
+
+    def get_stats(self) -> Dict:
+        """Estadísticas de uso de la caché"""
+        with self.lock:
+            total_size = sum(entry['size'] for entry in self.index.values())
+            lookups = self.stats['hits'] + self.stats['misses']
+
+            return {
+                'enabled': self.enabled,
+                'entries': len(self.index),
+                'size_mb': round(total_size / (1024 * 1024), 2),
+                'max_size_mb': round(self.max_size_bytes / (1024 * 1024), 2),
+                'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+                **self.stats
+            }
+
+    def _evict_if_needed(self):
+        """Eliminar las entradas menos usadas recientemente hasta volver al límite"""
+        total_size = sum(entry['size'] for entry in self.index.values())
+
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]['last_access']):
+            if total_size <= self.max_size_bytes:
+                break
+
+            try:
+                os.remove(entry['path'])
+            except OSError:
+                pass
+
+            total_size -= entry['size']
+            del self.index[key]
+            self.stats['evictions'] += 1
+
+    def flush(self):
+        """Escribir el índice si hay accesos pendientes de guardar"""
+        with self.lock:
+            if self.index_dirty:
+                self._save_index()
+
+    def _mark_dirty(self):
+        """Anotar un cambio menor del índice y guardarlo solo si ya toca (con el lock tomado)"""
+        self.index_dirty = True
+        if time.time() - self.index_saved_at >= self.flush_interval:
+            self._save_index()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        try:
+            if self.index_file.exists():
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error cargando índice de caché de {self.label}: {str(e)}")
+
+        return {}
+
+    def _save_index(self):
+        """Guardar el índice de forma atómica"""
+        try:
+            temp_file = self.index_file.with_suffix('.json.tmp')
+
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, indent=2, ensure_ascii=False)
+
+            os.replace(temp_file, self.index_file)
+            self.index_dirty = False
+            self.index_saved_at = time.time()
+
+        except Exception as e:
+            print(f"Error guardando índice de caché de {self.label}: {str(e)}")
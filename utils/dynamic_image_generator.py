@@ -6,14 +6,25 @@ Crea múltiples imágenes sincronizadas con el contenido del audio
 
 import os
 import json
+import time
+import uuid
+import base64
 import asyncio
 import aiohttp
+import contextvars
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 import threading
 
+from utils.image_cache import image_cache
+from utils.http_client import http_client
+from utils.tracing import tracer
+from utils.api_router import PROVIDER_SECONDS
+from utils.prediction_waiter import REPLICATE_PREDICTIONS_URL, TERMINAL_STATUSES
+
 class DynamicImageGenerator:
     def __init__(self):
         # APIs de generación de imágenes
@@ -25,11 +36,36 @@ class DynamicImageGenerator:
         # Directorio para imágenes
         self.images_dir = Path('generated/dynamic_images')
         self.images_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Peticiones simultáneas por proveedor (todas las imágenes van en vuelo a la vez)
+        self.provider_concurrency = {
+            'replicate': int(os.getenv('REPLICATE_CONCURRENCY', '6')),
+            'stability': int(os.getenv('STABILITY_CONCURRENCY', '4')),
+            'deepai': int(os.getenv('DEEPAI_CONCURRENCY', '3')),
+            'getimg': int(os.getenv('GETIMG_CONCURRENCY', '3'))
+        }
+        
+        # Tiempo máximo por imagen (todos los proveedores más el placeholder)
+        self.image_timeout = int(os.getenv('DYNAMIC_IMAGE_TIMEOUT', '120'))
+        
+        # Hedging: lanzar el siguiente proveedor si el actual supera su p50
+        self.hedging_enabled = os.getenv('IMAGE_HEDGING_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+        self.hedge_delay_factor = float(os.getenv('IMAGE_HEDGE_DELAY_FACTOR', '1.0'))
+        self.hedge_default_delay = float(os.getenv('IMAGE_HEDGE_DEFAULT_DELAY', '15'))
+        self.hedge_max_extra = int(os.getenv('IMAGE_HEDGE_MAX_EXTRA', '1'))
+        
+        # Latencias recientes de respuestas correctas por proveedor
+        self.provider_latencies = {
+            provider: deque(maxlen=50) for provider in self.provider_concurrency
+        }
     
     def generate_images_from_analysis(self, visual_concepts: List[Dict], style_theme: str = "luxury") -> Tuple[bool, List[Dict], str]:
         """
         Generar múltiples imágenes basadas en el análisis visual
         
+        Envoltorio síncrono de generate_images_from_analysis_async para los
+        llamadores existentes (pipeline, rutas Flask).
+        
         Args:
             visual_concepts: Lista de conceptos visuales del análisis
             style_theme: Tema de estilo general (luxury, modern, minimal, etc.)
@@ -37,40 +73,58 @@ class DynamicImageGenerator:
         Returns:
             (success, generated_images, summary)
         """
+        coroutine = self.generate_images_from_analysis_async(visual_concepts, style_theme)
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        
+        # Ya hay un loop en este hilo: ejecutar en un hilo aparte con su propio loop (y la traza actual)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+    
+    async def generate_images_from_analysis_async(self, visual_concepts: List[Dict], style_theme: str = "luxury") -> Tuple[bool, List[Dict], str]:
+        """Generar todas las imágenes a la vez, limitadas solo por los semáforos de cada proveedor"""
         
         print(f"🎨 Generando {len(visual_concepts)} imágenes dinámicas...")
         
+        semaphores = {
+            provider: asyncio.Semaphore(limit)
+            for provider, limit in self.provider_concurrency.items()
+        }
+        
+        connector = aiohttp.TCPConnector(limit=sum(self.provider_concurrency.values()) * 2)
+        
+        async with aiohttp.ClientSession(connector=connector) as session:
+            tasks = [
+                asyncio.wait_for(
+                    self._generate_single_image(session, semaphores, concept, style_theme, i),
+                    timeout=self.image_timeout
+                )
+                for i, concept in enumerate(visual_concepts)
+            ]
+            
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        
         generated_images = []
-        successful_generations = 0
         
-        # Generar imágenes en paralelo para mayor velocidad
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = []
-            
-            for i, concept in enumerate(visual_concepts):
-                future = executor.submit(self._generate_single_image, concept, style_theme, i)
-                futures.append(future)
-            
-            # Recopilar resultados
-            for future in futures:
-                try:
-                    result = future.result(timeout=60)  # 60 segundos por imagen
-                    if result:
-                        generated_images.append(result)
-                        successful_generations += 1
-                except Exception as e:
-                    print(f"Error generando imagen: {str(e)}")
-                    continue
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                print(f"Error generando imagen {i + 1}: {str(result) or type(result).__name__}")
+            elif result:
+                generated_images.append(result)
         
         # Ordenar por tiempo de inicio
         generated_images.sort(key=lambda x: x['start_time'])
         
         # Crear resumen
-        summary = f"Generadas {successful_generations}/{len(visual_concepts)} imágenes dinámicas"
+        summary = f"Generadas {len(generated_images)}/{len(visual_concepts)} imágenes dinámicas"
         
-        return successful_generations > 0, generated_images, summary
+        return len(generated_images) > 0, generated_images, summary
     
-    def _generate_single_image(self, concept: Dict, style_theme: str, index: int) -> Optional[Dict]:
+    async def _generate_single_image(self, session, semaphores: Dict, concept: Dict,
+                                     style_theme: str, index: int) -> Optional[Dict]:
         """Generar una imagen individual"""
         try:
             # Mejorar el prompt con el tema de estilo
@@ -84,21 +138,22 @@ class DynamicImageGenerator:
             api_used = None
             
             # Prioridad: Replicate > Stability > DeepAI > GetImg
-            if self.replicate_api_key and not image_path:
-                image_path, image_url, api_used = self._generate_with_replicate(enhanced_prompt, index)
-            
-            if self.stability_api_key and not image_path:
-                image_path, image_url, api_used = self._generate_with_stability(enhanced_prompt, index)
+            providers = [
+                ('replicate', 'sdxl', self.replicate_api_key, self._generate_with_replicate),
+                ('stability', 'stable-diffusion-xl-1024-v1-0', self.stability_api_key, self._generate_with_stability),
+                ('deepai', 'text2img', self.deepai_api_key, self._generate_with_deepai),
+                ('getimg', 'stable-diffusion-v1-5', self.getimg_api_key, self._generate_with_getimg)
+            ]
             
-            if self.deepai_api_key and not image_path:
-                image_path, image_url, api_used = self._generate_with_deepai(enhanced_prompt, index)
+            providers = [provider for provider in providers if provider[2]]
             
-            if self.getimg_api_key and not image_path:
-                image_path, image_url, api_used = self._generate_with_getimg(enhanced_prompt, index)
+            image_path, image_url, api_used = await self._generate_hedged(
+                session, semaphores, providers, enhanced_prompt, index
+            )
             
             if not image_path:
                 # Crear imagen placeholder
-                image_path = self._create_dynamic_placeholder(concept, index)
+                image_path = await self._run_in_thread(self._create_dynamic_placeholder, concept, index)
                 api_used = "Dynamic Placeholder"
             
             # Crear resultado
@@ -123,6 +178,142 @@ class DynamicImageGenerator:
             print(f"❌ Error generando imagen {index + 1}: {str(e)}")
             return None
     
+    async def _generate_hedged(self, session, semaphores: Dict, providers: List[Tuple], prompt: str,
+                               index: int) -> Tuple[Optional[str], Optional[str], str]:
+        """
+        Pedir la imagen al primer proveedor y cubrirse con el siguiente si tarda
+        
+        Si el proveedor en curso no responde antes de su p50 histórico (por
+        hedge_delay_factor), se lanza el siguiente en paralelo y gana el primero
+        que devuelva imagen; el resto se cancela. hedge_max_extra limita cuántas
+        peticiones extra se pagan por imagen. Un fallo pasa al siguiente sin
+        contar como gasto extra.
+        """
+        # Una imagen ya generada con cualquier proveedor evita toda llamada
+        # (copiada a generated/dynamic_images: la expulsión de la caché no puede borrar el artefacto)
+        for provider, model, _, _ in providers:
+            cached_path = image_cache.checkout(image_cache.make_key(provider, model, prompt, 1080, 1920),
+                                               str(self._image_path(index, provider, '.jpg')))
+            if cached_path:
+                return cached_path, None, f"{provider.capitalize()} (caché)"
+        
+        queue = list(providers)
+        running = {}
+        extra_calls = 0
+        
+        def launch():
+            provider, model, _, generate = queue.pop(0)
+            task = asyncio.ensure_future(
+                self._call_provider(session, semaphores[provider], provider, model, prompt, index, generate)
+            )
+            running[task] = (provider, model)
+            return provider
+        
+        try:
+            while queue or running:
+                if not running:
+                    launch()
+                
+                # Esperar al primero que termine o al momento de cubrirse
+                hedge_delay = None
+                if self.hedging_enabled and queue and extra_calls < self.hedge_max_extra:
+                    hedge_delay = self._hedge_delay(list(running.values())[-1][0])
+                
+                done, _ = await asyncio.wait(list(running), timeout=hedge_delay,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    hedged_provider = launch()
+                    extra_calls += 1
+                    print(f"⏱️  Imagen {index + 1}: cubriendo con {hedged_provider} tras {hedge_delay:.1f}s")
+                    continue
+                
+                winner = None
+                for task in done:
+                    provider, model = running.pop(task)
+                    if task.exception() is not None:
+                        print(f"Error con {provider}: {str(task.exception())}")
+                        continue
+                    
+                    image_path, image_url, api_used = task.result()
+                    if not image_path:
+                        continue
+                    
+                    if winner:
+                        # Dos proveedores terminaron a la vez: sobra el archivo del segundo
+                        self._discard_partial(image_path)
+                    else:
+                        winner = (provider, model, image_path, image_url, api_used)
+                
+                if winner:
+                    provider, model, partial_path, image_url, api_used = winner
+                    image_path = self._promote_image(partial_path)
+                    image_cache.put(image_cache.make_key(provider, model, prompt, 1080, 1920), image_path,
+                                    {'provider': provider, 'model': model, 'api_used': api_used})
+                    return image_path, image_url, api_used
+            
+            return None, None, "All Providers Failed"
+        
+        finally:
+            # Cancelar las peticiones perdedoras y esperar a que paren también en el proveedor
+            # (Replicate cancela la predicción); sin esperar, el bucle podría cerrarse antes
+            for task in running:
+                task.cancel()
+            if running:
+                results = await asyncio.gather(*running, return_exceptions=True)
+                
+                # Un perdedor que terminó justo antes de cancelarse deja su .tmp
+                for result in results:
+                    if isinstance(result, tuple) and result[0]:
+                        self._discard_partial(result[0])
+    
+    async def _call_provider(self, session, semaphore, provider: str, model: str, prompt: str,
+                             index: int, generate) -> Tuple[Optional[str], Optional[str], str]:
+        """Llamar al proveedor y registrar su latencia (la imagen queda en un .tmp hasta decidir el ganador)"""
+        async with semaphore:
+            start = time.perf_counter()
+            with tracer.span(f"image {provider}", kind='provider', provider=provider, model=model,
+                             image=index + 1, prompt_hash=tracer.prompt_hash(prompt)) as span:
+                image_path, image_url, api_used = await generate(session, prompt, index)
+                
+                if image_path:
+                    span['attributes']['bytes'] = os.path.getsize(image_path)
+                else:
+                    span['status'] = 'error'
+                    span['error'] = api_used
+        
+        elapsed = time.perf_counter() - start
+        PROVIDER_SECONDS.observe(elapsed, kind='image', provider=provider, status='ok' if image_path else 'error')
+        
+        if image_path:
+            self.provider_latencies[provider].append(elapsed)
+        
+        return image_path, image_url, api_used
+    
+    def _hedge_delay(self, provider: str) -> float:
+        """Retraso antes de cubrirse: p50 de las latencias recientes del proveedor"""
+        latencies = sorted(self.provider_latencies[provider])
+        
+        if len(latencies) < 5:
+            return self.hedge_default_delay
+        
+        return latencies[len(latencies) // 2] * self.hedge_delay_factor
+    
+    def get_provider_latency_stats(self) -> Dict:
+        """Latencias p50/p95 por proveedor usadas para decidir el hedging"""
+        stats = {}
+        
+        for provider, latencies in self.provider_latencies.items():
+            ordered = sorted(latencies)
+            stats[provider] = {
+                'samples': len(ordered),
+                'p50': round(ordered[len(ordered) // 2], 2) if ordered else None,
+                'p95': round(ordered[int(len(ordered) * 0.95)], 2) if ordered else None,
+                'hedge_delay': round(self._hedge_delay(provider), 2)
+            }
+        
+        return stats
+    
     def _enhance_prompt(self, base_prompt: str, style_theme: str, emotion: str) -> str:
         """Mejorar el prompt con estilo y emoción"""
         
@@ -169,15 +360,93 @@ class DynamicImageGenerator:
         
         return ", ".join(enhanced_parts)
     
-    def _generate_with_replicate(self, prompt: str, index: int) -> Tuple[Optional[str], Optional[str], str]:
+    def _image_path(self, index: int, provider: str, extension: str) -> Path:
+        """
+        Ruta de salida para la imagen de un concepto
+        
+        Única por llamada: en una carrera de hedging, o con dos trabajos en el mismo
+        segundo, cada proveedor escribe su propio archivo y nadie trunca el de otro.
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"dynamic_image_{index+1}_{timestamp}_{provider}_{uuid.uuid4().hex[:8]}{extension}"
+        return self.images_dir / filename
+    
+    def _partial_path(self, index: int, provider: str, extension: str) -> Path:
+        """Ruta .tmp donde escribe un proveedor; solo la del ganador pasa a su nombre final"""
+        image_path = self._image_path(index, provider, extension)
+        return image_path.with_name(image_path.name + '.tmp')
+    
+    def _promote_image(self, partial_path: str) -> str:
+        """Mover la imagen del ganador a su nombre final"""
+        image_path = partial_path[:-len('.tmp')] if partial_path.endswith('.tmp') else partial_path
+        os.replace(partial_path, image_path)
+        return image_path
+    
+    def _discard_partial(self, partial_path):
+        """Borrar la imagen de un proveedor que perdió la carrera"""
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+    
+    async def _download_image(self, session, image_url: str, image_path: Path) -> bool:
+        """Descargar la imagen por fragmentos directamente a disco"""
+        async with session.get(http_client.resolve(image_url), timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if response.status != 200:
+                return False
+            
+            with tracer.span('file.write', kind='file', path=str(image_path)) as span:
+                try:
+                    with open(image_path, 'wb') as f:
+                        async for chunk in response.content.iter_chunked(64 * 1024):
+                            f.write(chunk)
+                except BaseException:
+                    # Cancelado por el hedging o error de red a mitad: no dejar un archivo a medias
+                    self._discard_partial(image_path)
+                    raise
+                span['attributes']['bytes'] = os.path.getsize(image_path)
+        
+        return True
+    
+    async def _run_in_thread(self, func, *args):
+        """Ejecutar trabajo bloqueante (PIL, disco) en el pool de hilos conservando la traza en curso"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, contextvars.copy_context().run, func, *args)
+    
+    async def _save_image(self, image_path: Path, image_data: bytes):
+        """Escribir una imagen fuera del bucle de eventos"""
+        future = asyncio.ensure_future(self._run_in_thread(self._write_image, image_path, image_data))
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # El hilo no se puede interrumpir: esperar a que termine y borrar el archivo del perdedor
+            await asyncio.wait([future])
+            self._discard_partial(image_path)
+            raise
+    
+    def _write_image(self, image_path: Path, image_data: bytes):
+        """Guardar una imagen recibida en base64 ya decodificada"""
+        with tracer.span('file.write', kind='file', path=str(image_path), bytes=len(image_data)):
+            with open(image_path, 'wb') as f:
+                f.write(image_data)
+    
+    async def _generate_with_replicate(self, session, prompt: str, index: int) -> Tuple[Optional[str], Optional[str], str]:
         """Generar con Replicate API"""
         try:
-            import replicate
+            headers = {
+                "Authorization": f"Token {self.replicate_api_key}",
+                "Content-Type": "application/json"
+            }
+            
+            # Respuesta síncrona si el modelo termina dentro del plazo. Con hedging no: la
+            # predicción debe poder cancelarse, y su id solo llega cuando responde la creación
+            if not self.hedging_enabled:
+                headers["Prefer"] = "wait=60"
             
             # Usar modelo SDXL para mejor calidad
-            output = replicate.run(
-                "stability-ai/sdxl:39ed52f2a78e934b3ba6e2a89f5b1c712de7dfea535525255b1aa35c5565e08b",
-                input={
+            data = {
+                "version": "39ed52f2a78e934b3ba6e2a89f5b1c712de7dfea535525255b1aa35c5565e08b",
+                "input": {
                     "prompt": prompt,
                     "width": 1080,
                     "height": 1920,  # Formato vertical para Instagram
@@ -186,22 +455,40 @@ class DynamicImageGenerator:
                     "num_inference_steps": 25,
                     "guidance_scale": 7.5
                 }
-            )
+            }
             
-            if output and len(output) > 0:
-                image_url = output[0]
-                
-                # Descargar imagen
-                import requests
-                response = requests.get(image_url, timeout=30)
-                
-                if response.status_code == 200:
-                    filename = f"dynamic_image_{index+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                    image_path = self.images_dir / filename
-                    
-                    with open(image_path, 'wb') as f:
-                        f.write(response.content)
+            async with session.post(http_client.resolve(REPLICATE_PREDICTIONS_URL), headers=headers, json=data,
+                                    timeout=aiohttp.ClientTimeout(total=70)) as response:
+                if response.status not in (200, 201, 202):
+                    return None, None, "Replicate Failed"
+                prediction = await response.json()
+            
+            # Sondeo con backoff exponencial si aún no terminó
+            delay = 0.5
+            status_url = prediction.get('urls', {}).get('get') or f"{REPLICATE_PREDICTIONS_URL}/{prediction['id']}"
+            
+            try:
+                while prediction.get('status') not in TERMINAL_STATUSES:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 1.5, 5.0)
                     
+                    async with session.get(http_client.resolve(status_url), headers=headers,
+                                           timeout=aiohttp.ClientTimeout(total=10)) as response:
+                        if response.status == 200:
+                            prediction = await response.json()
+            
+            except asyncio.CancelledError:
+                # Perdió la carrera del hedging: parar también la predicción para no pagarla
+                await self._cancel_replicate_prediction(session, prediction, headers)
+                raise
+            
+            output = prediction.get('output')
+            
+            if prediction['status'] == 'succeeded' and output:
+                image_url = output[0] if isinstance(output, list) else output
+                image_path = self._partial_path(index, 'replicate', '.jpg')
+                
+                if await self._download_image(session, image_url, image_path):
                     return str(image_path), image_url, "Replicate (SDXL)"
             
             return None, None, "Replicate Failed"
@@ -210,11 +497,25 @@ class DynamicImageGenerator:
             print(f"Error con Replicate: {str(e)}")
             return None, None, "Replicate Error"
     
-    def _generate_with_stability(self, prompt: str, index: int) -> Tuple[Optional[str], Optional[str], str]:
+    async def _cancel_replicate_prediction(self, session, prediction: Dict, headers: Dict):
+        """Cancelar en Replicate una predicción que ya no se necesita"""
+        cancel_url = prediction.get('urls', {}).get('cancel') or \
+            f"{REPLICATE_PREDICTIONS_URL}/{prediction['id']}/cancel"
+        
+        try:
+            async with session.post(http_client.resolve(cancel_url), headers=headers,
+                                    timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    print(f"🛑 Predicción {prediction['id']} cancelada en Replicate")
+                else:
+                    print(f"⚠️  No se pudo cancelar la predicción {prediction['id']}: HTTP {response.status}")
+        
+        except Exception as e:
+            print(f"Error cancelando predicción de Replicate: {str(e)}")
+    
+    async def _generate_with_stability(self, session, prompt: str, index: int) -> Tuple[Optional[str], Optional[str], str]:
         """Generar con Stability AI"""
         try:
-            import requests
-            
             url = "https://api.stability.ai/v1/generation/stable-diffusion-xl-1024-v1-0/text-to-image"
             
             headers = {
@@ -236,23 +537,19 @@ class DynamicImageGenerator:
                 "steps": 30
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=60)
+            async with session.post(http_client.resolve(url), headers=headers, json=data,
+                                    timeout=aiohttp.ClientTimeout(total=60)) as response:
+                if response.status != 200:
+                    return None, None, "Stability Failed"
+                result = await response.json()
             
-            if response.status_code == 200:
-                result = response.json()
+            if 'artifacts' in result and len(result['artifacts']) > 0:
+                image_data = base64.b64decode(result['artifacts'][0]['base64'])
+                image_path = self._partial_path(index, 'stability', '.png')
                 
-                if 'artifacts' in result and len(result['artifacts']) > 0:
-                    import base64
-                    
-                    image_data = base64.b64decode(result['artifacts'][0]['base64'])
-                    
-                    filename = f"dynamic_image_{index+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                    image_path = self.images_dir / filename
-                    
-                    with open(image_path, 'wb') as f:
-                        f.write(image_data)
-                    
-                    return str(image_path), None, "Stability AI (SDXL)"
+                await self._save_image(image_path, image_data)
+                
+                return str(image_path), None, "Stability AI (SDXL)"
             
             return None, None, "Stability Failed"
         
@@ -260,11 +557,9 @@ class DynamicImageGenerator:
             print(f"Error con Stability AI: {str(e)}")
             return None, None, "Stability Error"
     
-    def _generate_with_deepai(self, prompt: str, index: int) -> Tuple[Optional[str], Optional[str], str]:
+    async def _generate_with_deepai(self, session, prompt: str, index: int) -> Tuple[Optional[str], Optional[str], str]:
         """Generar con DeepAI"""
         try:
-            import requests
-            
             url = "https://api.deepai.org/api/text2img"
             
             headers = {
@@ -273,29 +568,23 @@ class DynamicImageGenerator:
             
             data = {
                 "text": prompt,
-                "width": 1080,
-                "height": 1920
+                "width": "1080",
+                "height": "1920"
             }
             
-            response = requests.post(url, headers=headers, data=data, timeout=60)
+            async with session.post(http_client.resolve(url), headers=headers, data=data,
+                                    timeout=aiohttp.ClientTimeout(total=60)) as response:
+                if response.status != 200:
+                    return None, None, "DeepAI Failed"
+                result = await response.json()
             
-            if response.status_code == 200:
-                result = response.json()
+            if 'output_url' in result:
+                image_url = result['output_url']
+                image_path = self._partial_path(index, 'deepai', '.jpg')
                 
-                if 'output_url' in result:
-                    image_url = result['output_url']
-                    
-                    # Descargar imagen
-                    img_response = requests.get(image_url, timeout=30)
-                    
-                    if img_response.status_code == 200:
-                        filename = f"dynamic_image_{index+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                        image_path = self.images_dir / filename
-                        
-                        with open(image_path, 'wb') as f:
-                            f.write(img_response.content)
-                        
-                        return str(image_path), image_url, "DeepAI"
+                # Descargar imagen
+                if await self._download_image(session, image_url, image_path):
+                    return str(image_path), image_url, "DeepAI"
             
             return None, None, "DeepAI Failed"
         
@@ -303,11 +592,9 @@ class DynamicImageGenerator:
             print(f"Error con DeepAI: {str(e)}")
             return None, None, "DeepAI Error"
     
-    def _generate_with_getimg(self, prompt: str, index: int) -> Tuple[Optional[str], Optional[str], str]:
+    async def _generate_with_getimg(self, session, prompt: str, index: int) -> Tuple[Optional[str], Optional[str], str]:
         """Generar con GetImg.ai"""
         try:
-            import requests
-            
             url = "https://api.getimg.ai/v1/stable-diffusion/text-to-image"
             
             headers = {
@@ -324,23 +611,19 @@ class DynamicImageGenerator:
                 "guidance": 7.5
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=60)
+            async with session.post(http_client.resolve(url), headers=headers, json=data,
+                                    timeout=aiohttp.ClientTimeout(total=60)) as response:
+                if response.status != 200:
+                    return None, None, "GetImg Failed"
+                result = await response.json()
             
-            if response.status_code == 200:
-                result = response.json()
+            if 'image' in result:
+                image_data = base64.b64decode(result['image'])
+                image_path = self._partial_path(index, 'getimg', '.png')
                 
-                if 'image' in result:
-                    import base64
-                    
-                    image_data = base64.b64decode(result['image'])
-                    
-                    filename = f"dynamic_image_{index+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                    image_path = self.images_dir / filename
-                    
-                    with open(image_path, 'wb') as f:
-                        f.write(image_data)
-                    
-                    return str(image_path), None, "GetImg.ai"
+                await self._save_image(image_path, image_data)
+                
+                return str(image_path), None, "GetImg.ai"
             
             return None, None, "GetImg Failed"
         
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline de generación dinámica de videos con IA
+Guión -> {análisis visual -> imágenes múltiples, audio} -> video con transiciones
+"""
+
+from typing import Dict
+
+from utils.pipeline_dag import PipelineDAG, PipelineStepError
+
+def run_dynamic_pipeline(ctx, theme: str = 'mindset', style: str = 'luxury', language: str = 'es',
+                         draft: bool = False) -> Dict:
+    """
+    Ejecutar el pipeline dinámico completo reportando cada paso al JobContext
+
+    El audio no depende del análisis visual, así que TTS corre en paralelo
+    con la rama análisis -> imágenes y el render espera a ambas. Con draft=True el
+    render es un borrador rápido que luego se promueve a final.
+
+    Returns:
+        Diccionario con guión, audio, video y resumen de la generación
+    """
+    from utils.ai_script_generator import script_generator
+    from utils.script_analyzer import script_analyzer
+    from utils.dynamic_image_generator import dynamic_image_generator
+    from utils.tts_local import local_tts
+    from utils.dynamic_video_processor import dynamic_video_processor
+
+    def generate_script(results):
+        with ctx.step('script') as step:
+            success, script, script_file = script_generator.generate_script(theme)
+            if not success:
+                raise RuntimeError(f"Error generando guión: {script}")
+            step['message'] = 'Guión generado'
+        ctx.add_artifact('script', script)
+        ctx.add_artifact('script_file', script_file)
+        return script, script_file
+
+    def analyze_script(results):
+        script, _ = results['script']
+        with ctx.step('analysis') as step:
+            success, visual_concepts, analysis_api = script_analyzer.analyze_script_for_visuals(script, 60)
+            if not success or not visual_concepts:
+                raise RuntimeError("Error analizando guión para conceptos visuales")
+            step['message'] = f"{len(visual_concepts)} conceptos con {analysis_api}"
+        return visual_concepts, analysis_api
+
+    def generate_images(results):
+        visual_concepts, _ = results['analysis']
+        with ctx.step('images') as step:
+            success, generated_images, img_summary = dynamic_image_generator.generate_images_from_analysis(visual_concepts, style)
+            if not success or not generated_images:
+                raise RuntimeError(f"Error generando imágenes dinámicas: {img_summary}")
+            step['message'] = img_summary
+        ctx.add_artifact('images', [img['image_path'] for img in generated_images])
+        return generated_images, img_summary
+
+    def generate_audio(results):
+        script, _ = results['script']
+        with ctx.step('tts') as step:
+            success, audio_path = local_tts.text_to_speech_gtts(script, language)
+            if not success:
+                raise RuntimeError(f"Error generando audio: {audio_path}")
+            step['message'] = 'Audio generado'
+        ctx.add_artifact('audio_file', audio_path)
+        return audio_path
+
+    def render_video(results):
+        generated_images, _ = results['images']
+        audio_path = results['tts']
+        with ctx.step('render') as step:
+            success, video_path, video_message = dynamic_video_processor.create_dynamic_video(
+                audio_path, generated_images, f"{theme}_dynamic", draft=draft
+            )
+            if not success:
+                raise RuntimeError(f"Error creando video dinámico: {video_message}")
+            step['message'] = video_message
+        ctx.add_artifact('video_file', video_path)
+        return video_path, video_message
+
+    # script -> {analysis -> images, tts} -> render
+    dag = PipelineDAG('generate_dynamic')
+    dag.add_step('script', generate_script)
+    dag.add_step('analysis', analyze_script, depends_on=['script'])
+    dag.add_step('images', generate_images, depends_on=['analysis'])
+    dag.add_step('tts', generate_audio, depends_on=['script'])
+    dag.add_step('render', render_video, depends_on=['images', 'tts'])
+
+    try:
+        results, report = dag.run()
+    except PipelineStepError as e:
+        ctx.add_artifact('pipeline_report', e.report)
+        raise e.error
+
+    ctx.add_artifact('pipeline_report', report)
+
+    script, script_file = results['script']
+    visual_concepts, analysis_api = results['analysis']
+    generated_images, img_summary = results['images']
+    audio_path = results['tts']
+    video_path, video_message = results['render']
+
+    return {
+        'script': script,
+        'script_file': script_file,
+        'audio_file': audio_path,
+        'video_file': video_path,
+        'theme': theme,
+        'draft': draft,
+        'message': f'🎉 ¡Video dinámico creado! {video_message}. Análisis: {analysis_api}. {img_summary}',
+        'dynamic_info': {
+            'total_images': len(generated_images),
+            'visual_concepts': len(visual_concepts),
+            'analysis_api': analysis_api,
+            'critical_path': report['critical_path'],
+            'critical_path_time': report['critical_path_time'],
+            'parallel_savings': report['parallel_savings']
+        }
+    }
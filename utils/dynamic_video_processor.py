@@ -9,7 +9,11 @@ import json
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
-import subprocess
+
+from utils.media_metadata import media_metadata
+from utils.ffmpeg_runner import ffmpeg_runner
+from utils.transition_renderer import transition_renderer
+from utils.render_profiles import render_profiles
 
 class DynamicVideoProcessor:
     def __init__(self):
@@ -28,7 +32,9 @@ class DynamicVideoProcessor:
     def create_dynamic_video(self, 
                            audio_path: str, 
                            images_data: List[Dict], 
-                           script_title: str = "Dynamic Video") -> Tuple[bool, str, str]:
+                           script_title: str = "Dynamic Video",
+                           output_path: str = None,
+                           draft: bool = False) -> Tuple[bool, str, str]:
         """
         Crear video dinámico con múltiples imágenes y transiciones
         
@@ -36,11 +42,21 @@ class DynamicVideoProcessor:
             audio_path: Ruta del archivo de audio
             images_data: Lista de datos de imágenes con tiempos
             script_title: Título del script para el nombre del archivo
+            output_path: Ruta del MP4 (por defecto en videos/dynamic con el título)
+            draft: Borrador rápido a baja resolución en videos/drafts, promovible a final
             
         Returns:
             (success, video_path, message)
         """
         
+        if draft:
+            return render_profiles.render_draft('dynamic', self.create_dynamic_video, {
+                'audio_path': audio_path,
+                'images_data': images_data,
+                'script_title': script_title,
+                'output_path': output_path
+            }, default_name=f"dynamic_video_{script_title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4")
+        
         try:
             print(f"🎬 Creando video dinámico con {len(images_data)} imágenes...")
             
@@ -64,7 +80,8 @@ class DynamicVideoProcessor:
                 prepared_images, 
                 audio_path, 
                 audio_duration, 
-                script_title
+                script_title,
+                output_path
             )
             
             if video_path and os.path.exists(video_path):
@@ -80,23 +97,13 @@ class DynamicVideoProcessor:
     
     def _get_audio_duration(self, audio_path: str) -> float:
         """Obtener duración del audio en segundos"""
-        try:
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                '-of', 'csv=p=0', audio_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                return float(result.stdout.strip())
-            else:
-                print(f"Error obteniendo duración: {result.stderr}")
-                return 0.0
+        duration = media_metadata.get_duration(audio_path)
         
-        except Exception as e:
-            print(f"Error obteniendo duración del audio: {str(e)}")
+        if duration is None:
+            print(f"Error obteniendo duración del audio: {audio_path}")
             return 0.0
+        
+        return duration
     
     def _prepare_images_for_video(self, images_data: List[Dict], audio_duration: float) -> List[Dict]:
         """Preparar imágenes con tiempos ajustados"""
@@ -129,7 +136,8 @@ class DynamicVideoProcessor:
                 'end_time': end_time,
                 'duration': end_time - start_time,
                 'concept': img_data.get('concept', f'Imagen {i+1}'),
-                'style': img_data.get('style', 'default')
+                'style': img_data.get('style', 'default'),
+                'motion': img_data.get('motion')  # Preset de movimiento opcional (zoom_in, pan_left...)
             })
         
         # Si hay huecos, extender imágenes o crear transiciones
@@ -170,15 +178,58 @@ class DynamicVideoProcessor:
                                      images: List[Dict], 
                                      audio_path: str, 
                                      duration: float, 
-                                     title: str) -> str:
+                                     title: str,
+                                     output_path: str = None) -> str:
         """Crear video con transiciones usando FFmpeg"""
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_filename = f"dynamic_video_{title.replace(' ', '_')}_{timestamp}.mp4"
-            output_path = self.output_dir / output_filename
+            if not output_path:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                output_filename = f"dynamic_video_{title.replace(' ', '_')}_{timestamp}.mp4"
+                output_path = self.output_dir / output_filename
+            
+            # Resolución y fps del perfil actual (final o borrador)
+            config = self._render_config()
+            
+            # Configuración de video ULTRA COMPATIBLE
+            video_args = [
+                '-c:v', 'libx264',
+                '-preset', render_profiles.preset('fast'),
+                '-pix_fmt', 'yuv420p',  # CRÍTICO: Formato de pixel compatible (NO yuvj420p)
+                '-profile:v', 'baseline',  # Perfil más compatible (NO high)
+                '-level', '3.0',  # Nivel compatible con dispositivos antiguos
+                '-colorspace', 'bt709',  # Espacio de color estándar
+                '-color_primaries', 'bt709',
+                '-color_trc', 'bt709'
+            ]
+            
+            # Configuración de audio ULTRA COMPATIBLE
+            audio_args = render_profiles.audio_args([
+                '-c:a', 'aac',
+                '-b:a', '128k',  # Bitrate fijo más compatible
+                '-ar', '44100',  # Sample rate estándar (NO 24000)
+                '-ac', '2',  # Estéreo forzado
+                '-aac_coder', 'twoloop'  # Codificador AAC más compatible
+            ])
+            
+            # Camino rápido: clips con movimiento y transiciones en paralelo (cacheados), unidos sin recodificar
+            if transition_renderer.enabled:
+                print(f"🎬 Renderizando {len(images)} imágenes con movimiento por segmentos...")
+                success, result = transition_renderer.render(
+                    images, audio_path, duration, str(output_path), video_args, audio_args,
+                    output_args=['-movflags', '+faststart']  # Optimización para streaming web
+                )
+                
+                if success:
+                    print("✅ Video dinámico creado exitosamente")
+                    return str(output_path)
+                
+                print(f"⚠️  Render por segmentos falló, usando grafo único: {result}")
+            
+            # Sin movimiento en el grafo único: zoompan aquí sería demasiado lento
+            video_args.extend(['-tune', 'stillimage'])  # Optimización para imágenes estáticas
             
             # Crear filtro complejo para FFmpeg
-            filter_complex = self._build_ffmpeg_filter(images, duration)
+            filter_complex = self._build_ffmpeg_filter(images, duration, config)
             
             # Construir comando FFmpeg
             cmd = ['ffmpeg', '-y']  # -y para sobrescribir
@@ -194,29 +245,15 @@ class DynamicVideoProcessor:
             cmd.extend([
                 '-filter_complex', filter_complex,
                 '-map', '[final]',  # Video final
-                '-map', f'{len(images)}:a',  # Audio
-                
-                # Configuración de video ULTRA COMPATIBLE
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-tune', 'stillimage',  # Optimización para imágenes estáticas
-                '-pix_fmt', 'yuv420p',  # CRÍTICO: Formato de pixel compatible (NO yuvj420p)
-                '-profile:v', 'baseline',  # Perfil más compatible (NO high)
-                '-level', '3.0',  # Nivel compatible con dispositivos antiguos
+                '-map', f'{len(images)}:a'  # Audio
+            ])
+            cmd.extend(video_args)
+            cmd.extend(audio_args)
+            cmd.extend([
                 '-movflags', '+faststart',  # Optimización para streaming web
-                '-colorspace', 'bt709',  # Espacio de color estándar
-                '-color_primaries', 'bt709',
-                '-color_trc', 'bt709',
-                
-                # Configuración de audio ULTRA COMPATIBLE
-                '-c:a', 'aac',
-                '-b:a', '128k',  # Bitrate fijo más compatible
-                '-ar', '44100',  # Sample rate estándar (NO 24000)
-                '-ac', '2',  # Estéreo forzado
-                '-aac_coder', 'twoloop',  # Codificador AAC más compatible
                 
                 # Configuración general mejorada
-                '-r', str(self.video_config['fps']),
+                '-r', str(config['fps']),
                 '-t', str(duration),
                 '-avoid_negative_ts', 'make_zero',  # Evitar timestamps negativos
                 '-fflags', '+genpts',  # Generar timestamps correctos
@@ -229,7 +266,7 @@ class DynamicVideoProcessor:
             print(f"📁 Salida: {output_path}")
             
             # Ejecutar comando
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = ffmpeg_runner.run(cmd, duration=duration)
             
             if result.returncode == 0:
                 print(f"✅ Video dinámico creado exitosamente")
@@ -242,8 +279,15 @@ class DynamicVideoProcessor:
             print(f"Error creando video con transiciones: {str(e)}")
             return ""
     
-    def _build_ffmpeg_filter(self, images: List[Dict], total_duration: float) -> str:
+    def _render_config(self) -> Dict:
+        """Configuración de video con la resolución y fps del perfil de render actual"""
+        width, height = render_profiles.size(self.video_config['width'], self.video_config['height'])
+        return dict(self.video_config, width=width, height=height,
+                    fps=render_profiles.fps(self.video_config['fps']))
+    
+    def _build_ffmpeg_filter(self, images: List[Dict], total_duration: float, config: Dict = None) -> str:
         """Construir filtro complejo de FFmpeg para transiciones"""
+        config = config or self.video_config
         try:
             filters = []
             
@@ -251,9 +295,9 @@ class DynamicVideoProcessor:
             for i, img in enumerate(images):
                 # Escalar, ajustar imagen y forzar formato yuv420p
                 filters.append(
-                    f"[{i}:v]scale={self.video_config['width']}:{self.video_config['height']}:"
-                    f"force_original_aspect_ratio=decrease,pad={self.video_config['width']}:"
-                    f"{self.video_config['height']}:(ow-iw)/2:(oh-ih)/2:black,"
+                    f"[{i}:v]scale={config['width']}:{config['height']}:"
+                    f"force_original_aspect_ratio=decrease,pad={config['width']}:"
+                    f"{config['height']}:(ow-iw)/2:(oh-ih)/2:black,"
                     f"scale=in_range=full:out_range=tv,format=yuv420p,setsar=1[img{i}]"
                 )
             
@@ -298,7 +342,7 @@ class DynamicVideoProcessor:
         except Exception as e:
             print(f"Error construyendo filtro FFmpeg: {str(e)}")
             # Filtro simple de fallback
-            return f"[0:v]scale={self.video_config['width']}:{self.video_config['height']}:force_original_aspect_ratio=decrease,pad={self.video_config['width']}:{self.video_config['height']}:(ow-iw)/2:(oh-ih)/2:black,setsar=1[final]"
+            return f"[0:v]scale={config['width']}:{config['height']}:force_original_aspect_ratio=decrease,pad={config['width']}:{config['height']}:(ow-iw)/2:(oh-ih)/2:black,setsar=1[final]"
     
     def create_simple_dynamic_video(self, 
                                   audio_path: str, 
@@ -354,7 +398,7 @@ class DynamicVideoProcessor:
                 str(output_path)
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            result = ffmpeg_runner.run(cmd)
             
             if result.returncode == 0:
                 return True, str(output_path), "Video simple creado"
@@ -373,14 +417,8 @@ class DynamicVideoProcessor:
             # Información básica
             file_size = os.path.getsize(video_path) / (1024 * 1024)  # MB
             
-            # Obtener duración con FFprobe
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                '-of', 'csv=p=0', video_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            duration = float(result.stdout.strip()) if result.returncode == 0 else 0
+            # Obtener duración con FFprobe (vía índice de metadatos)
+            duration = media_metadata.get_duration(video_path) or 0
             
             return {
                 'file_path': video_path,
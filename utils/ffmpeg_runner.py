@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+Ejecución de FFmpeg con progreso en tiempo real
+Lee '-progress pipe:1' mientras el proceso corre, permite cancelar por trabajo y escala el timeout a la duración
+"""
+
+import os
+import time
+import uuid
+import threading
+import contextvars
+import subprocess
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from utils.media_metadata import media_metadata
+from utils.tracing import tracer
+from utils.metrics import metrics
+from utils.render_profiles import render_profiles
+
+# Líneas finales de stderr que se conservan para diagnosticar errores
+STDERR_TAIL_LINES = 200
+
+# Trabajos cuyo último progreso se recuerda para la API
+MAX_TRACKED_JOBS = 200
+
+# Contexto de la tarea actual (trabajo, límite de hilos, callbacks); viaja con copy_context a otros hilos
+_current_context = contextvars.ContextVar('ffmpeg_context', default=None)
+
+# Renders por minuto = rate(ffmpeg_runs_total[1m]) * 60
+FFMPEG_RUNS = metrics.counter('ffmpeg_runs_total', 'Ejecuciones de FFmpeg por perfil y resultado', ['profile', 'status'])
+FFMPEG_SECONDS = metrics.histogram('ffmpeg_run_seconds', 'Duración de cada ejecución de FFmpeg', ['profile'])
+FFMPEG_REALTIME = metrics.histogram('ffmpeg_realtime_factor', 'Segundos de medio renderizados por segundo de reloj',
+                                    ['profile'], buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64))
+
+class FFmpegCancelled(RuntimeError):
+    """El trabajo se canceló mientras FFmpeg estaba en marcha"""
+
+class FFmpegRunner:
+    def __init__(self, timeout_factor: float = None, min_timeout: float = None, stall_timeout: float = None):
+        # Timeout = base + duración × factor (10x tiempo real cubre presets lentos en máquinas modestas)
+        self.timeout_factor = timeout_factor or float(os.getenv('FFMPEG_TIMEOUT_FACTOR', '10'))
+        self.min_timeout = min_timeout or float(os.getenv('FFMPEG_MIN_TIMEOUT', '120'))
+
+        # Segundos sin avanzar out_time tras los que un render se considera atascado
+        self.stall_timeout = stall_timeout or float(os.getenv('FFMPEG_STALL_TIMEOUT', '120'))
+
+        self.lock = threading.Lock()
+        self.active: Dict[str, Dict] = {}
+        self.job_progress: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.cancelled_jobs = set()
+
+    @contextmanager
+    def context(self, job_id: Optional[str] = None, threads: Optional[int] = None,
+                on_progress: Optional[Callable[[Dict], None]] = None):
+        """
+        Asociar las llamadas a FFmpeg de este bloque a un trabajo
+
+        Los contextos se anidan: un lote dentro de un trabajo conserva el id del
+        trabajo y suma su propio límite de hilos y callback.
+        """
+        previous = _current_context.get() or {}
+        context = {
+            'job_id': job_id or previous.get('job_id'),
+            'threads': threads or previous.get('threads'),
+            'callbacks': list(previous.get('callbacks', [])) + ([on_progress] if on_progress else [])
+        }
+
+        token = _current_context.set(context)
+        try:
+            yield
+        finally:
+            _current_context.reset(token)
+
+    def bind(self, func: Callable) -> Callable:
+        """Envolver una función para que corra en otro hilo con el contexto actual"""
+        context = contextvars.copy_context()
+        return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+    def thread_limit(self) -> Optional[int]:
+        """Límite de hilos del trabajo actual o None si no hay ninguno"""
+        return (_current_context.get() or {}).get('threads')
+
+    def current_job_id(self) -> Optional[str]:
+        return (_current_context.get() or {}).get('job_id')
+
+    def run(self, cmd: List[str], duration: Optional[float] = None, timeout: Optional[float] = None,
+            on_progress: Optional[Callable[[Dict], None]] = None) -> subprocess.CompletedProcess:
+        """
+        Ejecutar un comando FFmpeg leyendo su progreso
+
+        Devuelve un CompletedProcess como subprocess.run (stderr con las últimas líneas),
+        así que sustituye a subprocess.run(cmd, capture_output=True, text=True) sin más cambios.
+
+        Args:
+            cmd: Comando completo empezando por 'ffmpeg'
+            duration: Duración esperada de la salida en segundos; si falta se deduce de -t o de las entradas
+            timeout: Segundos máximos; por defecto escalado a la duración
+            on_progress: Callback con {'percent', 'out_time', 'fps', 'speed', 'frame', 'finished'}
+
+        Raises:
+            subprocess.TimeoutExpired si se agota el tiempo o el render se atasca
+            FFmpegCancelled si el trabajo asociado se cancela
+        """
+        output = cmd[-1]
+        if duration is None:
+            duration = self._infer_duration(cmd)
+
+        profile = 'draft' if render_profiles.is_draft() else 'final'
+        start = time.perf_counter()
+        status = 'error'
+
+        try:
+            with tracer.span('ffmpeg', kind='ffmpeg', output=os.path.basename(output), media_duration=duration) as span:
+                result = self._run(cmd, duration, timeout, on_progress)
+
+                span['attributes']['exit_code'] = result.returncode
+                if result.returncode == 0:
+                    status = 'ok'
+                    if os.path.isfile(output):
+                        span['attributes']['bytes'] = os.path.getsize(output)
+
+                return result
+
+        except FFmpegCancelled:
+            status = 'cancelled'
+            raise
+
+        except subprocess.TimeoutExpired:
+            status = 'timeout'
+            raise
+
+        finally:
+            elapsed = time.perf_counter() - start
+            FFMPEG_RUNS.inc(profile=profile, status=status)
+            FFMPEG_SECONDS.observe(elapsed, profile=profile)
+            if status == 'ok' and duration and elapsed > 0:
+                FFMPEG_REALTIME.observe(duration / elapsed, profile=profile)
+
+    def _run(self, cmd: List[str], duration: Optional[float], timeout: Optional[float],
+             on_progress: Optional[Callable[[Dict], None]]) -> subprocess.CompletedProcess:
+        context = _current_context.get() or {}
+        job_id = context.get('job_id')
+        callbacks = list(context.get('callbacks', [])) + ([on_progress] if on_progress else [])
+
+        if job_id and job_id in self.cancelled_jobs:
+            raise FFmpegCancelled(f"Trabajo {job_id} cancelado")
+
+        if timeout is None:
+            timeout = self.scaled_timeout(duration)
+
+        cmd = self._prepare_command(cmd, context.get('threads'))
+        if self._writes_to_stdout(cmd):
+            return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, errors='replace')
+
+        run_id = uuid.uuid4().hex[:8]
+        run = {
+            'id': run_id,
+            'job_id': job_id,
+            'output': os.path.basename(cmd[-1]),
+            'started_at': time.time(),
+            'duration': duration,
+            'timeout': timeout,
+            'progress': {'percent': 0.0 if duration else None},
+            'last_advance': time.monotonic(),
+            'process': process,
+            'stop_reason': None
+        }
+
+        with self.lock:
+            self.active[run_id] = run
+            cancelled = job_id in self.cancelled_jobs
+
+        # Cancelado justo mientras arrancaba
+        if cancelled:
+            run['stop_reason'] = 'cancelled'
+            self._stop(process)
+
+        # stderr se drena en otro hilo para que el pipe no se llene y bloquee a FFmpeg
+        stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        stderr_thread = threading.Thread(target=self._drain, args=(process.stderr, stderr_tail), daemon=True)
+        stderr_thread.start()
+
+        watchdog_stop = threading.Event()
+        watchdog = threading.Thread(target=self._watchdog, args=(run, watchdog_stop), daemon=True)
+        watchdog.start()
+
+        try:
+            progress = {}
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                if not key:
+                    continue
+                progress[key] = value
+
+                # Cada bloque de -progress termina con progress=continue|end
+                if key == 'progress':
+                    self._publish(run, self._parse_progress(progress, duration), callbacks)
+                    progress = {}
+
+            returncode = process.wait()
+        finally:
+            watchdog_stop.set()
+            stderr_thread.join(timeout=5)
+            with self.lock:
+                self.active.pop(run_id, None)
+
+        if run['stop_reason'] == 'cancelled':
+            raise FFmpegCancelled(f"Trabajo {job_id} cancelado")
+
+        # Mismo contrato que subprocess.run al agotar el tiempo
+        if run['stop_reason'] in ('timeout', 'stalled'):
+            stderr_tail.append(f"FFmpeg detenido ({run['stop_reason']}) tras {round(time.time() - run['started_at'])}s")
+            raise subprocess.TimeoutExpired(cmd, timeout, stderr='\n'.join(stderr_tail))
+
+        return subprocess.CompletedProcess(cmd, returncode, '', '\n'.join(stderr_tail))
+
+    def scaled_timeout(self, duration: Optional[float]) -> float:
+        """Timeout proporcional a la duración del medio; 300s si no se conoce"""
+        if not duration:
+            return 300.0
+        return max(self.min_timeout, self.min_timeout + duration * self.timeout_factor)
+
+    def cancel(self, job_id: str) -> int:
+        """Cancelar un trabajo: detiene sus FFmpeg en curso e impide lanzar más. Devuelve cuántos se detuvieron"""
+        stopped = 0
+
+        with self.lock:
+            self.cancelled_jobs.add(job_id)
+            runs = [run for run in self.active.values() if run['job_id'] == job_id]
+
+        for run in runs:
+            run['stop_reason'] = 'cancelled'
+            self._stop(run['process'])
+            stopped += 1
+
+        return stopped
+
+    def release(self, job_id: str):
+        """Olvidar la marca de cancelación cuando el trabajo ya terminó"""
+        with self.lock:
+            self.cancelled_jobs.discard(job_id)
+
+    def get_progress(self, job_id: str) -> Dict:
+        """Progreso del trabajo: renders activos y el último publicado"""
+        with self.lock:
+            active = [
+                {
+                    'run_id': run['id'],
+                    'output': run['output'],
+                    'elapsed': round(time.time() - run['started_at'], 1),
+                    'timeout': run['timeout'],
+                    **run['progress']
+                }
+                for run in self.active.values() if run['job_id'] == job_id
+            ]
+            last = self.job_progress.get(job_id)
+
+            return {
+                'active': active,
+                'last': dict(last) if last else None,
+                'cancelled': job_id in self.cancelled_jobs
+            }
+
+    def get_active(self) -> List[Dict]:
+        """Todos los FFmpeg en marcha (para diagnóstico)"""
+        with self.lock:
+            return [
+                {'run_id': run['id'], 'job_id': run['job_id'], 'output': run['output'],
+                 'elapsed': round(time.time() - run['started_at'], 1), **run['progress']}
+                for run in self.active.values()
+            ]
+
+    def _publish(self, run: Dict, snapshot: Dict, callbacks: List[Callable]):
+        previous_time = run['progress'].get('out_time')
+        if snapshot['out_time'] is not None and snapshot['out_time'] != previous_time:
+            run['last_advance'] = time.monotonic()
+
+        run['progress'] = snapshot
+
+        if run['job_id']:
+            with self.lock:
+                self.job_progress[run['job_id']] = dict(snapshot, output=run['output'], updated_at=time.time())
+                self.job_progress.move_to_end(run['job_id'])
+                while len(self.job_progress) > MAX_TRACKED_JOBS:
+                    self.job_progress.popitem(last=False)
+
+        for callback in callbacks:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Error en callback de progreso: {str(e)}")
+
+    def _watchdog(self, run: Dict, stop: threading.Event):
+        """Detener el proceso si se agota el tiempo o deja de avanzar"""
+        deadline = time.monotonic() + run['timeout']
+
+        while not stop.wait(1.0):
+            now = time.monotonic()
+
+            if now >= deadline:
+                run['stop_reason'] = 'timeout'
+            elif now - run['last_advance'] >= self.stall_timeout:
+                run['stop_reason'] = 'stalled'
+            else:
+                continue
+
+            self._stop(run['process'])
+            return
+
+    def _stop(self, process: subprocess.Popen):
+        """Pedir a FFmpeg que termine y matarlo si no responde"""
+        if process.poll() is not None:
+            return
+
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def _prepare_command(self, cmd: List[str], threads: Optional[int]) -> List[str]:
+        cmd = list(cmd)
+
+        # -threads es opción de salida: va justo antes de la ruta final
+        if threads and '-threads' not in cmd:
+            cmd[-1:-1] = ['-threads', str(threads)]
+
+        if '-progress' not in cmd and not self._writes_to_stdout(cmd):
+            cmd[1:1] = ['-progress', 'pipe:1', '-nostats']
+
+        return cmd
+
+    def _writes_to_stdout(self, cmd: List[str]) -> bool:
+        return cmd[-1] in ('-', 'pipe:1', 'pipe:')
+
+    def _infer_duration(self, cmd: List[str]) -> Optional[float]:
+        """Duración de la salida: el último -t o la entrada más larga que se pueda sondear"""
+        if '-t' in cmd:
+            index = len(cmd) - 1 - cmd[::-1].index('-t')
+            try:
+                return float(cmd[index + 1])
+            except (IndexError, ValueError):
+                pass
+
+        inputs = [cmd[i + 1] for i, arg in enumerate(cmd[:-1]) if arg == '-i' and os.path.isfile(cmd[i + 1])]
+        durations = [d for d in media_metadata.get_durations(inputs).values() if d] if inputs else []
+
+        return max(durations) if durations else None
+
+    def _parse_progress(self, progress: Dict[str, str], duration: Optional[float]) -> Dict:
+        """Convertir un bloque key=value de -progress en números"""
+        out_time = None
+        # out_time_ms está en microsegundos pese al nombre (igual que out_time_us)
+        raw_time = progress.get('out_time_us') or progress.get('out_time_ms')
+        try:
+            out_time = int(raw_time) / 1_000_000 if raw_time not in (None, 'N/A') else None
+        except ValueError:
+            pass
+
+        def number(key):
+            try:
+                return float(progress.get(key, '').rstrip('x'))
+            except ValueError:
+                return None
+
+        percent = None
+        if duration and out_time is not None:
+            percent = round(min(100.0, max(0.0, out_time / duration * 100)), 1)
+        if progress.get('progress') == 'end':
+            percent = 100.0
+
+        return {
+            'percent': percent,
+            'out_time': round(out_time, 2) if out_time is not None else None,
+            'fps': number('fps'),
+            'speed': number('speed'),
+            'frame': int(number('frame') or 0),
+            'finished': progress.get('progress') == 'end'
+        }
+
+    def _drain(self, stream, tail: deque):
+        for line in stream:
+            tail.append(line.rstrip())
+
+# Crear instancia global
+ffmpeg_runner = FFmpegRunner()
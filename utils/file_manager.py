@@ -6,6 +6,8 @@ from pathlib import Path
 import tempfile
 import zipfile
 
+from utils.media_metadata import media_metadata
+
 class FileManager:
     def __init__(self):
         self.base_path = "videos"
@@ -161,6 +163,37 @@ class FileManager:
         
         return sorted(videos)
     
+    def get_videos_with_metadata(self, folder_type):
+        """Get videos in a folder with size and duration from the media metadata index"""
+        folder_path = self.folders.get(folder_type)
+        if not folder_path:
+            return []
+        
+        videos = self._get_videos_in_folder(folder_path)
+        
+        # One batch lookup; only new or modified files are probed
+        durations = media_metadata.get_durations(videos)
+        
+        entries = []
+        for video in videos:
+            try:
+                stat = os.stat(video)
+            except OSError:
+                continue
+            
+            duration = durations.get(video)
+            entries.append({
+                'id': os.path.basename(video),
+                'filename': os.path.basename(video),
+                'path': video,
+                'size': f"{stat.st_size / (1024 * 1024):.1f} MB",
+                'duration': f"{int(duration // 60)}:{int(duration % 60):02d}" if duration else None,
+                'duration_seconds': duration,
+                'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M')
+            })
+        
+        return entries
+    
     def get_recent_activity(self, limit=10):
         """Get recent activity across all folders"""
         activity = []
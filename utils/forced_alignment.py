@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Alineación forzada local de texto y audio
+Tiempos por palabra a partir de la locución generada (energía/silencios con NumPy o aeneas si está instalado)
+"""
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+import subprocess
+from typing import Dict, List, Optional
+
+# Versión del formato/algoritmo: cambiarla invalida los .timing.json existentes
+TIMING_VERSION = 1
+
+# Idiomas de TTS a códigos ISO 639-3 que entiende aeneas
+AENEAS_LANGUAGES = {'es': 'spa', 'en': 'eng', 'pt': 'por', 'fr': 'fra', 'it': 'ita', 'de': 'deu'}
+
+EMOJI_PATTERN = re.compile("["
+                           u"\U0001F600-\U0001F64F"
+                           u"\U0001F300-\U0001F5FF"
+                           u"\U0001F680-\U0001F6FF"
+                           u"\U0001F1E0-\U0001F1FF"
+                           u"\U00002702-\U000027B0"
+                           u"\U000024C2-\U0001F251"
+                           "]+", flags=re.UNICODE)
+
+class ForcedAligner:
+    def __init__(self, method: str = None, sample_rate: int = 16000, frame_ms: int = 10,
+                 min_pause_ms: int = 150, silence_db: float = 35.0):
+        # auto (aeneas si está instalado, si no energía), aeneas, energy u off
+        self.method = (method or os.getenv('FORCED_ALIGNMENT', 'auto')).lower()
+
+        # Análisis de energía: PCM mono a 16 kHz en ventanas de 10 ms
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+
+        # Silencio más corto que cuenta como pausa y dB por debajo del pico que se consideran silencio
+        self.min_pause_ms = min_pause_ms
+        self.silence_db = silence_db
+
+    def align(self, audio_path: str, script_text: str, language: str = 'es',
+              timing_dir: str = None) -> Optional[List[Dict]]:
+        """
+        Tiempos por palabra del guión sobre el audio
+
+        El resultado se guarda junto al audio (<nombre>.timing.json), o en timing_dir si se indica,
+        y se reutiliza mientras no cambien ni el audio ni el texto.
+
+        Returns:
+            Lista de {'word', 'start', 'end'} o None si no se pudo alinear
+        """
+        if self.method == 'off' or not audio_path or not os.path.exists(audio_path):
+            return None
+
+        words = self.tokenize(script_text)
+        if not words:
+            return None
+
+        signature = self._signature(audio_path, words, language)
+        timing_path = self._timing_path(audio_path, timing_dir)
+        cached = self._load_timing(timing_path, signature)
+        if cached is not None:
+            return cached
+
+        word_timings = None
+        method_used = None
+
+        if self.method in ('auto', 'aeneas'):
+            word_timings = self._align_with_aeneas(audio_path, words, language)
+            method_used = 'aeneas'
+
+        if word_timings is None and self.method in ('auto', 'energy'):
+            word_timings = self._align_with_energy(audio_path, words)
+            method_used = 'energy'
+
+        if word_timings:
+            self._save_timing(timing_path, signature, method_used, word_timings)
+
+        return word_timings
+
+    def tokenize(self, text: str) -> List[str]:
+        """Palabras del guión tal como se pronuncian (sin emojis ni hashtags sueltos)"""
+        clean = EMOJI_PATTERN.sub('', text or '')
+        return [word for word in clean.split() if re.search(r'\w', word)]
+
+    def time_segments(self, segments: List[str], word_timings: List[Dict]) -> List[Dict]:
+        """
+        Asignar inicio y fin a segmentos de subtítulo a partir de los tiempos por palabra
+
+        Los segmentos pueden venir de otro limpiado del mismo guión: se alinean por
+        posición relativa de caracteres, así no hace falta que las palabras coincidan.
+        """
+        if not segments or not word_timings:
+            return []
+
+        total_chars = sum(self._char_count(segment) for segment in segments) or 1
+        timed = []
+        position = 0
+
+        for segment in segments:
+            start = self._time_at_fraction(word_timings, position / total_chars, 'start')
+            position += self._char_count(segment)
+            end = self._time_at_fraction(word_timings, position / total_chars, 'end')
+
+            timed.append({'text': segment, 'start': start, 'end': max(end, start + 0.1)})
+
+        return timed
+
+    def _time_at_fraction(self, word_timings: List[Dict], fraction: float, side: str) -> float:
+        """Tiempo en el que se pronuncia la fracción 'fraction' de los caracteres del guión"""
+        total_chars = sum(self._char_count(timing['word']) for timing in word_timings)
+        target = fraction * total_chars
+        consumed = 0
+
+        for timing in word_timings:
+            length = self._char_count(timing['word'])
+
+            if consumed + length >= target - 1e-6:
+                # Un límite de segmento cae en el borde de una palabra: inicio o fin según el lado
+                if side == 'start' and abs(consumed + length - target) < 1e-6:
+                    consumed += length
+                    continue
+                within = min(1.0, max(0.0, (target - consumed) / length)) if length else 0
+                return timing['start'] + within * (timing['end'] - timing['start'])
+
+            consumed += length
+
+        return word_timings[-1]['end']
+
+    def _char_count(self, text: str) -> int:
+        """Caracteres de palabra (sin espacios ni puntuación), comparables entre limpiados distintos"""
+        return len(re.findall(r'\w', text))
+
+    def _align_with_energy(self, audio_path: str, words: List[str]) -> Optional[List[Dict]]:
+        """
+        Alineación por energía
+
+        Detecta las regiones con voz, reparte las palabras por el tiempo hablado en
+        proporción a sus caracteres y ajusta a cada pausa el límite de palabra más cercano.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return None
+
+        samples = self._decode_pcm(audio_path)
+        if samples is None or not len(samples):
+            return None
+
+        regions = self._detect_speech_regions(np, samples)
+        if not regions:
+            return None
+
+        # Las pausas de la locución caen sobre todo tras puntuación: esas palabras pesan algo más
+        weights = [max(len(re.sub(r'\W', '', word)), 1) + (2 if word[-1] in '.,;:!?' else 0) for word in words]
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+
+        region_lengths = [end - start for start, end in regions]
+        speech_total = sum(region_lengths)
+        boundaries = list(cumulative / cumulative[-1] * speech_total)
+
+        # Posición de cada pausa en tiempo hablado; se le pega el límite de palabra más cercano
+        pause_positions = list(np.cumsum(region_lengths)[:-1])
+        snapped = set()
+        for pause in pause_positions:
+            nearest = min(range(1, len(boundaries) - 1), key=lambda i: abs(boundaries[i] - pause), default=None)
+            if nearest is None or nearest in snapped:
+                continue
+            boundaries[nearest] = pause
+            snapped.add(nearest)
+
+        word_timings = []
+        for i, word in enumerate(words):
+            start = self._speech_to_real(regions, boundaries[i], 'start')
+            end = self._speech_to_real(regions, boundaries[i + 1], 'end')
+            word_timings.append({'word': word, 'start': round(float(start), 3), 'end': round(float(max(end, start)), 3)})
+
+        return word_timings
+
+    def _detect_speech_regions(self, np, samples) -> List[List[float]]:
+        """Regiones [inicio, fin] en segundos con energía por encima del umbral de silencio"""
+        frame_size = int(self.sample_rate * self.frame_ms / 1000)
+        frame_count = len(samples) // frame_size
+        if not frame_count:
+            return []
+
+        frames = samples[:frame_count * frame_size].astype(np.float32).reshape(frame_count, frame_size)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-6
+        energy_db = 20 * np.log10(rms)
+
+        # Umbral relativo al pico: independiente del volumen de cada voz TTS
+        voiced = energy_db > (np.percentile(energy_db, 95) - self.silence_db)
+
+        # Las pausas más cortas que min_pause_ms son parte de la palabra (oclusivas, respiraciones)
+        min_pause_frames = max(1, self.min_pause_ms // self.frame_ms)
+        frame_seconds = self.frame_ms / 1000
+
+        regions = []
+        start = None
+        silence_run = 0
+
+        for index, is_voiced in enumerate(voiced):
+            if is_voiced:
+                if start is None:
+                    start = index
+                silence_run = 0
+            elif start is not None:
+                silence_run += 1
+                if silence_run >= min_pause_frames:
+                    regions.append([start * frame_seconds, (index - silence_run + 1) * frame_seconds])
+                    start = None
+                    silence_run = 0
+
+        if start is not None:
+            regions.append([start * frame_seconds, (frame_count - silence_run) * frame_seconds])
+
+        return regions
+
+    def _speech_to_real(self, regions: List[List[float]], position: float, side: str) -> float:
+        """Convertir una posición en tiempo hablado (sin pausas) a tiempo real del audio"""
+        consumed = 0.0
+
+        for index, (start, end) in enumerate(regions):
+            edge = consumed + end - start
+            is_last = index == len(regions) - 1
+
+            # En el borde exacto de una pausa el fin queda antes y el inicio después de ella
+            if side == 'end' and position <= edge + 1e-6:
+                return min(end, start + max(0.0, position - consumed))
+            if side == 'start' and position < edge - 1e-6:
+                return start + max(0.0, position - consumed)
+            if is_last:
+                return end
+
+            consumed = edge
+
+        return regions[-1][1]
+
+    def _decode_pcm(self, audio_path: str):
+        """Decodificar el audio a PCM mono de 16 bits con FFmpeg"""
+        import numpy as np
+
+        try:
+            cmd = [
+                'ffmpeg', '-v', 'error', '-i', audio_path,
+                '-vn', '-ac', '1', '-ar', str(self.sample_rate),
+                '-f', 's16le', '-'
+            ]
+            result = subprocess.run(cmd, capture_output=True, timeout=120)
+
+            if result.returncode != 0:
+                print(f"Error decodificando audio para alineación: {result.stderr.decode(errors='ignore')}")
+                return None
+
+            return np.frombuffer(result.stdout, dtype=np.int16)
+
+        except Exception as e:
+            print(f"Error decodificando audio para alineación: {str(e)}")
+            return None
+
+    def _align_with_aeneas(self, audio_path: str, words: List[str], language: str) -> Optional[List[Dict]]:
+        """Alineación con aeneas (una palabra por fragmento) si está instalado"""
+        try:
+            from aeneas.executetask import ExecuteTask
+            from aeneas.task import Task
+        except ImportError:
+            return None
+
+        text_path = None
+        try:
+            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+                f.write('\n'.join(words))
+                text_path = f.name
+
+            task_language = AENEAS_LANGUAGES.get(language[:2], 'spa')
+            task = Task(config_string=f"task_language={task_language}|is_text_type=plain|os_task_file_format=json")
+            task.audio_file_path_absolute = os.path.abspath(audio_path)
+            task.text_file_path_absolute = text_path
+
+            ExecuteTask(task).execute()
+
+            fragments = [f for f in task.sync_map_leaves() if f.is_regular]
+            if len(fragments) != len(words):
+                return None
+
+            return [
+                {'word': word, 'start': round(float(f.begin), 3), 'end': round(float(f.end), 3)}
+                for word, f in zip(words, fragments)
+            ]
+
+        except Exception as e:
+            print(f"Error alineando con aeneas: {str(e)}")
+            return None
+
+        finally:
+            if text_path and os.path.exists(text_path):
+                os.remove(text_path)
+
+    def _timing_path(self, audio_path: str, timing_dir: str = None) -> str:
+        base = os.path.splitext(audio_path)[0]
+        if timing_dir:
+            base = os.path.join(timing_dir, os.path.basename(base))
+        return base + '.timing.json'
+
+    def _signature(self, audio_path: str, words: List[str], language: str) -> Dict:
+        stat = os.stat(audio_path)
+        return {
+            'version': TIMING_VERSION,
+            'language': language,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'text_hash': hashlib.sha256(' '.join(words).encode('utf-8')).hexdigest()
+        }
+
+    def _load_timing(self, timing_path: str, signature: Dict) -> Optional[List[Dict]]:
+        """Tiempos guardados si el audio y el texto no han cambiado"""
+        try:
+            if os.path.exists(timing_path):
+                with open(timing_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('signature') == signature:
+                    return data['words']
+        except Exception as e:
+            print(f"Error leyendo tiempos de {timing_path}: {str(e)}")
+
+        return None
+
+    def _save_timing(self, timing_path: str, signature: Dict, method: str, word_timings: List[Dict]):
+        """Guardar los tiempos de forma atómica"""
+        try:
+            temp_path = timing_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'method': method, 'words': word_timings}, f, ensure_ascii=False, indent=2)
+
+            os.replace(temp_path, timing_path)
+
+        except Exception as e:
+            print(f"Error guardando tiempos en {timing_path}: {str(e)}")
+
+# Crear instancia global
+forced_aligner = ForcedAligner()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente HTTP compartido para todos los proveedores externos
+Sesiones por host con pool de conexiones keep-alive, reintentos con backoff y timeouts por defecto
+Los orígenes se pueden redirigir (HTTP_URL_OVERRIDES) a un servidor local de pruebas o benchmark
+"""
+
+import os
+import re
+import time
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.tracing import tracer
+from utils.metrics import metrics
+
+# Latencia por host de todas las peticiones HTTP (proveedores, Instagram, Telegram)
+HTTP_SECONDS = metrics.histogram('http_request_seconds', 'Latencia de las peticiones HTTP salientes por host',
+                                 ['host', 'status'])
+
+class HTTPClient:
+    def __init__(self, pool_size: int = None, retries: int = None, backoff: float = None,
+                 timeout: float = None):
+        self.pool_size = pool_size or int(os.getenv('HTTP_POOL_SIZE', '10'))
+        self.retries = retries if retries is not None else int(os.getenv('HTTP_RETRIES', '2'))
+        self.backoff = backoff if backoff is not None else float(os.getenv('HTTP_BACKOFF', '0.5'))
+        self.timeout = timeout or float(os.getenv('HTTP_TIMEOUT', '30'))
+
+        self.sessions: Dict[str, requests.Session] = {}
+        self.stats: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+        # Origen real -> URL base sustituta: "https://api.groq.com=http://127.0.0.1:8765/groq,..."
+        self.overrides: Dict[str, str] = {}
+        for pair in os.getenv('HTTP_URL_OVERRIDES', '').split(','):
+            if '=' in pair:
+                origin, target = pair.split('=', 1)
+                self.overrides[origin.strip().rstrip('/')] = target.strip().rstrip('/')
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Enviar la petición por la sesión del host, reutilizando conexiones abiertas"""
+        # Las estadísticas siguen agrupadas por el proveedor original aunque se redirija
+        host = self._host_key(url)
+        session = self._get_session(host)
+        kwargs.setdefault('timeout', self.timeout)
+
+        # El token de Telegram va en la ruta: no se guarda en las trazas
+        parts = urlsplit(url)
+        path = re.sub(r'/bot[^/]+', '/bot***', parts.path)
+
+        with tracer.span(f"{method} {parts.netloc}", kind='provider', provider=parts.netloc, method=method,
+                         path=path, prompt_hash=tracer.prompt_hash(self._prompt_text(kwargs))) as span:
+            start = time.perf_counter()
+            try:
+                response = session.request(method, self.resolve(url), **kwargs)
+            except Exception:
+                self._record(host, time.perf_counter() - start, error=True)
+                raise
+
+            self._record(host, time.perf_counter() - start, error=response.status_code >= 500)
+
+            span['attributes']['status_code'] = response.status_code
+            # Content-Length y no response.content: leer el cuerpo aquí rompería stream=True
+            content_length = response.headers.get('Content-Length')
+            if content_length and content_length.isdigit() and not kwargs.get('stream'):
+                span['attributes']['bytes'] = int(content_length)
+            if response.status_code >= 400:
+                span['status'] = 'error'
+
+            return response
+
+    def set_overrides(self, overrides: Dict[str, str]):
+        """Redirigir orígenes ({'https://api.groq.com': 'http://127.0.0.1:8765/groq'}); vacío los quita"""
+        with self.lock:
+            self.overrides = {origin.rstrip('/'): target.rstrip('/') for origin, target in overrides.items()}
+
+    def resolve(self, url: str) -> str:
+        """
+        URL a la que se envía realmente una petición
+
+        También la usan los clientes aiohttp para respetar las mismas redirecciones.
+        """
+        if not self.overrides:
+            return url
+
+        origin = self._host_key(url)
+        target = self.overrides.get(origin)
+        return target + url[len(origin):] if target else url
+
+    def get_pool_stats(self) -> Dict:
+        """Estadísticas por host: peticiones, conexiones abiertas y reutilizadas, latencia"""
+        with self.lock:
+            hosts = {}
+
+            for host, session in self.sessions.items():
+                stats = dict(self.stats.get(host, {}))
+                connections = 0
+
+                for adapter in session.adapters.values():
+                    for pool_key in list(adapter.poolmanager.pools.keys()):
+                        pool = adapter.poolmanager.pools.get(pool_key)
+                        if pool is not None:
+                            connections += pool.num_connections
+
+                requests_count = stats.get('requests', 0)
+                stats['connections_opened'] = connections
+                stats['connections_reused'] = max(0, requests_count - connections)
+                stats['avg_latency_ms'] = round(stats.pop('total_time', 0.0) / requests_count * 1000, 1) if requests_count else 0.0
+                hosts[host] = stats
+
+            return {
+                'pool_size': self.pool_size,
+                'retries': self.retries,
+                'timeout': self.timeout,
+                'overrides': dict(self.overrides),
+                'hosts': hosts
+            }
+
+    def _get_session(self, host: str) -> requests.Session:
+        with self.lock:
+            session = self.sessions.get(host)
+
+            if session is None:
+                session = self._create_session()
+                self.sessions[host] = session
+                self.stats[host] = {'requests': 0, 'errors': 0, 'total_time': 0.0}
+
+            return session
+
+    def _create_session(self) -> requests.Session:
+        """Sesión con pool keep-alive y reintentos ante errores de conexión, 429 y 5xx"""
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            # POST no se reintenta por estado para no duplicar generaciones de pago
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _record(self, host: str, elapsed: float, error: bool = False):
+        HTTP_SECONDS.observe(elapsed, host=urlsplit(host).netloc, status='error' if error else 'ok')
+
+        with self.lock:
+            stats = self.stats[host]
+            stats['requests'] += 1
+            stats['total_time'] += elapsed
+            if error:
+                stats['errors'] += 1
+
+    def _prompt_text(self, kwargs: Dict) -> Optional[str]:
+        """Texto del prompt en los formatos de petición de los proveedores (para su huella en la traza)"""
+        payload = kwargs.get('json') if isinstance(kwargs.get('json'), dict) else kwargs.get('data')
+        if not isinstance(payload, dict):
+            return None
+
+        if payload.get('messages'):
+            return payload['messages'][-1].get('content')
+        if payload.get('text_prompts'):
+            return payload['text_prompts'][0].get('text')
+        if isinstance(payload.get('input'), dict):
+            return payload['input'].get('prompt')
+
+        return payload.get('prompt') or payload.get('inputs') or payload.get('text')
+
+    def _host_key(self, url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+# Crear instancia global
+http_client = HTTPClient()
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de imágenes generadas direccionada por contenido
+Evita repetir llamadas a Replicate/Stability/DeepAI/GetImg para el mismo prompt
+"""
+
+from typing import Optional
+
+from utils.content_cache import ContentCache
+
+class ImageCache(ContentCache):
+    def __init__(self, cache_dir: str = 'generated/image_cache', max_size_mb: int = None,
+                 enabled: bool = None):
+        # IMAGE_CACHE_ENABLED / IMAGE_CACHE_MAX_MB
+        super().__init__(cache_dir, 'IMAGE_CACHE', 'imágenes', max_size_mb, enabled, default_max_mb=500)
+
+    def make_key(self, provider: str, model: str, prompt: str, width: int, height: int,
+                 seed: Optional[int] = None) -> str:
+        """Clave de contenido: mismo proveedor, modelo, prompt, tamaño y semilla -> misma imagen"""
+        return super().make_key(
+            provider=provider,
+            model=model,
+            prompt=prompt.strip(),
+            width=width,
+            height=height,
+            seed=seed
+        )
+
+# Crear instancia global
+image_cache = ImageCache()
@@ -5,12 +5,13 @@ Incluye Instagram Graph API e Instagrapi
 """
 
 import os
-import requests
 import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 import tempfile
 
+from utils.http_client import http_client
+
 class InstagramAPI:
     def __init__(self):
         # Instagram Graph API (oficial)
@@ -42,7 +43,7 @@ class InstagramAPI:
         try:
             url = f"{self.graph_api_base}/me"
             params = {'access_token': self.access_token}
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             return response.status_code == 200
         except:
             return False
@@ -302,7 +303,7 @@ class InstagramAPI:
                 'access_token': self.access_token
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -356,7 +357,7 @@ class InstagramAPI:
                 'access_token': self.access_token
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -422,7 +423,7 @@ class InstagramAPI:
                     'access_token': self.access_token
                 }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -446,7 +447,7 @@ class InstagramAPI:
                 'access_token': self.access_token
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -471,7 +472,7 @@ class InstagramAPI:
                 'access_token': self.access_token
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
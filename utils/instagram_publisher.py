@@ -5,7 +5,6 @@ Incluye publicación automática y manual
 """
 
 import os
-import requests
 import json
 import time
 from datetime import datetime
@@ -13,6 +12,8 @@ from typing import Optional, Dict, Tuple
 import tempfile
 import shutil
 
+from utils.http_client import http_client
+
 class InstagramPublisher:
     def __init__(self):
         # Instagram Graph API
@@ -46,7 +47,7 @@ class InstagramPublisher:
         try:
             url = f"{self.graph_api_base}/me"
             params = {'access_token': self.access_token}
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             return response.status_code == 200
         except:
             return False
@@ -106,7 +107,7 @@ class InstagramPublisher:
                 'access_token': self.access_token
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -180,7 +181,7 @@ class InstagramPublisher:
                 'access_token': self.access_token
             }
             
-            response = requests.post(url, data=data, timeout=60)
+            response = http_client.post(url, data=data, timeout=60)
             
             if response.status_code == 200:
                 container_id = response.json()['id']
@@ -192,7 +193,7 @@ class InstagramPublisher:
                     'access_token': self.access_token
                 }
                 
-                publish_response = requests.post(publish_url, data=publish_data, timeout=60)
+                publish_response = http_client.post(publish_url, data=publish_data, timeout=60)
                 
                 if publish_response.status_code == 200:
                     return True, "Video publicado exitosamente"
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Cola de trabajos en segundo plano para Instagram Video Dashboard
+Ejecuta los pipelines largos fuera del hilo de la petición y guarda su progreso en disco
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from utils.ffmpeg_runner import ffmpeg_runner, FFmpegCancelled
+from utils.tracing import tracer
+from utils.metrics import metrics
+
+# Reels por hora = rate(jobs_total{status="completed"}[1h]) * 3600
+JOBS_TOTAL = metrics.counter('jobs_total', 'Trabajos terminados por tipo y estado', ['type', 'status'])
+JOB_SECONDS = metrics.histogram('job_duration_seconds', 'Duración de los trabajos por tipo', ['type'],
+                                buckets=(5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600))
+
+class JobCancelled(Exception):
+    """El usuario canceló el trabajo; se lanza al empezar el siguiente paso"""
+
+class JobContext:
+    """Contexto que recibe cada handler para reportar pasos y artefactos"""
+
+    def __init__(self, queue: 'JobQueue', job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+
+    @contextmanager
+    def step(self, name: str):
+        """Registrar un paso del pipeline con su estado y duración"""
+        if self.queue.is_cancel_requested(self.job_id):
+            raise JobCancelled(f"Trabajo {self.job_id} cancelado")
+
+        step = self.queue._start_step(self.job_id, name)
+        start = time.perf_counter()
+
+        with tracer.span(f"step {name}", kind='step', job_id=self.job_id) as span:
+            try:
+                yield step
+            except Exception as e:
+                self.queue._finish_step(self.job_id, name, 'failed', time.perf_counter() - start, str(e))
+                raise
+            else:
+                self.queue._finish_step(self.job_id, name, 'completed', time.perf_counter() - start,
+                                        step.get('message', ''))
+                span['attributes']['message'] = step.get('message', '')
+
+    def add_artifact(self, key: str, value):
+        """Guardar un artefacto generado (rutas, textos, resúmenes)"""
+        self.queue._update_job(self.job_id, lambda job: job['artifacts'].__setitem__(key, value))
+
+class JobQueue:
+    def __init__(self, max_workers: int = None, jobs_dir: str = 'generated/jobs'):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+        # Trabajadores en paralelo (varios reels a la vez)
+        self.max_workers = max_workers or int(os.getenv('JOB_WORKERS', '2'))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+
+        self.jobs: Dict[str, Dict] = {}
+        self.handlers: Dict[str, Callable] = {}
+        self.lock = threading.Lock()
+
+        # Recuperar trabajos de ejecuciones anteriores
+        self._load_jobs()
+
+    def register_handler(self, job_type: str, handler: Callable):
+        """Registrar la función que ejecuta un tipo de trabajo: handler(ctx, **params)"""
+        self.handlers[job_type] = handler
+
+    def submit(self, job_type: str, params: Dict = None) -> str:
+        """Encolar un trabajo y devolver su id inmediatamente"""
+        if job_type not in self.handlers:
+            raise ValueError(f"Tipo de trabajo no registrado: {job_type}")
+
+        job_id = uuid.uuid4().hex[:12]
+        now = datetime.now().isoformat()
+
+        job = {
+            'id': job_id,
+            'type': job_type,
+            'status': 'queued',
+            'params': params or {},
+            'steps': [],
+            'artifacts': {},
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now,
+            'started_at': None,
+            'finished_at': None,
+            'duration': None,
+            'cancel_requested': False,
+            'trace_id': None
+        }
+
+        with self.lock:
+            self.jobs[job_id] = job
+            self._save_job(job)
+
+        self.executor.submit(self._run_job, job_id)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Obtener una copia del estado de un trabajo"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def list_jobs(self, limit: int = 20) -> List[Dict]:
+        """Listar los trabajos más recientes"""
+        with self.lock:
+            jobs = sorted(self.jobs.values(), key=lambda j: j['created_at'], reverse=True)
+            return [json.loads(json.dumps(job)) for job in jobs[:limit]]
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancelar un trabajo
+
+        Uno en cola se marca cancelado y no llega a ejecutarse; uno en marcha detiene
+        sus FFmpeg activos y termina en cuanto el handler lo note.
+
+        Returns:
+            Estado resultante o None si el trabajo no existe
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+
+            if job['status'] not in ('queued', 'running'):
+                return job['status']
+
+            job['cancel_requested'] = True
+            if job['status'] == 'queued':
+                job['status'] = 'cancelled'
+                job['error'] = 'Cancelado por el usuario'
+                job['finished_at'] = datetime.now().isoformat()
+
+            job['updated_at'] = datetime.now().isoformat()
+            self._save_job(job)
+            status = job['status']
+
+        if status == 'running':
+            ffmpeg_runner.cancel(job_id)
+
+        return status
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return bool(job and job.get('cancel_requested'))
+
+    def get_queue_stats(self) -> Dict:
+        """Contar trabajos por estado"""
+        stats = {'queued': 0, 'running': 0, 'completed': 0, 'failed': 0, 'interrupted': 0, 'cancelled': 0}
+
+        with self.lock:
+            for job in self.jobs.values():
+                stats[job['status']] = stats.get(job['status'], 0) + 1
+
+        stats['workers'] = self.max_workers
+        return stats
+
+    def _run_job(self, job_id: str):
+        """Ejecutar un trabajo en un hilo del pool"""
+        job = self.get_job(job_id)
+        if not job:
+            return
+
+        handler = self.handlers[job['type']]
+        start = time.perf_counter()
+        started = []
+
+        def mark_running(job):
+            # Cancelado mientras esperaba en la cola: no se ejecuta
+            if job['status'] != 'queued':
+                return
+            job['status'] = 'running'
+            job['started_at'] = datetime.now().isoformat()
+            started.append(True)
+
+        self._update_job(job_id, mark_running)
+        if not started:
+            return
+
+        try:
+            # Los FFmpeg del handler quedan asociados al trabajo para el progreso y la cancelación;
+            # cada trabajo es una traza propia (el reel completo en una cascada)
+            with ffmpeg_runner.context(job_id=job_id), \
+                    tracer.span(f"job {job['type']}", kind='job', job_id=job_id) as span:
+                self._update_job(job_id, lambda job: job.__setitem__('trace_id', span['trace_id']))
+                result = handler(JobContext(self, job_id), **job['params'])
+
+            if self.is_cancel_requested(job_id):
+                raise JobCancelled(f"Trabajo {job_id} cancelado")
+
+            def mark_completed(job):
+                job['status'] = 'completed'
+                job['result'] = result
+
+            self._update_job(job_id, mark_completed)
+
+        except Exception as e:
+            # Un handler puede envolver FFmpegCancelled en su propio error: manda la marca del trabajo
+            if isinstance(e, (JobCancelled, FFmpegCancelled)) or self.is_cancel_requested(job_id):
+                print(f"⏹️ Trabajo {job_id} cancelado")
+
+                def mark_cancelled(job):
+                    job['status'] = 'cancelled'
+                    job['error'] = 'Cancelado por el usuario'
+
+                self._update_job(job_id, mark_cancelled)
+                return
+
+            error = str(e)
+            print(f"❌ Error en trabajo {job_id}: {error}")
+
+            def mark_failed(job):
+                job['status'] = 'failed'
+                job['error'] = error
+
+            self._update_job(job_id, mark_failed)
+
+        finally:
+            ffmpeg_runner.release(job_id)
+            elapsed = round(time.perf_counter() - start, 3)
+
+            def mark_finished(job):
+                job['finished_at'] = datetime.now().isoformat()
+                job['duration'] = elapsed
+
+            self._update_job(job_id, mark_finished)
+
+            status = (self.get_job(job_id) or {}).get('status', 'failed')
+            JOBS_TOTAL.inc(type=job['type'], status=status)
+            JOB_SECONDS.observe(elapsed, type=job['type'])
+
+    def _start_step(self, job_id: str, name: str) -> Dict:
+        step = {
+            'name': name,
+            'status': 'running',
+            'started_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'duration': None,
+            'message': ''
+        }
+        self._update_job(job_id, lambda job: job['steps'].append(step))
+        return step
+
+    def _finish_step(self, job_id: str, name: str, status: str, elapsed: float, message: str = ''):
+        def finish(job):
+            for step in reversed(job['steps']):
+                if step['name'] == name and step['status'] == 'running':
+                    step['status'] = status
+                    step['finished_at'] = datetime.now().isoformat()
+                    step['duration'] = round(elapsed, 3)
+                    step['message'] = message
+                    break
+
+        self._update_job(job_id, finish)
+
+    def _update_job(self, job_id: str, mutate: Callable):
+        """Aplicar un cambio al trabajo y persistirlo"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+            mutate(job)
+            job['updated_at'] = datetime.now().isoformat()
+            self._save_job(job)
+
+    def _save_job(self, job: Dict):
+        """Guardar el trabajo en disco de forma atómica"""
+        try:
+            job_file = self.jobs_dir / f"{job['id']}.json"
+            temp_file = job_file.with_suffix('.json.tmp')
+
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(job, f, indent=2, ensure_ascii=False, default=str)
+
+            os.replace(temp_file, job_file)
+
+        except Exception as e:
+            print(f"Error guardando trabajo {job['id']}: {str(e)}")
+
+    def _load_jobs(self):
+        """Cargar trabajos guardados; los que quedaron a medias se marcan interrumpidos"""
+        for job_file in self.jobs_dir.glob('*.json'):
+            try:
+                with open(job_file, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+
+                if job.get('status') in ('queued', 'running'):
+                    job['status'] = 'interrupted'
+                    job['error'] = 'El servidor se reinició antes de terminar el trabajo'
+                    self._save_job(job)
+
+                self.jobs[job['id']] = job
+
+            except Exception as e:
+                print(f"Error cargando trabajo {job_file}: {str(e)}")
+
+# Crear instancia global
+job_queue = JobQueue()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Índice persistente de metadatos de medios (ffprobe)
+Guarda en SQLite el resultado de ffprobe por (ruta, tamaño, mtime) para no volver a sondear el mismo archivo
+"""
+
+import os
+import json
+import time
+import sqlite3
+import subprocess
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+class MediaMetadataIndex:
+    def __init__(self, db_path: str = 'generated/media_metadata.db', max_workers: int = 4):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'probes': 0, 'errors': 0}
+        self._init_db()
+
+    def probe(self, path: str) -> Optional[Dict]:
+        """Salida JSON de ffprobe (format + streams) del archivo, desde el índice si no cambió"""
+        return self.probe_many([path]).get(path)
+
+    def probe_many(self, paths: List[str]) -> Dict[str, Dict]:
+        """
+        Sondear muchos archivos a la vez
+
+        Los que ya están en el índice con el mismo tamaño y mtime no lanzan
+        ningún proceso; el resto se sondea en paralelo y se guarda en una
+        sola transacción.
+        """
+        signatures = {}
+        for path in paths:
+            signature = self._signature(path)
+            if signature:
+                signatures[path] = signature
+
+        results = {}
+        if not signatures:
+            return results
+
+        # Consultar el índice de una vez
+        keys = [signature[0] for signature in signatures.values()]
+        rows = {}
+        with self.lock:
+            connection = self._connect()
+            try:
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    for row in connection.execute(
+                        f"SELECT path, size, mtime, data FROM media WHERE path IN ({placeholders})", chunk
+                    ):
+                        rows[row[0]] = row
+            finally:
+                connection.close()
+
+        missing = []
+        for path, (key, size, mtime) in signatures.items():
+            row = rows.get(key)
+            if row and row[1] == size and row[2] == mtime:
+                results[path] = json.loads(row[3])
+                self.stats['hits'] += 1
+            else:
+                missing.append(path)
+
+        if not missing:
+            return results
+
+        # Sondear en paralelo los archivos nuevos o modificados
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+            probed = list(zip(missing, executor.map(self._run_ffprobe, missing)))
+
+        new_rows = []
+        for path, data in probed:
+            if data is None:
+                self.stats['errors'] += 1
+                continue
+
+            key, size, mtime = signatures[path]
+            results[path] = data
+            new_rows.append((key, size, mtime, time.time(), json.dumps(data)))
+            self.stats['probes'] += 1
+
+        if new_rows:
+            with self.lock:
+                connection = self._connect()
+                try:
+                    with connection:
+                        connection.executemany(
+                            "INSERT OR REPLACE INTO media (path, size, mtime, probed_at, data) VALUES (?, ?, ?, ?, ?)",
+                            new_rows
+                        )
+                finally:
+                    connection.close()
+
+        return results
+
+    def get_duration(self, path: str) -> Optional[float]:
+        """Duración en segundos o None si no se pudo sondear"""
+        return self.duration_from_probe(self.probe(path))
+
+    def get_durations(self, paths: List[str]) -> Dict[str, Optional[float]]:
+        """Duraciones de muchos archivos con un único sondeo por lotes"""
+        probes = self.probe_many(paths)
+        return {path: self.duration_from_probe(probes.get(path)) for path in paths}
+
+    def duration_from_probe(self, data: Optional[Dict]) -> Optional[float]:
+        if not data:
+            return None
+
+        try:
+            return float(data.get('format', {}).get('duration'))
+        except (TypeError, ValueError):
+            # Algunos contenedores solo informan la duración por stream
+            durations = [float(s['duration']) for s in data.get('streams', []) if s.get('duration')]
+            return max(durations) if durations else None
+
+    def get_stream(self, data: Optional[Dict], codec_type: str) -> Optional[Dict]:
+        """Primer stream del tipo indicado ('video' o 'audio')"""
+        if not data:
+            return None
+        return next((s for s in data.get('streams', []) if s.get('codec_type') == codec_type), None)
+
+    def invalidate(self, path: str):
+        """Olvidar un archivo (por ejemplo tras sobrescribirlo en el mismo segundo)"""
+        with self.lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.execute("DELETE FROM media WHERE path = ?", (os.path.abspath(path),))
+            finally:
+                connection.close()
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            connection = self._connect()
+            try:
+                entries = connection.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+            finally:
+                connection.close()
+
+        return {'entries': entries, **self.stats}
+
+    def _run_ffprobe(self, path: str) -> Optional[Dict]:
+        try:
+            cmd = [
+                'ffprobe', '-v', 'quiet', '-print_format', 'json',
+                '-show_format', '-show_streams', path
+            ]
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+
+            if result.returncode == 0:
+                return json.loads(result.stdout)
+
+            print(f"Error ejecutando ffprobe en {path}: {result.stderr}")
+
+        except Exception as e:
+            print(f"Error sondeando {path}: {str(e)}")
+
+        return None
+
+    def _signature(self, path: str):
+        """(ruta absoluta, tamaño, mtime en ns) o None si el archivo no existe"""
+        try:
+            stat = os.stat(path)
+            return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_db(self):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS media (
+                        path TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        mtime INTEGER NOT NULL,
+                        probed_at REAL NOT NULL,
+                        data TEXT NOT NULL
+                    )
+                """)
+        finally:
+            connection.close()
+
+# Crear instancia global
+media_metadata = MediaMetadataIndex()
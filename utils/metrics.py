@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas de rendimiento con formato de exposición de Prometheus
+Contadores, gauges e histogramas en memoria con etiquetas; /metrics los publica para scrapearlos y alertar
+"""
+
+import os
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Cubetas por defecto en segundos: de llamadas rápidas a renders y predicciones de varios minutos
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+class Metric:
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values: Dict[Tuple[str, ...], object] = {}
+
+    def clear(self):
+        """Olvidar todas las series (gauges que se recalculan enteros en cada scrape)"""
+        with self.lock:
+            self.values = {}
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _matches(self, key: Tuple[str, ...], labels: Dict) -> bool:
+        return all(key[self.labelnames.index(name)] == str(value) for name, value in labels.items())
+
+    def _label_text(self, key: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            return [f"{self.name}{self._label_text(key)} {_format(value)}" for key, value in sorted(self.values.items())]
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError(f"{self.name}: un contador solo puede aumentar")
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Suma de las series que coinciden con las etiquetas dadas (todas si no se da ninguna)"""
+        with self.lock:
+            return sum(value for key, value in self.values.items() if self._matches(key, labels))
+
+class Gauge(Metric):
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self.lock:
+            return sum(value for key, value in self.values.items() if self._matches(key, labels))
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def stats(self, **labels) -> Dict:
+        """Número de observaciones, suma y media de las series que coinciden"""
+        with self.lock:
+            matching = [series for key, series in self.values.items() if self._matches(key, labels)]
+            count = sum(series['count'] for series in matching)
+            total = sum(series['sum'] for series in matching)
+
+        return {'count': count, 'sum': round(total, 3), 'mean': round(total / count, 3) if count else None}
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self.lock:
+            for key, series in sorted(self.values.items()):
+                # Las cubetas de Prometheus son acumulativas: ya se cuentan así al observar
+                for bound, count in zip(self.buckets, series['buckets']):
+                    lines.append(f"{self.name}_bucket{self._label_text(key, (('le', _format(bound)),))} {count}")
+                lines.append(f"{self.name}_bucket{self._label_text(key, (('le', '+Inf'),))} {series['count']}")
+                lines.append(f"{self.name}_sum{self._label_text(key)} {_format(series['sum'])}")
+                lines.append(f"{self.name}_count{self._label_text(key)} {series['count']}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self, disk_ttl: float = None):
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+        self.lock = threading.Lock()
+
+        # Recorrer carpetas grandes en cada scrape es caro: el tamaño se recalcula cada METRICS_DISK_TTL segundos
+        self.disk_ttl = disk_ttl or float(os.getenv('METRICS_DISK_TTL', '60'))
+        self.directories: Dict[str, str] = {}
+        self.disk_checked_at = 0.0
+
+        self.gauge('process_start_time_seconds', 'Inicio del proceso en segundos desde epoch').set(time.time())
+        self.disk_usage = self.gauge('disk_usage_bytes', 'Bytes ocupados por carpeta de trabajo', ['folder'])
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], None]):
+        """Función que actualiza gauges justo antes de cada scrape (profundidad de colas, etc.)"""
+        with self.lock:
+            self.collectors.append(collector)
+
+    def watch_directories(self, directories: Dict[str, str]):
+        """Publicar el tamaño de estas carpetas ({'pending': 'videos/pending', ...}) en disk_usage_bytes"""
+        with self.lock:
+            self.directories.update(directories)
+            self.disk_checked_at = 0.0
+
+    def render(self) -> str:
+        """Texto de exposición de Prometheus (text/plain; version=0.0.4)"""
+        self._collect()
+
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+
+        return '\n'.join(lines) + '\n'
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self.metrics.get(name)
+
+    def value(self, name: str, **labels) -> float:
+        """Valor actual de un contador o gauge (0 si el módulo que lo define no se ha cargado)"""
+        metric = self.metrics.get(name)
+        return metric.value(**labels) if isinstance(metric, (Counter, Gauge)) else 0
+
+    def _register(self, metric_class, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> Metric:
+        """Crear la métrica o devolver la ya registrada con ese nombre (módulos recargados, varias instancias)"""
+        with self.lock:
+            existing = self.metrics.get(name)
+            if existing:
+                if not isinstance(existing, metric_class) or existing.labelnames != tuple(labelnames):
+                    raise ValueError(f"La métrica {name} ya existe con otro tipo o etiquetas")
+                return existing
+
+            metric = metric_class(name, documentation, labelnames, **kwargs)
+            self.metrics[name] = metric
+            return metric
+
+    def _collect(self):
+        with self.lock:
+            collectors = list(self.collectors)
+            refresh_disk = self.directories and time.time() - self.disk_checked_at >= self.disk_ttl
+            if refresh_disk:
+                self.disk_checked_at = time.time()
+            directories = dict(self.directories)
+
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Error recogiendo métricas: {str(e)}")
+
+        if refresh_disk:
+            for folder, path in directories.items():
+                self.disk_usage.set(directory_size(path), folder=folder)
+
+def directory_size(path: str) -> int:
+    """Bytes de todos los archivos bajo path (0 si no existe)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                # Borrado mientras se recorría (temporales de FFmpeg, expulsiones de caché)
+                continue
+    return total
+
+def _format(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer()):
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+# Crear instancia global
+metrics = MetricsRegistry()
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP local que imita a los proveedores externos
+Groq, Cohere, Hugging Face, Replicate, DeepAI, GetImg, Telegram y gTTS con latencias
+y tasas de fallo configurables, para medir el pipeline sin llamar a APIs de pago
+"""
+
+import os
+import re
+import json
+import math
+import time
+import uuid
+import base64
+import random
+import shutil
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Origen real de cada proveedor: el cliente HTTP lo redirige a /<proveedor> del servidor local
+PROVIDER_ORIGINS = {
+    'groq': 'https://api.groq.com',
+    'cohere': 'https://api.cohere.ai',
+    'huggingface': 'https://api-inference.huggingface.co',
+    'replicate': 'https://api.replicate.com',
+    'deepai': 'https://api.deepai.org',
+    'getimg': 'https://api.getimg.ai',
+    'telegram': 'https://api.telegram.org'
+}
+
+# Latencias por defecto (mediana y p95 en segundos) aproximadas a las de los servicios reales;
+# en Replicate es el tiempo hasta que la predicción termina
+DEFAULT_LATENCIES = {
+    'groq': 'lognormal:0.8:2',
+    'cohere': 'lognormal:1.5:4',
+    'huggingface': 'lognormal:3:10',
+    'replicate': 'lognormal:8:20',
+    'deepai': 'lognormal:6:15',
+    'getimg': 'lognormal:5:12',
+    'telegram': 'lognormal:0.3:1',
+    'gtts': 'lognormal:1:3'
+}
+
+# Palabras por segundo de la locución simulada (ritmo aproximado de gTTS en español)
+WORDS_PER_SECOND = 2.5
+
+class LatencyDistribution:
+    """
+    Distribución de latencia a partir de una especificación de texto
+
+    'fixed:S', 'uniform:MIN:MAX', 'exp:MEDIA' o 'lognormal:MEDIANA:P95'
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(value) for value in parts[1:]]
+
+        expected = {'fixed': 1, 'uniform': 2, 'exp': 1, 'lognormal': 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Distribución de latencia no válida: {spec}")
+
+    def sample(self, scale: float = 1.0) -> float:
+        if self.kind == 'fixed':
+            value = self.params[0]
+        elif self.kind == 'uniform':
+            value = random.uniform(*self.params)
+        elif self.kind == 'exp':
+            value = random.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        else:
+            # p95 = mediana * e^(1.645 sigma)
+            median, p95 = self.params
+            sigma = math.log(p95 / median) / 1.645 if p95 > median > 0 else 0.0
+            value = random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+        return max(0.0, value * scale)
+
+class MockProviderServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latencies: Dict[str, str] = None,
+                 failure_rates: Dict[str, float] = None, latency_scale: float = 1.0):
+        self.host = host
+        self.port = port
+        self.latency_scale = latency_scale
+
+        self.latencies = {provider: LatencyDistribution(spec)
+                          for provider, spec in dict(DEFAULT_LATENCIES, **(latencies or {})).items()}
+        self.failure_rates = dict(failure_rates or {})
+
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+        self.assets_dir: Optional[str] = None
+        self.assets: Dict[str, bytes] = {}
+
+        # Predicciones de Replicate en curso: id -> {'ready_at', 'failed', 'canceled'}
+        self.predictions: Dict[str, Dict] = {}
+        self.stats: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        """Generar los archivos de respuesta y arrancar el servidor en un hilo; devuelve su URL base"""
+        if self.server:
+            return self.base_url
+
+        self._create_assets()
+
+        server = self
+
+        class Handler(MockProviderHandler):
+            mock = server
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+        self.thread = threading.Thread(target=self.server.serve_forever, name='mock-providers', daemon=True)
+        self.thread.start()
+
+        print(f"🧪 Proveedores simulados en {self.base_url}")
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+        if self.assets_dir:
+            shutil.rmtree(self.assets_dir, ignore_errors=True)
+            self.assets_dir = None
+
+    def overrides(self) -> Dict[str, str]:
+        """Redirecciones para http_client.set_overrides"""
+        return {origin: f"{self.base_url}/{provider}" for provider, origin in PROVIDER_ORIGINS.items()}
+
+    def synthesize_speech(self, text: str, language: str = 'es') -> bytes:
+        """MP3 de la locución simulada (sustituto de gTTS, que no usa el cliente HTTP compartido)"""
+        from utils.http_client import http_client
+
+        response = http_client.post(f"{self.base_url}/gtts/synthesize",
+                                    json={'text': text, 'lang': language}, timeout=60)
+        if response.status_code != 200:
+            raise RuntimeError(f"gTTS simulado: HTTP {response.status_code}")
+
+        return response.content
+
+    def get_stats(self) -> Dict:
+        """Peticiones, fallos inyectados y latencia simulada por proveedor"""
+        with self.lock:
+            return {
+                provider: {
+                    'requests': stats['requests'],
+                    'failures': stats['failures'],
+                    'canceled': stats.get('canceled', 0),
+                    'avg_latency': round(stats['latency'] / stats['requests'], 3) if stats['requests'] else 0.0
+                }
+                for provider, stats in self.stats.items()
+            }
+
+    def decide(self, provider: str) -> Tuple[float, bool]:
+        """Sortear (latencia, falla) de una llamada y registrarla"""
+        distribution = self.latencies.get(provider)
+        latency = distribution.sample(self.latency_scale) if distribution else 0.0
+        failed = random.random() < self.failure_rates.get(provider, 0.0)
+
+        with self.lock:
+            stats = self.stats.setdefault(provider, {'requests': 0, 'failures': 0, 'latency': 0.0})
+            stats['requests'] += 1
+            stats['latency'] += latency
+            if failed:
+                stats['failures'] += 1
+
+        return latency, failed
+
+    def _create_assets(self):
+        """Imagen vertical de prueba (JPG y PNG) y un segundo de tono en MP3"""
+        self.assets_dir = tempfile.mkdtemp(prefix='mock_providers_')
+
+        outputs = {
+            'image.jpg': ['-f', 'lavfi', '-i', 'testsrc2=s=1080x1920', '-frames:v', '1'],
+            'image.png': ['-f', 'lavfi', '-i', 'testsrc2=s=1080x1920', '-frames:v', '1'],
+            'tone.mp3': ['-f', 'lavfi', '-i', 'sine=frequency=220:duration=1',
+                         '-ar', '24000', '-ac', '1', '-c:a', 'libmp3lame', '-b:a', '32k']
+        }
+
+        for name, args in outputs.items():
+            path = os.path.join(self.assets_dir, name)
+            subprocess.run(['ffmpeg', '-y', '-v', 'error', *args, path], check=True, timeout=60)
+
+            with open(path, 'rb') as f:
+                self.assets[name] = f.read()
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    """Respuestas con el formato de cada proveedor; mock lo asigna MockProviderServer.start"""
+
+    mock: MockProviderServer = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        segments = urlsplit(self.path).path.strip('/').split('/')
+        provider, rest = segments[0], '/'.join(segments[1:])
+
+        # Descargas de archivos y sondeos de Replicate: sin latencia ni fallos propios
+        if provider == 'files':
+            content = self.mock.assets.get(rest)
+            if content is None:
+                return self._send_json(404, {'error': 'not found'})
+            content_type = 'image/png' if rest.endswith('.png') else 'image/jpeg'
+            return self._send(200, content, content_type)
+
+        if provider == 'replicate' and method == 'GET':
+            return self._replicate_status(rest.rsplit('/', 1)[-1])
+
+        if provider == 'replicate' and rest.endswith('/cancel'):
+            return self._replicate_cancel(rest.rsplit('/', 2)[-2])
+
+        latency, failed = self.mock.decide(provider)
+
+        # Replicate responde al momento y la latencia corre mientras se sondea
+        if provider == 'replicate':
+            return self._replicate_create(latency, failed)
+
+        time.sleep(latency)
+
+        if failed:
+            return self._send_json(503, {'error': f'{provider} simulado no disponible'})
+
+        payload = self._parse_body(body)
+
+        if provider == 'groq':
+            messages = payload.get('messages') or [{}]
+            text = fake_text(messages[-1].get('content', ''))
+            return self._send_json(200, {'choices': [{'message': {'role': 'assistant', 'content': text}}]})
+
+        if provider == 'huggingface':
+            return self._send_json(200, [{'generated_text': fake_text(payload.get('inputs', ''))}])
+
+        if provider == 'cohere':
+            text = fake_text(payload.get('prompt') or payload.get('message', ''))
+            return self._send_json(200, {'generations': [{'text': text}], 'text': text})
+
+        if provider == 'deepai':
+            return self._send_json(200, {'output_url': self._file_url('image.jpg')})
+
+        if provider == 'getimg':
+            return self._send_json(200, {'image': base64.b64encode(self.mock.assets['image.png']).decode('ascii')})
+
+        if provider == 'telegram':
+            return self._send_json(200, {'ok': True, 'result': {'message_id': random.randint(1, 10 ** 6),
+                                                                'username': 'mock_bot'}})
+
+        if provider == 'gtts':
+            words = len(str(payload.get('text', '')).split())
+            seconds = max(1, math.ceil(words / WORDS_PER_SECOND))
+            # Los MP3 se concatenan trama a trama igual que los fragmentos de gTTS
+            return self._send(200, self.mock.assets['tone.mp3'] * seconds, 'audio/mpeg')
+
+        return self._send_json(404, {'error': f'proveedor desconocido: {provider}'})
+
+    def _replicate_create(self, latency: float, failed: bool):
+        prediction_id = uuid.uuid4().hex[:16]
+
+        with self.mock.lock:
+            self.mock.predictions[prediction_id] = {'ready_at': time.time() + latency, 'failed': failed,
+                                                    'canceled': False}
+
+        prediction_url = f"http://{self.headers.get('Host')}/replicate/v1/predictions/{prediction_id}"
+        self._send_json(201, {
+            'id': prediction_id,
+            'status': 'processing',
+            'urls': {'get': prediction_url, 'cancel': f"{prediction_url}/cancel"}
+        })
+
+    def _replicate_cancel(self, prediction_id: str):
+        with self.mock.lock:
+            prediction = self.mock.predictions.get(prediction_id)
+            if prediction and not prediction['canceled']:
+                prediction['canceled'] = True
+                stats = self.mock.stats.setdefault('replicate', {'requests': 0, 'failures': 0, 'latency': 0.0})
+                stats['canceled'] = stats.get('canceled', 0) + 1
+
+        if not prediction:
+            return self._send_json(404, {'detail': 'Not found'})
+
+        self._send_json(200, {'id': prediction_id, 'status': 'canceled'})
+
+    def _replicate_status(self, prediction_id: str):
+        with self.mock.lock:
+            prediction = self.mock.predictions.get(prediction_id)
+
+        if not prediction:
+            return self._send_json(404, {'detail': 'Not found'})
+
+        if prediction['canceled']:
+            return self._send_json(200, {'id': prediction_id, 'status': 'canceled'})
+
+        if time.time() < prediction['ready_at']:
+            return self._send_json(200, {'id': prediction_id, 'status': 'processing'})
+
+        if prediction['failed']:
+            return self._send_json(200, {'id': prediction_id, 'status': 'failed', 'error': 'simulado'})
+
+        self._send_json(200, {'id': prediction_id, 'status': 'succeeded', 'output': [self._file_url('image.jpg')]})
+
+    def _file_url(self, name: str) -> str:
+        return f"http://{self.headers.get('Host')}/files/{name}"
+
+    def _parse_body(self, body: bytes) -> Dict:
+        """JSON o formulario urlencoded; los multipart (Telegram) no se interpretan"""
+        if not body:
+            return {}
+
+        content_type = self.headers.get('Content-Type', '')
+        try:
+            if 'json' in content_type:
+                return json.loads(body.decode('utf-8'))
+            if 'x-www-form-urlencoded' in content_type:
+                return {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+        except Exception:
+            pass
+
+        return {}
+
+    def _send_json(self, status: int, data):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def _send(self, status: int, content: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+SCRIPT_SENTENCES = [
+    "La disciplina vence al talento cuando el talento no trabaja.",
+    "Cada mañana decides si avanzas o si te quedas donde estás.",
+    "Los hábitos pequeños construyen resultados enormes con el tiempo.",
+    "Invierte primero en tu educación y después en todo lo demás.",
+    "El dinero sigue a las personas que resuelven problemas reales.",
+    "Rodéate de gente que te exija más de lo que te exiges tú.",
+    "No esperes el momento perfecto, crea las condiciones para empezar.",
+    "Guarda este video y vuelve a verlo cuando pierdas el foco."
+]
+
+def fake_text(prompt: str) -> str:
+    """Respuesta de texto con el formato que esperan los parsers de guiones y análisis visual"""
+    if 'VISUAL_' in prompt:
+        count_match = re.search(r'extrae (\d+) conceptos', prompt)
+        duration_match = re.search(r'\(0-(\d+)\)', prompt)
+        count = int(count_match.group(1)) if count_match else 5
+        duration = int(duration_match.group(1)) if duration_match else 60
+        step = max(1, duration // count)
+
+        visuals = []
+        for i in range(count):
+            visuals.append(
+                f"VISUAL_{i + 1}:\n"
+                f"MOMENTO: {i * step}-{min(duration, (i + 1) * step)}\n"
+                f"CONCEPTO: Concepto visual simulado {i + 1}\n"
+                f"ESTILO: cinematic\n"
+                f"PROMPT_EN: confident entrepreneur in modern office, scene {i + 1}, {uuid.uuid4().hex[:8]}\n"
+                f"EMOCIÓN: inspiring"
+            )
+        return '\n\n'.join(visuals)
+
+    if 'SCRIPT 1' in prompt:
+        count_match = re.search(r'Crea (\d+) scripts', prompt)
+        count = int(count_match.group(1)) if count_match else 1
+        return '\n\n'.join(f"SCRIPT {i + 1}:\n{_fake_script()}" for i in range(count))
+
+    return _fake_script()
+
+def _fake_script() -> str:
+    """Guión de unas 120 palabras (unos 50 segundos de locución)"""
+    sentences: List[str] = []
+    while len(' '.join(sentences).split()) < 120:
+        sentences.append(random.choice(SCRIPT_SENTENCES))
+    return '\n\n'.join(sentences)
+
+# Crear instancia global
+mock_providers = MockProviderServer()
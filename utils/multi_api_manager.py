@@ -5,12 +5,14 @@ Rota automáticamente entre diferentes APIs para cada tarea
 """
 
 import os
-import random
-import requests
+import time
 import json
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+from utils.http_client import http_client
+from utils.api_router import api_router
+
 class MultiAPIManager:
     def __init__(self):
         # APIs para generación de scripts
@@ -147,11 +149,8 @@ class MultiAPIManager:
         if not available:
             return None
         
-        # Estrategia de selección: 70% mejor prioridad, 30% aleatorio
-        if random.random() < 0.7:
-            return available[0]  # Mejor prioridad
-        else:
-            return random.choice(available[:3])  # Top 3 aleatorio
+        # Estrategia de selección: menor tiempo esperado, sin circuitos abiertos
+        return api_router.rank(api_type, available)[0]
     
     def generate_script_with_rotation(self, prompt: str, max_attempts: int = 3) -> Tuple[bool, str, str]:
         """Generar script rotando entre APIs disponibles"""
@@ -166,19 +165,22 @@ class MultiAPIManager:
             api_id = api_config['id']
             attempted_apis.append(api_id)
             
+            start = time.perf_counter()
+            
             try:
                 success, result = self._call_script_api(api_id, prompt)
                 
                 if success:
-                    self._update_usage_stats('script_apis', api_id, True)
+                    self._update_usage_stats('script_apis', api_id, True, time.perf_counter() - start)
                     return True, result, api_config['name']
                 else:
-                    self._update_usage_stats('script_apis', api_id, False)
+                    self._update_usage_stats('script_apis', api_id, False, time.perf_counter() - start,
+                                             self._is_rate_limited(result))
                     print(f"API {api_config['name']} falló: {result}")
             
             except Exception as e:
                 print(f"Error con API {api_config['name']}: {e}")
-                self._update_usage_stats('script_apis', api_id, False)
+                self._update_usage_stats('script_apis', api_id, False, time.perf_counter() - start)
         
         return False, "Todas las APIs de script fallaron", "None"
     
@@ -195,19 +197,22 @@ class MultiAPIManager:
             api_id = api_config['id']
             attempted_apis.append(api_id)
             
+            start = time.perf_counter()
+            
             try:
                 success, image_path, image_url = self._call_image_api(api_id, prompt, style)
                 
                 if success:
-                    self._update_usage_stats('image_apis', api_id, True)
+                    self._update_usage_stats('image_apis', api_id, True, time.perf_counter() - start)
                     return True, image_path, image_url, api_config['name']
                 else:
-                    self._update_usage_stats('image_apis', api_id, False)
+                    self._update_usage_stats('image_apis', api_id, False, time.perf_counter() - start,
+                                             self._is_rate_limited(image_path))
                     print(f"API {api_config['name']} falló: {image_path}")
             
             except Exception as e:
                 print(f"Error con API {api_config['name']}: {e}")
-                self._update_usage_stats('image_apis', api_id, False)
+                self._update_usage_stats('image_apis', api_id, False, time.perf_counter() - start)
         
         return False, "Todas las APIs de imagen fallaron", "", "None"
     
@@ -259,7 +264,7 @@ class MultiAPIManager:
                 "temperature": 0.7
             }
             
-            response = requests.post(config['endpoint'], headers=headers, json=data, timeout=30)
+            response = http_client.post(config['endpoint'], headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -277,14 +282,14 @@ class MultiAPIManager:
             headers = {"api-key": config['api_key']}
             data = {"text": f"{prompt}, {style} style, high quality, professional"}
             
-            response = requests.post(config['endpoint'], headers=headers, data=data, timeout=60)
+            response = http_client.post(config['endpoint'], headers=headers, data=data, timeout=60)
             
             if response.status_code == 200:
                 result = response.json()
                 image_url = result['output_url']
                 
                 # Descargar imagen
-                image_response = requests.get(image_url, timeout=30)
+                image_response = http_client.get(image_url, timeout=30)
                 if image_response.status_code == 200:
                     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                     image_path = f"generated/images/deepai_{style}_{timestamp}.jpg"
@@ -302,8 +307,9 @@ class MultiAPIManager:
         except Exception as e:
             return False, str(e), ""
     
-    def _update_usage_stats(self, api_type: str, api_id: str, success: bool):
-        """Actualizar estadísticas de uso de APIs"""
+    def _update_usage_stats(self, api_type: str, api_id: str, success: bool, latency: float = 0.0,
+                            rate_limited: bool = False):
+        """Actualizar estadísticas de uso de APIs y las del enrutador"""
         if api_id not in self.usage_stats[api_type]:
             self.usage_stats[api_type][api_id] = {'success': 0, 'failed': 0, 'total': 0}
         
@@ -312,6 +318,12 @@ class MultiAPIManager:
             self.usage_stats[api_type][api_id]['success'] += 1
         else:
             self.usage_stats[api_type][api_id]['failed'] += 1
+        
+        api_router.record(api_type.replace('_apis', ''), api_id, latency, success, rate_limited)
+    
+    def _is_rate_limited(self, error: str) -> bool:
+        """Detectar respuestas 429 en el mensaje de error devuelto por las llamadas"""
+        return 'HTTP 429' in str(error)
     
     def get_usage_stats(self) -> Dict:
         """Obtener estadísticas de uso de todas las APIs"""
@@ -320,6 +332,7 @@ class MultiAPIManager:
     def get_api_health(self) -> Dict:
         """Obtener estado de salud de todas las APIs"""
         health = {}
+        routing = api_router.get_stats()
         
         for api_type in ['script', 'image', 'tts']:
             health[api_type] = {}
@@ -337,7 +350,8 @@ class MultiAPIManager:
                     'name': api['name'],
                     'configured': api['configured'],
                     'success_rate': round(success_rate, 1),
-                    'total_calls': total
+                    'total_calls': total,
+                    'routing': routing.get(api_type, {}).get(api_id, {})
                 }
         
         return health
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Codificación paralela por segmentos para videos largos
+Corta la entrada en fotogramas clave, codifica los trozos en paralelo y los une sin recodificar
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from utils.media_metadata import media_metadata
+from utils.ffmpeg_runner import ffmpeg_runner
+
+class ParallelEncoder:
+    def __init__(self, workers: int = None, min_duration: float = None, min_segment_seconds: float = 10.0,
+                 enabled: bool = None):
+        cpu_count = os.cpu_count() or 1
+
+        # Cada x264 usa 2 hilos: con la mitad de núcleos como procesos se llena la CPU sin sobresuscribir
+        self.workers = workers or int(os.getenv('PARALLEL_ENCODE_WORKERS', '0')) or max(1, cpu_count // 2)
+        self.threads_per_worker = max(1, cpu_count // self.workers)
+
+        # Por debajo de esta duración el coste de cortar y unir no compensa
+        self.min_duration = min_duration or float(os.getenv('PARALLEL_ENCODE_MIN_SECONDS', '60'))
+        self.min_segment_seconds = min_segment_seconds
+
+        if enabled is None:
+            enabled = os.getenv('PARALLEL_ENCODE_ENABLED', 'true').lower() != 'false'
+        self.enabled = enabled and self.workers > 1
+
+    def should_split(self, input_path: str) -> bool:
+        """True si el video es lo bastante largo para repartirlo entre varios procesos"""
+        if not self.enabled:
+            return False
+
+        # Dentro de un lote el paralelismo ya lo da el pool de trabajos
+        if ffmpeg_runner.thread_limit() is not None:
+            return False
+
+        duration = media_metadata.get_duration(input_path)
+        return bool(duration and duration >= self.min_duration)
+
+    def encode(self, input_path: str, output_path: str, video_args: List[str],
+               audio_args: List[str], video_filter: Optional[str] = None,
+               output_args: Optional[List[str]] = None) -> Tuple[bool, str]:
+        """
+        Codificar un video repartiendo los segmentos entre varios procesos FFmpeg
+
+        El filtro de video se aplica a cada segmento por separado, así que debe ser
+        independiente del tiempo (escalado, relleno, marca de agua fija...).
+
+        Args:
+            input_path: Video de entrada
+            output_path: MP4 de salida
+            video_args: Códec y opciones de video ('-c:v', 'libx264', '-crf', ...)
+            audio_args: Códec y opciones de audio ('-c:a', 'aac', ...)
+            video_filter: Cadena -vf opcional
+            output_args: Opciones extra del mux final ('-movflags', '+faststart', ...)
+
+        Returns:
+            (success, output_path_or_error)
+        """
+        data = media_metadata.probe(input_path)
+        duration = media_metadata.duration_from_probe(data)
+        if not duration:
+            return False, "No se pudo obtener la duración del video"
+
+        work_dir = tempfile.mkdtemp(prefix='parallel_encode_')
+
+        try:
+            # Paso 1: cortar solo el video, copiando, en los fotogramas clave más cercanos
+            segment_paths = self._split(input_path, work_dir, duration)
+            if not segment_paths:
+                return False, "No se pudo dividir el video en segmentos"
+
+            has_audio = media_metadata.get_stream(data, 'audio') is not None
+            audio_path = os.path.join(work_dir, 'audio.m4a')
+
+            # Paso 2: codificar segmentos (y el audio completo) en paralelo
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # Los hilos del pool heredan el contexto del trabajo para poder cancelarlos
+                encode_audio = ffmpeg_runner.bind(self._encode_audio)
+                encode_segment = ffmpeg_runner.bind(self._encode_segment)
+
+                audio_future = executor.submit(encode_audio, input_path, audio_path, audio_args) if has_audio else None
+
+                encoded_paths = [os.path.join(work_dir, f"encoded_{i:03d}.mp4") for i in range(len(segment_paths))]
+                results = list(executor.map(
+                    lambda paths: encode_segment(paths[0], paths[1], video_args, video_filter),
+                    zip(segment_paths, encoded_paths)
+                ))
+
+                audio_ok = audio_future.result() if audio_future else True
+
+            failed = [error for ok, error in results if not ok]
+            if failed:
+                return False, f"Error codificando segmento: {failed[0]}"
+            if not audio_ok:
+                return False, "Error codificando el audio"
+
+            # Paso 3: unir sin recodificar y multiplexar el audio
+            return self._concat(encoded_paths, audio_path if has_audio else None, output_path,
+                                work_dir, output_args or [])
+
+        except Exception as e:
+            return False, f"Error en codificación paralela: {str(e)}"
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _split(self, input_path: str, work_dir: str, duration: float) -> List[str]:
+        """Dividir el stream de video copiando; el muxer segment corta en el siguiente fotograma clave"""
+        # Algunos segmentos más que procesos para repartir mejor los trozos desiguales
+        max_segments = max(1, int(duration // self.min_segment_seconds))
+        segment_count = min(self.workers * 2, max_segments)
+        if segment_count < 2:
+            return []
+
+        split_times = [f"{duration * i / segment_count:.3f}" for i in range(1, segment_count)]
+        pattern = os.path.join(work_dir, 'segment_%03d.mp4')
+
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-i', input_path,
+            '-map', '0:v:0', '-an',
+            '-c', 'copy',
+            '-f', 'segment',
+            '-segment_times', ','.join(split_times),
+            '-reset_timestamps', '1',
+            pattern
+        ]
+
+        result = ffmpeg_runner.run(cmd, duration=duration)
+        if result.returncode != 0:
+            print(f"Error dividiendo {input_path}: {result.stderr}")
+            return []
+
+        return sorted(
+            os.path.join(work_dir, name) for name in os.listdir(work_dir)
+            if name.startswith('segment_') and name.endswith('.mp4')
+        )
+
+    def _encode_segment(self, segment_path: str, output_path: str, video_args: List[str],
+                        video_filter: Optional[str]) -> Tuple[bool, str]:
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-i', segment_path]
+
+        if video_filter:
+            cmd.extend(['-vf', video_filter])
+
+        cmd.extend(video_args)
+        cmd.extend(['-threads', str(self.threads_per_worker), '-an', output_path])
+
+        result = ffmpeg_runner.run(cmd)
+        if result.returncode == 0 and os.path.exists(output_path):
+            return True, output_path
+
+        return False, result.stderr
+
+    def _encode_audio(self, input_path: str, output_path: str, audio_args: List[str]) -> bool:
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-i', input_path, '-vn'] + audio_args + [output_path]
+        result = ffmpeg_runner.run(cmd)
+
+        if result.returncode != 0:
+            print(f"Error codificando audio de {input_path}: {result.stderr}")
+
+        return result.returncode == 0
+
+    def _concat(self, encoded_paths: List[str], audio_path: Optional[str], output_path: str,
+                work_dir: str, output_args: List[str]) -> Tuple[bool, str]:
+        list_path = os.path.join(work_dir, 'encoded.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in encoded_paths:
+                escaped = path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio_path:
+            cmd.extend(['-i', audio_path, '-map', '0:v:0', '-map', '1:a:0'])
+
+        cmd.extend(['-c', 'copy'] + output_args + [output_path])
+
+        result = ffmpeg_runner.run(cmd)
+        if result.returncode == 0 and os.path.exists(output_path):
+            return True, output_path
+
+        return False, f"Error uniendo segmentos: {result.stderr}"
+
+# Crear instancia global
+parallel_encoder = ParallelEncoder()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Orquestador de pipelines como grafo de dependencias (DAG)
+Ejecuta en paralelo las ramas independientes y reporta el camino crítico
+"""
+
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Tuple
+
+class PipelineStepError(Exception):
+    """Error de un paso del pipeline, conserva el nombre del paso que falló"""
+
+    def __init__(self, step_name: str, error: Exception):
+        super().__init__(str(error))
+        self.step_name = step_name
+        self.error = error
+
+class PipelineDAG:
+    def __init__(self, name: str = "pipeline", max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self.steps: Dict[str, Dict] = {}
+
+    def add_step(self, name: str, func: Callable[[Dict], object], depends_on: List[str] = None):
+        """
+        Agregar un paso al grafo
+
+        Args:
+            name: Nombre único del paso
+            func: Función que recibe el diccionario de resultados de pasos anteriores
+            depends_on: Pasos que deben terminar antes de ejecutar este
+        """
+        depends_on = depends_on or []
+
+        for dependency in depends_on:
+            if dependency not in self.steps:
+                raise ValueError(f"El paso '{name}' depende de '{dependency}', que no existe")
+
+        self.steps[name] = {'func': func, 'depends_on': depends_on}
+        return self
+
+    def run(self) -> Tuple[Dict, Dict]:
+        """
+        Ejecutar el grafo respetando dependencias
+
+        Returns:
+            (results, report) donde report incluye tiempos por paso y camino crítico
+
+        Raises:
+            PipelineStepError si algún paso falla (tras esperar a los que estaban en curso)
+        """
+        results: Dict[str, object] = {}
+        timings: Dict[str, Dict] = {}
+        pending = dict(self.steps)
+        running = {}
+        failure = None
+        run_start = time.perf_counter()
+
+        def execute(step_name: str):
+            start = time.perf_counter()
+            try:
+                return self.steps[step_name]['func'](results)
+            finally:
+                timings[step_name] = {
+                    'start': round(start - run_start, 3),
+                    'end': round(time.perf_counter() - run_start, 3),
+                    'duration': round(time.perf_counter() - start, 3)
+                }
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name) as executor:
+            while pending or running:
+                # Lanzar todos los pasos cuyas dependencias ya terminaron
+                if failure is None:
+                    ready = [step_name for step_name, step in pending.items()
+                             if all(dep in results for dep in step['depends_on'])]
+
+                    for step_name in ready:
+                        # Cada paso hereda el contexto del trabajo (id para cancelar, progreso de FFmpeg)
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, execute, step_name)] = step_name
+                        del pending[step_name]
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    step_name = running.pop(future)
+                    try:
+                        results[step_name] = future.result()
+                    except Exception as e:
+                        if failure is None:
+                            failure = PipelineStepError(step_name, e)
+
+        report = self._build_report(timings, time.perf_counter() - run_start)
+
+        if failure is not None:
+            failure.report = report
+            raise failure
+
+        return results, report
+
+    def _build_report(self, timings: Dict[str, Dict], wall_time: float) -> Dict:
+        """Calcular camino crítico y ahorro frente a la ejecución secuencial"""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, str] = {}
+
+        # Los pasos se registran en orden topológico, así que basta un recorrido
+        for step_name, step in self.steps.items():
+            if step_name not in timings:
+                continue
+
+            best_dep, best_finish = None, 0.0
+            for dep in step['depends_on']:
+                if finish.get(dep, 0.0) >= best_finish:
+                    best_dep, best_finish = dep, finish.get(dep, 0.0)
+
+            finish[step_name] = best_finish + timings[step_name]['duration']
+            previous[step_name] = best_dep
+
+        critical_path = []
+        if finish:
+            # En un empate gana el último en orden topológico: un paso final instantáneo sigue en el camino
+            step_name = max(reversed(list(finish)), key=finish.get)
+            while step_name:
+                critical_path.insert(0, step_name)
+                step_name = previous.get(step_name)
+
+        sequential_time = sum(t['duration'] for t in timings.values())
+
+        return {
+            'pipeline': self.name,
+            'steps': timings,
+            'critical_path': critical_path,
+            'critical_path_time': round(max(finish.values()) if finish else 0.0, 3),
+            'wall_time': round(wall_time, 3),
+            'sequential_time': round(sequential_time, 3),
+            'parallel_savings': round(max(0.0, sequential_time - wall_time), 3)
+        }
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Espera de predicciones de Replicate sin esperas fijas
+Respuesta síncrona con 'Prefer: wait', webhook local opcional y sondeo con backoff exponencial
+"""
+
+import os
+import hmac
+import time
+import base64
+import binascii
+import hashlib
+import threading
+from typing import Dict, Optional
+
+from utils.http_client import http_client
+
+REPLICATE_PREDICTIONS_URL = "https://api.replicate.com/v1/predictions"
+
+TERMINAL_STATUSES = ('succeeded', 'failed', 'canceled')
+
+class PredictionWaiter:
+    def __init__(self, initial_delay: float = 0.5, max_delay: float = 5.0, backoff: float = 1.5,
+                 sync_wait: int = 60):
+        # Backoff del sondeo: 0.5s, 0.75s, 1.1s... hasta max_delay
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+
+        # Segundos que Replicate mantiene abierta la petición de creación (máximo 60)
+        self.sync_wait = sync_wait
+
+        # URL pública que apunta a /api/webhooks/replicate (opcional); sin secreto no se usa,
+        # porque cualquiera podría llamar al endpoint
+        self.webhook_url = os.getenv('REPLICATE_WEBHOOK_URL', '')
+        self.webhook_secret = os.getenv('REPLICATE_WEBHOOK_SECRET', '')
+        self.webhook_key = self._decode_webhook_secret(self.webhook_secret)
+
+        if self.webhook_url and not self.webhook_key:
+            print("⚠️  REPLICATE_WEBHOOK_URL sin REPLICATE_WEBHOOK_SECRET válido: webhook desactivado, solo sondeo")
+
+        self.lock = threading.Lock()
+        self.events: Dict[str, threading.Event] = {}
+
+    def run(self, headers: Dict, data: Dict, timeout: float = 300) -> Dict:
+        """
+        Crear una predicción y esperar a que termine
+
+        Returns:
+            Diccionario de la predicción (status, output, error...)
+
+        Raises:
+            RuntimeError si la creación falla
+        """
+        prediction = self.create(headers, data)
+        return self.wait(prediction, headers, timeout)
+
+    def create(self, headers: Dict, data: Dict) -> Dict:
+        """Crear la predicción pidiendo respuesta síncrona y, si hay, webhook de finalización"""
+        headers = dict(headers)
+        headers['Prefer'] = f"wait={self.sync_wait}"
+
+        data = dict(data)
+        if self.webhook_url and self.webhook_key:
+            data['webhook'] = self.webhook_url
+            data['webhook_events_filter'] = ['completed']
+
+        response = http_client.post(REPLICATE_PREDICTIONS_URL, headers=headers, json=data,
+                                    timeout=self.sync_wait + 10)
+
+        if response.status_code not in (200, 201, 202):
+            raise RuntimeError(f"Replicate Error: {response.status_code}")
+
+        prediction = response.json()
+
+        if prediction.get('status') not in TERMINAL_STATUSES:
+            # Registrar el evento antes de que pueda llegar el webhook
+            with self.lock:
+                self.events.setdefault(prediction['id'], threading.Event())
+
+        return prediction
+
+    def wait(self, prediction: Dict, headers: Dict, timeout: float = 300) -> Dict:
+        """
+        Esperar a la predicción: webhook si llega antes, sondeo con backoff si no
+
+        El webhook solo despierta la espera; el estado y la salida se leen siempre
+        con la consulta autenticada a Replicate, nunca del cuerpo del webhook.
+        """
+        if prediction.get('status') in TERMINAL_STATUSES:
+            return prediction
+
+        prediction_id = prediction['id']
+        status_url = prediction.get('urls', {}).get('get') or f"{REPLICATE_PREDICTIONS_URL}/{prediction_id}"
+
+        with self.lock:
+            event = self.events.setdefault(prediction_id, threading.Event())
+
+        deadline = time.monotonic() + timeout
+        delay = self.initial_delay
+
+        try:
+            while time.monotonic() < deadline:
+                # El webhook despierta la espera en cuanto Replicate termina
+                if event.wait(min(delay, max(0.0, deadline - time.monotonic()))):
+                    event.clear()
+
+                status_response = http_client.get(status_url, headers=headers, timeout=10)
+
+                if status_response.status_code == 200:
+                    prediction = status_response.json()
+                    if prediction.get('status') in TERMINAL_STATUSES:
+                        return prediction
+
+                delay = min(delay * self.backoff, self.max_delay)
+
+            prediction['status'] = 'timeout'
+            return prediction
+
+        finally:
+            with self.lock:
+                self.events.pop(prediction_id, None)
+
+    def notify(self, prediction: Dict) -> bool:
+        """
+        Despertar la espera de una predicción avisada por el webhook; True si alguien la esperaba
+
+        Del cuerpo solo se usa el id: la espera vuelve a consultar la predicción a Replicate.
+        """
+        prediction_id = prediction.get('id')
+        if not prediction_id:
+            return False
+
+        with self.lock:
+            event = self.events.get(prediction_id)
+
+        if not event:
+            return False
+
+        event.set()
+        return True
+
+    def verify_webhook(self, body: bytes, headers: Dict) -> bool:
+        """Verificar la firma del webhook; sin un REPLICATE_WEBHOOK_SECRET válido se rechazan todos"""
+        if not self.webhook_key:
+            return False
+
+        webhook_id = headers.get('webhook-id', '')
+        timestamp = headers.get('webhook-timestamp', '')
+        signatures = headers.get('webhook-signature', '')
+
+        if not webhook_id or not timestamp or not signatures:
+            return False
+
+        # Rechazar mensajes de más de 5 minutos para evitar reenvíos
+        try:
+            if abs(time.time() - int(timestamp)) > 300:
+                return False
+        except ValueError:
+            return False
+
+        signed_content = f"{webhook_id}.{timestamp}.".encode('utf-8') + body
+        expected = base64.b64encode(hmac.new(self.webhook_key, signed_content, hashlib.sha256).digest()).decode()
+
+        return any(
+            hmac.compare_digest(expected, signature.split(',', 1)[-1])
+            for signature in signatures.split()
+        )
+
+    def _decode_webhook_secret(self, secret: str) -> Optional[bytes]:
+        """Clave HMAC del secreto 'whsec_<base64>' o None si falta o está mal formado"""
+        if not secret:
+            return None
+
+        try:
+            return base64.b64decode(secret.split('_', 1)[-1], validate=True)
+        except (binascii.Error, ValueError) as e:
+            print(f"❌ REPLICATE_WEBHOOK_SECRET no es válido ({str(e)}): webhooks desactivados")
+            return None
+
+# Crear instancia global
+prediction_waiter = PredictionWaiter()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Perfiles de render: calidad final o borrador rápido para revisar tiempos y composición
+El borrador renderiza a baja resolución con presets ultrarrápidos en su propia carpeta
+y guarda la receta para promoverlo a final con el mismo grafo
+"""
+
+import os
+import json
+import contextvars
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Perfil del render en curso; viaja con el contexto a los hilos de los pools de FFmpeg
+_current_profile = contextvars.ContextVar('render_profile', default='final')
+
+class RenderProfiles:
+    def __init__(self, drafts_dir: str = 'videos/drafts'):
+        self.drafts_dir = Path(drafts_dir)
+        self.drafts_dir.mkdir(parents=True, exist_ok=True)
+
+        # Resolución y fps del borrador: 1/3 del lienzo final a la mitad de fotogramas
+        self.draft_width = int(os.getenv('DRAFT_WIDTH', '360'))
+        self.draft_height = int(os.getenv('DRAFT_HEIGHT', '640'))
+        self.draft_fps = int(os.getenv('DRAFT_FPS', '15'))
+
+        # Operaciones que se pueden volver a renderizar desde una receta: nombre -> función
+        self.operations: Dict[str, Callable] = {}
+
+    def register_operation(self, name: str, func: Callable):
+        """Registrar una función de render promovible: func(**params)"""
+        self.operations[name] = func
+
+    @contextmanager
+    def use(self, profile: str):
+        """Renderizar el bloque con el perfil indicado ('final' o 'draft')"""
+        token = _current_profile.set(profile)
+        try:
+            yield
+        finally:
+            _current_profile.reset(token)
+
+    def is_draft(self) -> bool:
+        return _current_profile.get() == 'draft'
+
+    def size(self, width: int, height: int) -> Tuple[int, int]:
+        """Tamaño de salida: el del llamador o el del borrador"""
+        if self.is_draft():
+            return self.draft_width, self.draft_height
+        return width, height
+
+    def fps(self, fps: int) -> int:
+        return min(fps, self.draft_fps) if self.is_draft() else fps
+
+    def preset(self, preset: str) -> str:
+        """Preset de x264: en borrador siempre ultrafast"""
+        return 'ultrafast' if self.is_draft() else preset
+
+    def video_args(self, video_args: List[str]) -> List[str]:
+        """Adaptar una lista de opciones de video al perfil actual"""
+        if not self.is_draft():
+            return list(video_args)
+
+        adapted = list(video_args)
+        if '-preset' in adapted:
+            adapted[adapted.index('-preset') + 1] = 'ultrafast'
+        else:
+            adapted.extend(['-preset', 'ultrafast'])
+
+        return adapted
+
+    def audio_args(self, audio_args: List[str]) -> List[str]:
+        """AAC final (twoloop, 128k) o uno ligero para el borrador con el mismo formato de salida"""
+        if not self.is_draft():
+            return list(audio_args)
+
+        return ['-c:a', 'aac', '-b:a', '64k', '-ar', '44100', '-ac', '2']
+
+    def downscale_filter(self) -> Optional[str]:
+        """
+        Escalado final del borrador para grafos construidos sobre el lienzo 1080x1920
+
+        Subtítulos, marca de agua y templates usan posiciones y tamaños absolutos: se
+        dibujan igual que en el final y solo se reduce el resultado.
+        """
+        if not self.is_draft():
+            return None
+        return f"scale={self.draft_width}:{self.draft_height},setsar=1"
+
+    def render_draft(self, operation: str, func: Callable, params: Dict,
+                     default_name: str = None) -> Tuple:
+        """
+        Ejecutar una operación de render como borrador y guardar su receta
+
+        Args:
+            operation: Nombre registrado de la operación (para promoverla después)
+            func: Función de render; se llama con params y output_path en la carpeta de borradores
+            params: Parámetros originales, incluido el output_path final (o None)
+            default_name: Nombre del borrador si params no trae output_path
+
+        Returns:
+            El resultado de func; su segundo elemento es la ruta del borrador
+        """
+        final_path = params.get('output_path')
+        name = os.path.basename(final_path) if final_path else \
+            (default_name or f"draft_{operation}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4")
+        draft_path = str(self.drafts_dir / name)
+
+        with self.use('draft'):
+            result = func(**dict(params, output_path=draft_path))
+
+        if result and result[0]:
+            self._save_recipe(result[1], operation, params)
+
+        return result
+
+    def promote(self, draft_path: str) -> Tuple:
+        """Volver a renderizar un borrador con calidad final usando su receta"""
+        recipe = self.get_recipe(draft_path)
+        if not recipe:
+            return False, f"No hay receta para el borrador: {draft_path}"
+
+        func = self.operations.get(recipe['operation'])
+        if not func:
+            return False, f"Operación no registrada: {recipe['operation']}"
+
+        with self.use('final'):
+            return func(**recipe['params'])
+
+    def get_recipe(self, draft_path: str) -> Optional[Dict]:
+        recipe_file = self._recipe_file(draft_path)
+        try:
+            if recipe_file.exists():
+                with open(recipe_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error cargando receta de {draft_path}: {str(e)}")
+
+        return None
+
+    def list_drafts(self) -> List[Dict]:
+        """Borradores con receta, del más reciente al más antiguo"""
+        drafts = []
+
+        for recipe_file in self.drafts_dir.glob('*.json'):
+            try:
+                with open(recipe_file, 'r', encoding='utf-8') as f:
+                    recipe = json.load(f)
+            except Exception as e:
+                print(f"Error cargando receta {recipe_file}: {str(e)}")
+                continue
+
+            if os.path.exists(recipe.get('draft_path', '')):
+                drafts.append(recipe)
+
+        return sorted(drafts, key=lambda recipe: recipe['created_at'], reverse=True)
+
+    def _save_recipe(self, draft_path: str, operation: str, params: Dict):
+        """Guardar la receta junto al borrador de forma atómica"""
+        recipe = {
+            'operation': operation,
+            'params': params,
+            'draft_path': draft_path,
+            'created_at': datetime.now().isoformat(),
+            'profile': {'width': self.draft_width, 'height': self.draft_height, 'fps': self.draft_fps}
+        }
+
+        try:
+            recipe_file = self._recipe_file(draft_path)
+            temp_file = recipe_file.with_suffix('.json.tmp')
+
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(recipe, f, indent=2, ensure_ascii=False, default=str)
+
+            os.replace(temp_file, recipe_file)
+
+        except Exception as e:
+            print(f"Error guardando receta de {draft_path}: {str(e)}")
+
+    def _recipe_file(self, draft_path: str) -> Path:
+        return self.drafts_dir / f"{Path(draft_path).stem}.json"
+
+# Crear instancia global
+render_profiles = RenderProfiles()
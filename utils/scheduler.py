@@ -15,6 +15,12 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from utils.metrics import metrics
+
+# Publicaciones automáticas en Instagram (éxito / error) para alertar si dejan de salir
+PUBLISH_TOTAL = metrics.counter('publish_total', 'Publicaciones por plataforma y resultado', ['platform', 'status'])
+PUBLISH_SECONDS = metrics.histogram('publish_seconds', 'Duración de cada publicación', ['platform'])
+
 class AutoScheduler:
     def __init__(self):
         # Configuración
@@ -381,12 +387,17 @@ class AutoScheduler:
         if not self.instagram_publisher:
             return False, "Instagram Publisher no disponible"
         
+        start = time.perf_counter()
         try:
-            return self.instagram_publisher.upload_video_to_instagram(video_path, caption)
+            success, message = self.instagram_publisher.upload_video_to_instagram(video_path, caption)
         
         except Exception as e:
             self.logger.error(f"Error publicando en Instagram: {e}")
-            return False, str(e)
+            success, message = False, str(e)
+        
+        PUBLISH_TOTAL.inc(platform='instagram', status='ok' if success else 'error')
+        PUBLISH_SECONDS.observe(time.perf_counter() - start, platform='instagram')
+        return success, message
     
     def manual_publish_next(self) -> Tuple[bool, str]:
         """Publicar manualmente el siguiente video en cola"""
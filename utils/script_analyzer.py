@@ -7,10 +7,11 @@ Genera prompts para imágenes basados en el contenido del guión
 import os
 import re
 import json
-import requests
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
 
+from utils.http_client import http_client
+
 class ScriptAnalyzer:
     def __init__(self):
         # APIs para análisis
@@ -113,7 +114,7 @@ REGLAS:
                 "temperature": 0.7
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -148,7 +149,7 @@ REGLAS:
                 }
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -184,7 +185,7 @@ REGLAS:
                 "return_likelihoods": "NONE"
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de segmentos de video renderizados
+Guarda los clips de movimiento y las transiciones de los videos dinámicos para reutilizarlos entre reels
+"""
+
+import os
+import hashlib
+import threading
+from typing import Dict, List, Tuple
+
+from utils.content_cache import ContentCache
+
+class SegmentCache(ContentCache):
+    def __init__(self, cache_dir: str = 'generated/segment_cache', max_size_mb: int = None,
+                 enabled: bool = None):
+        # SEGMENT_CACHE_ENABLED / SEGMENT_CACHE_MAX_MB
+        super().__init__(cache_dir, 'SEGMENT_CACHE', 'segmentos', max_size_mb, enabled, default_max_mb=1000)
+
+        # Hash de contenido por (ruta, tamaño, mtime) para no releer imágenes en cada reel
+        self.file_hashes: Dict[Tuple[str, int, int], str] = {}
+        self.hash_lock = threading.Lock()
+
+    def file_hash(self, path: str) -> str:
+        """sha256 del contenido de un archivo, memorizado mientras no cambie"""
+        stat = os.stat(path)
+        signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+        with self.hash_lock:
+            cached = self.file_hashes.get(signature)
+        if cached:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        with self.hash_lock:
+            self.file_hashes[signature] = digest.hexdigest()
+
+        return digest.hexdigest()
+
+    def make_key(self, kind: str, source: str, preset: str, frames: List[int], width: int, height: int,
+                 fps: int, encoder: List[str], part: str = '') -> str:
+        """
+        Clave de un segmento: mismo origen, movimiento, duración, resolución y códec -> mismo archivo
+
+        Los argumentos del códec van en la clave porque los segmentos se unen copiando
+        el stream y solo encajan si se codificaron igual.
+        """
+        return super().make_key(
+            kind=kind,
+            source=source,
+            preset=preset,
+            frames=list(frames),
+            width=width,
+            height=height,
+            fps=fps,
+            encoder=list(encoder),
+            part=part
+        )
+
+# Crear instancia global
+segment_cache = SegmentCache()
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Tuple, Dict
 
+from utils.forced_alignment import forced_aligner
+
 class SubtitleGenerator:
     def __init__(self):
         self.subtitles_dir = Path('generated/subtitles')
@@ -19,8 +21,9 @@ class SubtitleGenerator:
         self.seconds_per_subtitle = 2.5  # Duración de cada subtítulo
         self.max_chars_per_line = 40  # Caracteres máximos por línea
     
-    def generate_subtitles_from_script(self, script_text: str, audio_duration: float = None) -> Tuple[bool, str]:
-        """Generar archivo de subtítulos SRT desde un script"""
+    def generate_subtitles_from_script(self, script_text: str, audio_duration: float = None,
+                                       audio_path: str = None, language: str = 'es') -> Tuple[bool, str]:
+        """Generar archivo de subtítulos SRT desde un script (alineado al audio si se indica)"""
         try:
             # Limpiar el texto
             clean_text = self._clean_script_text(script_text)
@@ -29,10 +32,7 @@ class SubtitleGenerator:
             segments = self._split_text_into_segments(clean_text)
             
             # Calcular tiempos
-            if audio_duration:
-                segments_with_timing = self._calculate_timing_from_duration(segments, audio_duration)
-            else:
-                segments_with_timing = self._calculate_default_timing(segments)
+            segments_with_timing = self._calculate_timing(segments, script_text, audio_duration, audio_path, language)
             
             # Generar archivo SRT
             srt_content = self._generate_srt_content(segments_with_timing)
@@ -103,6 +103,19 @@ class SubtitleGenerator:
         
         return [seg for seg in segments if seg.strip()]
     
+    def _calculate_timing(self, segments: List[str], script_text: str, audio_duration: float = None,
+                          audio_path: str = None, language: str = 'es') -> List[Dict]:
+        """Tiempos por alineación forzada con el audio; reparto uniforme si no es posible"""
+        if audio_path:
+            word_timings = forced_aligner.align(audio_path, script_text, language)
+            if word_timings:
+                return forced_aligner.time_segments(segments, word_timings)
+        
+        if audio_duration:
+            return self._calculate_timing_from_duration(segments, audio_duration)
+        
+        return self._calculate_default_timing(segments)
+    
     def _calculate_timing_from_duration(self, segments: List[str], total_duration: float) -> List[Dict]:
         """Calcular tiempos basados en la duración total del audio"""
         segments_with_timing = []
@@ -159,17 +172,15 @@ class SubtitleGenerator:
         
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
     
-    def generate_vtt_subtitles(self, script_text: str, audio_duration: float = None) -> Tuple[bool, str]:
+    def generate_vtt_subtitles(self, script_text: str, audio_duration: float = None,
+                               audio_path: str = None, language: str = 'es') -> Tuple[bool, str]:
         """Generar archivo de subtítulos VTT (WebVTT)"""
         try:
             # Usar la misma lógica que SRT pero con formato VTT
             clean_text = self._clean_script_text(script_text)
             segments = self._split_text_into_segments(clean_text)
             
-            if audio_duration:
-                segments_with_timing = self._calculate_timing_from_duration(segments, audio_duration)
-            else:
-                segments_with_timing = self._calculate_default_timing(segments)
+            segments_with_timing = self._calculate_timing(segments, script_text, audio_duration, audio_path, language)
             
             # Generar contenido VTT
             vtt_content = "WEBVTT\n\n"
@@ -230,11 +241,11 @@ class SubtitleGenerator:
         }
     
     def create_styled_subtitles(self, script_text: str, style: str = 'instagram_style', 
-                              audio_duration: float = None) -> Tuple[bool, str]:
+                              audio_duration: float = None, audio_path: str = None) -> Tuple[bool, str]:
         """Crear subtítulos con estilo específico"""
         try:
             # Generar subtítulos básicos
-            success, srt_path = self.generate_subtitles_from_script(script_text, audio_duration)
+            success, srt_path = self.generate_subtitles_from_script(script_text, audio_duration, audio_path)
             
             if not success:
                 return False, srt_path
@@ -3,12 +3,19 @@
 Sistema completo de notificaciones de Telegram para Instagram Video Dashboard
 """
 
-import requests
 import json
 import os
+import time
 from datetime import datetime
 from typing import Optional, Dict, List
 
+from utils.http_client import http_client
+from utils.metrics import metrics
+
+# Videos enviados al canal: misma serie que las publicaciones de Instagram con platform="telegram"
+PUBLISH_TOTAL = metrics.counter('publish_total', 'Publicaciones por plataforma y resultado', ['platform', 'status'])
+PUBLISH_SECONDS = metrics.histogram('publish_seconds', 'Duración de cada publicación', ['platform'])
+
 class TelegramBot:
     def __init__(self):
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN', '')
@@ -62,7 +69,7 @@ class TelegramBot:
         
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url, timeout=10)
+            response = http_client.get(url, timeout=10)
             
             if response.status_code == 200:
                 bot_info = response.json()
@@ -89,7 +96,7 @@ class TelegramBot:
                 'parse_mode': parse_mode
             }
             
-            response = requests.post(url, data=data, timeout=10)
+            response = http_client.post(url, data=data, timeout=10)
             
             if response.status_code == 200:
                 result = response.json()
@@ -113,7 +120,7 @@ class TelegramBot:
         try:
             url = f"{self.base_url}/send{file_type.capitalize()}"
             with open(file_path, 'rb') as f:
-                response = requests.post(
+                response = http_client.post(
                     url, files={file_type: f}, 
                     data={'chat_id': self.chat_id, 'caption': caption}, timeout=timeout
                 )
@@ -130,7 +137,12 @@ class TelegramBot:
     
     def send_video(self, video_path: str, caption: str = "") -> tuple[bool, str]:
         """Enviar video"""
-        return self._send_file(video_path, 'video', caption, 60)
+        start = time.perf_counter()
+        success, message = self._send_file(video_path, 'video', caption, 60)
+        
+        PUBLISH_TOTAL.inc(platform='telegram', status='ok' if success else 'error')
+        PUBLISH_SECONDS.observe(time.perf_counter() - start, platform='telegram')
+        return success, message
     
     def send_document(self, document_path: str, caption: str = "") -> tuple[bool, str]:
         """Enviar documento"""
@@ -283,7 +295,7 @@ class TelegramBot:
         
         try:
             url = f"{self.base_url}/getMe"
-            response = requests.get(url, timeout=10)
+            response = http_client.get(url, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -301,7 +313,7 @@ class TelegramBot:
         try:
             url = f"{self.base_url}/getChat"
             data = {'chat_id': self.chat_id}
-            response = requests.get(url, data=data, timeout=10)
+            response = http_client.get(url, data=data, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Capas de template precompuestas
+Dibuja una vez con PIL los textos animados de un template en una capa transparente (QTRLE),
+la cachea por template y texto y la compone sobre el video con un único overlay
+"""
+
+import os
+import json
+import math
+import shutil
+import hashlib
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from utils.ffmpeg_runner import ffmpeg_runner
+from utils.segment_cache import segment_cache
+from utils.render_profiles import render_profiles
+
+# Versión del dibujo de capas: cambiarla invalida las capas cacheadas
+LAYER_VERSION = 1
+
+# Franja del lienzo 1080x1920 donde viven los textos del template (y de 1400 a 1600 más animaciones)
+LAYER_TOP = 1300
+LAYER_HEIGHT = 440
+
+# Segundos por tarjeta de texto y duración de la animación de entrada (igual que los drawtext)
+SEGMENT_SECONDS = 2.5
+ENTRANCE_SECONDS = 0.5
+
+# Fuentes a probar en orden; la de drawtext por defecto suele ser DejaVu Sans
+FONT_CANDIDATES = [
+    'DejaVuSans.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    'arial.ttf'
+]
+
+class TemplateLayerRenderer:
+    def __init__(self, width: int = 1080, enabled: bool = None):
+        self.width = width
+
+        if enabled is None:
+            enabled = os.getenv('TEMPLATE_LAYERS_ENABLED', 'true').lower() != 'false'
+        self.enabled = enabled
+
+        self.fonts = {}
+
+    def overlay_filter(self) -> str:
+        """Filtro overlay que coloca la franja de la capa sobre el lienzo"""
+        return f"overlay=0:{LAYER_TOP}:eof_action=pass"
+
+    def get_layer(self, template_name: str, template: Dict, segments: List[str], work_dir: str) -> Optional[str]:
+        """
+        Ruta de la capa de textos del template (renderizada o cacheada)
+
+        Args:
+            template_name: Nombre del template
+            template: Definición del template (colores, fuentes, animaciones)
+            segments: Tarjetas de texto en orden, sin escapar
+            work_dir: Directorio temporal del llamador; la capa queda ahí si la caché está desactivada
+
+        Returns:
+            Ruta del .mov QTRLE con alfa o None si no se pudo renderizar
+        """
+        if not self.enabled or not segments:
+            return None
+
+        fps = render_profiles.fps(30)
+        total_frames = int(round(len(segments) * SEGMENT_SECONDS * fps))
+
+        source = hashlib.sha256(json.dumps(
+            {'template': template, 'segments': segments}, sort_keys=True, ensure_ascii=False
+        ).encode('utf-8')).hexdigest()
+        key = segment_cache.make_key('template_layer', source, template_name, [total_frames],
+                                     self.width, LAYER_HEIGHT, fps, ['qtrle', str(LAYER_VERSION)])
+
+        # Enlazada al work_dir del llamador: la expulsión LRU no puede borrarla a mitad de render
+        layer_path = os.path.join(work_dir, f"layer_{template_name}.mov")
+        cached = segment_cache.checkout(key, layer_path, link=True)
+        if cached:
+            return cached
+
+        frames_dir = tempfile.mkdtemp(prefix='template_layer_', dir=work_dir)
+
+        try:
+            if not self._render_layer(template, segments, fps, total_frames, frames_dir, layer_path):
+                return None
+
+            segment_cache.put(key, layer_path, {'template': template_name, 'part': 'template_layer'})
+            return layer_path
+
+        except ImportError:
+            print("⚠️  PIL no disponible: templates con drawtext")
+            return None
+
+        except Exception as e:
+            print(f"Error renderizando capa de template: {str(e)}")
+            return None
+
+        finally:
+            shutil.rmtree(frames_dir, ignore_errors=True)
+
+    def _render_layer(self, template: Dict, segments: List[str], fps: int, total_frames: int,
+                      work_dir: str, layer_path: str) -> bool:
+        """Dibujar solo los fotogramas distintos y codificarlos con sus duraciones en QTRLE"""
+        # Tramos de fotogramas consecutivos con el mismo estado: (estado, fotogramas)
+        runs: List[Tuple[Tuple, int]] = []
+        for frame in range(total_frames):
+            state = self._frame_state(template, segments, frame / fps)
+            if runs and runs[-1][0] == state:
+                runs[-1] = (state, runs[-1][1] + 1)
+            else:
+                runs.append((state, 1))
+
+        # Cada estado distinto se dibuja una sola vez aunque se repita (rebote, pulso)
+        images = {}
+        list_path = os.path.join(work_dir, 'frames.txt')
+
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for state, frames in runs:
+                if state not in images:
+                    images[state] = os.path.join(work_dir, f"frame_{len(images):04d}.png")
+                    self._draw_state(template, segments, state).save(images[state])
+
+                f.write(f"file '{images[state]}'\n")
+                f.write(f"duration {frames / fps:.6f}\n")
+
+            # El demuxer concat ignora la duración del último archivo si no se repite
+            f.write(f"file '{images[runs[-1][0]]}'\n")
+
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-vf', f"fps={fps},format=argb",
+            '-frames:v', str(total_frames),
+            '-c:v', 'qtrle',
+            layer_path
+        ]
+
+        result = ffmpeg_runner.run(cmd, duration=total_frames / fps)
+        if result.returncode != 0 or not os.path.exists(layer_path):
+            print(f"Error codificando capa de template: {result.stderr}")
+            return False
+
+        print(f"🎨 Capa de template: {len(images)} dibujos para {total_frames} fotogramas")
+        return True
+
+    def _frame_state(self, template: Dict, segments: List[str], t: float) -> Tuple:
+        """
+        Estado visible en el instante t: (tarjeta, alfa, dx, dy, tamaño de fuente)
+
+        Reproduce las expresiones de los drawtext del template, cuantizadas para que
+        los fotogramas iguales se compartan.
+        """
+        index = min(int(t // SEGMENT_SECONDS), len(segments) - 1)
+        start = index * SEGMENT_SECONDS
+        progress = min(1.0, max(0.0, (t - start) / ENTRANCE_SECONDS))
+
+        animations = template['animations']
+        entrance = animations['text_entrance']
+        size = template['fonts']['body']['size']
+
+        alpha, dx, dy = 1.0, 0, 0
+        if entrance == 'fade_in_up':
+            alpha = progress
+            dy = int(round(50 - 50 * progress))
+        elif entrance == 'slide_in_left':
+            dx = int(round(-200 + 200 * progress))
+        elif entrance == 'bounce_in':
+            dy = -int(round(20 * abs(math.sin(t * 10))))
+
+        # Pulso del texto en lugar de reescalar el video entero en cada fotograma
+        if animations['text_emphasis'] == 'pulse':
+            size = int(round(size * (1 + 20 / 1080 * math.sin(t))))
+
+        return index, round(alpha, 2), dx, dy, size
+
+    def _draw_state(self, template: Dict, segments: List[str], state: Tuple):
+        from PIL import Image, ImageDraw
+
+        index, alpha, dx, dy, size = state
+        colors = template['colors']
+        border = 4 if template['animations']['text_entrance'] == 'explode_in' else 3
+
+        image = Image.new('RGBA', (self.width, LAYER_HEIGHT), (0, 0, 0, 0))
+        if alpha <= 0:
+            return image
+
+        draw = ImageDraw.Draw(image)
+        font = self._font(size)
+        text = segments[index]
+
+        # Misma rotación de alturas que los drawtext (1400, 1500, 1600 en el lienzo)
+        y_positions = [1400, 1500, 1600]
+        y = y_positions[index % len(y_positions)] - LAYER_TOP + dy
+
+        bbox = draw.textbbox((0, 0), text, font=font, stroke_width=border)
+        x = (self.width - (bbox[2] - bbox[0])) // 2 + dx
+
+        draw.text((x, y), text, font=font, fill=colors['text'],
+                  stroke_width=border, stroke_fill=colors['primary'])
+
+        if alpha < 1:
+            image.putalpha(image.getchannel('A').point(lambda value: int(value * alpha)))
+
+        return image
+
+    def _font(self, size: int):
+        from PIL import ImageFont
+
+        if size not in self.fonts:
+            font = None
+            for candidate in FONT_CANDIDATES:
+                try:
+                    font = ImageFont.truetype(candidate, size)
+                    break
+                except OSError:
+                    continue
+            self.fonts[size] = font or ImageFont.load_default()
+
+        return self.fonts[size]
+
+# Crear instancia global
+template_layers = TemplateLayerRenderer()
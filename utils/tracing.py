@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Trazas del pipeline: spans anidados de peticiones Flask, trabajos, pasos, proveedores, FFmpeg y escrituras
+Los spans viajan con contextvars (también a los hilos que copian el contexto) y se guardan en SQLite por traza
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Span en curso en esta tarea/hilo
+_current_span = contextvars.ContextVar('trace_span', default=None)
+
+class Tracer:
+    def __init__(self, db_path: str = 'generated/traces.db', max_spans: int = None, enabled: bool = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # TRACING_ENABLED=false desactiva el registro (los spans siguen siendo no-ops baratos)
+        if enabled is None:
+            enabled = os.getenv('TRACING_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+        self.enabled = enabled
+
+        # Spans que se conservan: los más antiguos se borran al superarlo
+        self.max_spans = max_spans or int(os.getenv('TRACE_MAX_SPANS', '20000'))
+
+        # Spans terminados de trazas cuya raíz sigue abierta: se escriben juntos al cerrarla
+        self.pending: Dict[str, List[Dict]] = {}
+        self.lock = threading.Lock()
+        self.writes = 0
+
+        self._init_db()
+
+    @contextmanager
+    def span(self, name: str, kind: str = 'internal', **attributes):
+        """
+        Medir un bloque como span hijo del span actual (o raíz de una traza nueva)
+
+        Devuelve el span: los atributos conocidos al terminar se añaden en span['attributes'].
+        """
+        span, token = self.start_span(name, kind, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, token, e)
+            raise
+        else:
+            self.end_span(span, token)
+
+    def start_span(self, name: str, kind: str = 'internal', **attributes) -> Tuple[Dict, Optional[contextvars.Token]]:
+        """Abrir un span sin bloque with (hooks de Flask); cerrarlo con end_span"""
+        parent = _current_span.get()
+
+        span = {
+            'trace_id': parent['trace_id'] if parent else uuid.uuid4().hex[:16],
+            'span_id': uuid.uuid4().hex[:16],
+            'parent_id': parent['span_id'] if parent else None,
+            'name': name,
+            'kind': kind,
+            'start': time.time(),
+            'duration_ms': None,
+            'status': 'ok',
+            'error': None,
+            'attributes': {key: value for key, value in attributes.items() if value is not None},
+            '_perf_start': time.perf_counter()
+        }
+
+        token = None
+        if self.enabled:
+            token = _current_span.set(span)
+            if parent is None:
+                with self.lock:
+                    self.pending.setdefault(span['trace_id'], [])
+
+        return span, token
+
+    def end_span(self, span: Dict, token: Optional[contextvars.Token] = None, error: BaseException = None):
+        span['duration_ms'] = round((time.perf_counter() - span.pop('_perf_start')) * 1000, 2)
+
+        if error is not None:
+            span['status'] = 'cancelled' if type(error).__name__ in ('CancelledError', 'JobCancelled', 'FFmpegCancelled') else 'error'
+            span['error'] = str(error) or type(error).__name__
+
+        if token is not None:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Cerrado desde otro contexto (p. ej. teardown de Flask): basta con soltarlo
+                _current_span.set(None)
+
+        if self.enabled:
+            self._finish(span)
+
+    def set_attributes(self, **attributes):
+        """Añadir atributos al span actual"""
+        span = _current_span.get()
+        if span:
+            span['attributes'].update({key: value for key, value in attributes.items() if value is not None})
+
+    def current_trace_id(self) -> Optional[str]:
+        span = _current_span.get()
+        return span['trace_id'] if span else None
+
+    def prompt_hash(self, text: Optional[str]) -> Optional[str]:
+        """Huella corta de un prompt para agrupar llamadas sin guardar el texto"""
+        if not text:
+            return None
+        return hashlib.sha256(str(text).encode('utf-8')).hexdigest()[:12]
+
+    def list_traces(self, limit: int = 50) -> List[Dict]:
+        """Trazas más recientes con su span raíz, duración total, número de spans y errores"""
+        connection = self._connect()
+        try:
+            rows = connection.execute("""
+                SELECT root.trace_id, root.name, root.kind, root.start, root.duration_ms, root.status,
+                       root.attributes,
+                       (SELECT COUNT(*) FROM spans s WHERE s.trace_id = root.trace_id),
+                       (SELECT COUNT(*) FROM spans s WHERE s.trace_id = root.trace_id AND s.status = 'error')
+                FROM spans root
+                WHERE root.parent_id IS NULL
+                ORDER BY root.start DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+        finally:
+            connection.close()
+
+        return [
+            {
+                'trace_id': row[0],
+                'name': row[1],
+                'kind': row[2],
+                'start': row[3],
+                'duration_ms': row[4],
+                'status': row[5],
+                'attributes': json.loads(row[6]),
+                'spans': row[7],
+                'errors': row[8]
+            }
+            for row in rows
+        ]
+
+    def get_trace(self, trace_id: str) -> Optional[Dict]:
+        """
+        Spans de una traza ordenados por inicio, con el desfase respecto a la raíz
+
+        'dominant' es el hijo directo de la raíz que más tiempo ocupa.
+        """
+        connection = self._connect()
+        try:
+            rows = connection.execute("""
+                SELECT span_id, parent_id, name, kind, start, duration_ms, status, error, attributes
+                FROM spans WHERE trace_id = ? ORDER BY start
+            """, (trace_id,)).fetchall()
+        finally:
+            connection.close()
+
+        if not rows:
+            return None
+
+        spans = [
+            {
+                'span_id': row[0],
+                'parent_id': row[1],
+                'name': row[2],
+                'kind': row[3],
+                'start': row[4],
+                'duration_ms': row[5],
+                'status': row[6],
+                'error': row[7],
+                'attributes': json.loads(row[8])
+            }
+            for row in rows
+        ]
+
+        root = next((span for span in spans if span['parent_id'] is None), spans[0])
+        for span in spans:
+            span['offset_ms'] = round((span['start'] - root['start']) * 1000, 2)
+
+        children = [span for span in spans if span['parent_id'] == root['span_id']]
+        dominant = max(children, key=lambda span: span['duration_ms'] or 0) if children else None
+
+        return {
+            'trace_id': trace_id,
+            'name': root['name'],
+            'start': root['start'],
+            'duration_ms': root['duration_ms'],
+            'dominant': dominant['name'] if dominant else None,
+            'spans': spans
+        }
+
+    def get_stats(self) -> Dict:
+        connection = self._connect()
+        try:
+            spans, traces = connection.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT trace_id) FROM spans"
+            ).fetchone()
+        finally:
+            connection.close()
+
+        with self.lock:
+            open_traces = len(self.pending)
+
+        return {'enabled': self.enabled, 'spans': spans, 'traces': traces, 'open_traces': open_traces,
+                'max_spans': self.max_spans}
+
+    def _finish(self, span: Dict):
+        """Guardar la traza al cerrar su raíz; los spans que terminan después se escriben sueltos"""
+        with self.lock:
+            if span['parent_id'] is None:
+                batch = self.pending.pop(span['trace_id'], []) + [span]
+            elif span['trace_id'] in self.pending:
+                self.pending[span['trace_id']].append(span)
+                return
+            else:
+                batch = [span]
+
+        self._write(batch)
+
+    def _write(self, spans: List[Dict]):
+        try:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.executemany("""
+                        INSERT OR REPLACE INTO spans
+                        (span_id, trace_id, parent_id, name, kind, start, duration_ms, status, error, attributes)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, [
+                        (span['span_id'], span['trace_id'], span['parent_id'], span['name'], span['kind'],
+                         span['start'], span['duration_ms'], span['status'], span['error'],
+                         json.dumps(span['attributes'], ensure_ascii=False, default=str))
+                        for span in spans
+                    ])
+
+                    # Recortar a los max_spans más recientes de vez en cuando
+                    self.writes += 1
+                    if self.writes % 50 == 0:
+                        connection.execute("""
+                            DELETE FROM spans WHERE start < (
+                                SELECT start FROM spans ORDER BY start DESC LIMIT 1 OFFSET ?
+                            )
+                        """, (self.max_spans,))
+            finally:
+                connection.close()
+
+        except Exception as e:
+            print(f"Error guardando trazas: {str(e)}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_db(self):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS spans (
+                        span_id TEXT PRIMARY KEY,
+                        trace_id TEXT NOT NULL,
+                        parent_id TEXT,
+                        name TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        start REAL NOT NULL,
+                        duration_ms REAL,
+                        status TEXT NOT NULL,
+                        error TEXT,
+                        attributes TEXT NOT NULL
+                    )
+                """)
+                connection.execute("CREATE INDEX IF NOT EXISTS spans_trace ON spans (trace_id, start)")
+                connection.execute("CREATE INDEX IF NOT EXISTS spans_start ON spans (start)")
+        finally:
+            connection.close()
+
+# Crear instancia global
+tracer = Tracer()
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Render de movimiento y transiciones por segmentos para videos dinámicos
+Cada imagen se renderiza una vez como clip con movimiento (zoom/paneo) recortado a su ventana,
+cada transición como un clip corto con xfade; los segmentos se cachean y el reel final
+es solo una concatenación sin recodificar más el audio
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from utils.ffmpeg_runner import ffmpeg_runner
+from utils.segment_cache import segment_cache
+from utils.render_profiles import render_profiles
+
+# Movimientos disponibles: zoom (inicio, fin) y recorrido del encuadre (x, y) de 0 a 1
+MOTION_PRESETS = {
+    'static': None,
+    'zoom_in': {'zoom': (1.0, 1.15), 'x': (0.5, 0.5), 'y': (0.5, 0.5)},
+    'zoom_out': {'zoom': (1.15, 1.0), 'x': (0.5, 0.5), 'y': (0.5, 0.5)},
+    'pan_right': {'zoom': (1.15, 1.15), 'x': (0.0, 1.0), 'y': (0.5, 0.5)},
+    'pan_left': {'zoom': (1.15, 1.15), 'x': (1.0, 0.0), 'y': (0.5, 0.5)},
+    'pan_down': {'zoom': (1.15, 1.15), 'x': (0.5, 0.5), 'y': (0.0, 1.0)},
+    'pan_up': {'zoom': (1.15, 1.15), 'x': (0.5, 0.5), 'y': (1.0, 0.0)}
+}
+
+# Rotación de 'auto': por hash de la imagen, así reordenar el reel no cambia su movimiento
+AUTO_PRESETS = ['zoom_in', 'pan_right', 'zoom_out', 'pan_left', 'pan_down', 'pan_up']
+
+# El zoompan trabaja sobre la imagen ampliada para que el movimiento no tiemble
+MOTION_SUPERSAMPLE = 2
+
+class TransitionRenderer:
+    def __init__(self, width: int = 1080, height: int = 1920, fps: int = 30,
+                 transition_duration: float = 0.5, workers: int = None, enabled: bool = None,
+                 motion_preset: str = None):
+        cpu_count = os.cpu_count() or 1
+
+        self.base_width = width
+        self.base_height = height
+        self.base_fps = fps
+        self.transition_duration = transition_duration
+
+        # Cada segmento es un FFmpeg con una o dos entradas: la memoria no crece con el número de imágenes
+        self.workers = workers or int(os.getenv('TRANSITION_WORKERS', '0')) or max(1, cpu_count // 2)
+        self.threads_per_worker = max(1, cpu_count // self.workers)
+
+        if enabled is None:
+            enabled = os.getenv('TRANSITION_SEGMENTED', 'true').lower() != 'false'
+        self.enabled = enabled
+
+        # auto, static o un preset concreto para todas las imágenes
+        self.motion_preset = motion_preset or os.getenv('MOTION_PRESET', 'auto')
+
+    @property
+    def width(self) -> int:
+        """Ancho del perfil de render actual (el borrador reduce la resolución)"""
+        return render_profiles.size(self.base_width, self.base_height)[0]
+
+    @property
+    def height(self) -> int:
+        return render_profiles.size(self.base_width, self.base_height)[1]
+
+    @property
+    def fps(self) -> int:
+        return render_profiles.fps(self.base_fps)
+
+    def plan_segments(self, images: List[Dict], total_duration: float) -> List[Dict]:
+        """
+        Repartir la línea de tiempo en clips por imagen, en fotogramas exactos
+
+        Cada clip tiene entrada (lead), tramo propio (body) y salida (tail); la salida de
+        una imagen y la entrada de la siguiente se funden en una transición centrada en
+        el final de la imagen, igual que la cadena xfade clásica. Devuelve [] si las
+        ventanas son demasiado cortas para separar tramos.
+        """
+        total_frames = int(round(total_duration * self.fps))
+        transition_frames = max(1, int(round(self.transition_duration * self.fps)))
+        half_before = transition_frames // 2
+
+        if not images or total_frames <= 0:
+            return []
+
+        # Fronteras entre imágenes en fotogramas: fin de cada imagen salvo la última
+        boundaries = [int(round(img['end_time'] * self.fps)) for img in images[:-1]]
+
+        clips = []
+        cursor = 0
+
+        for i, img in enumerate(images):
+            lead = transition_frames if i > 0 else 0
+            tail = transition_frames if i < len(boundaries) else 0
+
+            if tail:
+                body = boundaries[i] - half_before - cursor
+            else:
+                body = total_frames - cursor
+
+            # Ventanas solapadas o más cortas que una transición: no se puede segmentar
+            if body < 1:
+                return []
+
+            clips.append({
+                'image_path': img['image_path'],
+                'preset': self._choose_preset(img),
+                'frames': [lead, body, tail]
+            })
+            cursor += body + tail
+
+        return clips
+
+    def render(self, images: List[Dict], audio_path: str, total_duration: float, output_path: str,
+               video_args: List[str], audio_args: List[str],
+               output_args: Optional[List[str]] = None) -> Tuple[bool, str]:
+        """
+        Renderizar el video dinámico por segmentos y multiplexar el audio
+
+        Los clips y transiciones ya cacheados no se vuelven a renderizar: el mismo
+        conjunto de imágenes con la misma duración se resuelve con concatenar y
+        multiplexar, y reordenarlo solo renderiza las transiciones nuevas.
+
+        Args:
+            images: Imágenes preparadas con image_path, end_time y motion opcional
+            audio_path: Audio del video
+            total_duration: Duración final en segundos
+            output_path: MP4 de salida
+            video_args: Códec y opciones de video, iguales para todos los segmentos
+            audio_args: Códec y opciones de audio del mux final
+            output_args: Opciones extra del mux final ('-movflags', '+faststart', ...)
+
+        Returns:
+            (success, output_path_or_error)
+        """
+        clips = self.plan_segments(images, total_duration)
+        if not clips:
+            return False, "Las ventanas de las imágenes son demasiado cortas para segmentar"
+
+        work_dir = tempfile.mkdtemp(prefix='transitions_')
+
+        try:
+            # Los hilos del pool heredan el contexto del trabajo para progreso y cancelación
+            render_clip = ffmpeg_runner.bind(self._render_clip)
+            render_transition = ffmpeg_runner.bind(self._render_transition)
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # Paso 1: un clip con movimiento por imagen (lead, body y tail)
+                clip_parts = list(executor.map(
+                    lambda item: render_clip(item[0], item[1], video_args, work_dir),
+                    enumerate(clips)
+                ))
+
+                failed = [parts['error'] for parts in clip_parts if parts.get('error')]
+                if failed:
+                    return False, f"Error renderizando clip: {failed[0]}"
+
+                # Paso 2: fundir la salida de cada clip con la entrada del siguiente
+                pairs = list(zip(clip_parts[:-1], clip_parts[1:]))
+                transitions = list(executor.map(
+                    lambda item: render_transition(item[0], item[1][0], item[1][1], video_args, work_dir),
+                    enumerate(pairs)
+                ))
+
+            failed = [error for ok, error in transitions if not ok]
+            if failed:
+                return False, f"Error renderizando transición: {failed[0]}"
+
+            segment_paths = []
+            for i, parts in enumerate(clip_parts):
+                segment_paths.append(parts['body'])
+                if i < len(transitions):
+                    segment_paths.append(transitions[i][1])
+
+            return self._concat(segment_paths, audio_path, total_duration, output_path,
+                                work_dir, audio_args, output_args or [])
+
+        except Exception as e:
+            return False, f"Error en render por segmentos: {str(e)}"
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _choose_preset(self, image: Dict) -> str:
+        preset = image.get('motion') or self.motion_preset
+        if preset in MOTION_PRESETS:
+            return preset
+
+        if preset != 'auto':
+            print(f"⚠️  Movimiento desconocido '{preset}', usando auto")
+
+        digest = segment_cache.file_hash(image['image_path'])
+        return AUTO_PRESETS[int(digest[:8], 16) % len(AUTO_PRESETS)]
+
+    def _render_clip(self, index: int, clip: Dict, video_args: List[str], work_dir: str) -> Dict:
+        """Renderizar (o recuperar de caché) las partes lead/body/tail del clip de una imagen"""
+        lead, body, tail = clip['frames']
+        parts = [name for name, frames in (('lead', lead), ('body', body), ('tail', tail)) if frames]
+
+        source = segment_cache.file_hash(clip['image_path'])
+        keys = {
+            part: segment_cache.make_key('motion', source, clip['preset'], clip['frames'],
+                                         self.width, self.height, self.fps, video_args, part)
+            for part in parts
+        }
+
+        outputs = {part: os.path.join(work_dir, f"clip_{index:03d}_{part}.mp4") for part in parts}
+
+        # Enlazadas al directorio de trabajo bajo el lock de la caché: la expulsión LRU no puede borrarlas a mitad
+        cached = {part: segment_cache.checkout(key, outputs[part], link=True) for part, key in keys.items()}
+        if all(cached.values()):
+            return dict(cached, keys=keys)
+
+        # Falta alguna parte y se renderizan todas: quitar los enlaces para que FFmpeg no escriba dentro de la caché
+        for path in cached.values():
+            if path:
+                os.remove(path)
+
+        total = lead + body + tail
+        seconds = total / self.fps
+
+        # Un solo FFmpeg genera el movimiento completo y lo corta en sus partes
+        offsets = {'lead': (0, lead), 'body': (lead, lead + body), 'tail': (lead + body, total)}
+        filters = [f"{self._motion_filter(clip['preset'], total)},split={len(parts)}" +
+                   ''.join(f"[{part}_in]" for part in parts)]
+        for part in parts:
+            start, end = offsets[part]
+            filters.append(f"[{part}_in]trim=start_frame={start}:end_frame={end},setpts=PTS-STARTPTS[{part}]")
+
+        cmd = ['ffmpeg', '-y', '-v', 'error']
+        if clip['preset'] == 'static':
+            cmd.extend(['-loop', '1', '-framerate', str(self.fps), '-t', f"{seconds:.3f}"])
+        cmd.extend(['-i', clip['image_path'], '-filter_complex', ';'.join(filters)])
+
+        for part in parts:
+            start, end = offsets[part]
+            cmd.extend(['-map', f"[{part}]", '-frames:v', str(end - start)])
+            cmd.extend(video_args)
+            cmd.extend(['-threads', str(self.threads_per_worker), '-an', outputs[part]])
+
+        result = ffmpeg_runner.run(cmd, duration=seconds)
+        if result.returncode != 0 or not all(os.path.exists(path) for path in outputs.values()):
+            return {'error': result.stderr}
+
+        for part, path in outputs.items():
+            segment_cache.put(keys[part], path, {'image': os.path.basename(clip['image_path']),
+                                                 'preset': clip['preset'], 'part': part})
+
+        return dict(outputs, keys=keys)
+
+    def _render_transition(self, index: int, previous: Dict, following: Dict, video_args: List[str],
+                           work_dir: str) -> Tuple[bool, str]:
+        """Fundir la salida de un clip con la entrada del siguiente (cacheado por la pareja)"""
+        key = segment_cache.make_key('xfade', f"{previous['keys']['tail']}:{following['keys']['lead']}",
+                                     'fade', [], self.width, self.height, self.fps, video_args)
+        output_path = os.path.join(work_dir, f"transition_{index:03d}.mp4")
+
+        cached = segment_cache.checkout(key, output_path, link=True)
+        if cached:
+            return True, cached
+
+        frames = int(round(self.transition_duration * self.fps))
+        seconds = frames / self.fps
+
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-i', previous['tail'], '-i', following['lead'],
+            '-filter_complex', f"[0:v][1:v]xfade=transition=fade:duration={seconds:.3f}:offset=0,format=yuv420p[v]",
+            '-map', '[v]', '-frames:v', str(frames)
+        ]
+        cmd.extend(video_args)
+        cmd.extend(['-threads', str(self.threads_per_worker), '-an', output_path])
+
+        result = ffmpeg_runner.run(cmd, duration=seconds)
+        if result.returncode == 0 and os.path.exists(output_path):
+            segment_cache.put(key, output_path, {'part': 'xfade'})
+            return True, output_path
+
+        return False, result.stderr
+
+    def _motion_filter(self, preset: str, frames: int) -> str:
+        """Cadena de filtros que convierte la imagen en un clip vertical con el movimiento pedido"""
+        motion = MOTION_PRESETS[preset]
+        fit = (
+            "scale={w}:{h}:force_original_aspect_ratio=decrease,"
+            "pad={w}:{h}:(ow-iw)/2:(oh-ih)/2:black"
+        )
+
+        if motion is None:
+            return (
+                f"[0:v]{fit.format(w=self.width, h=self.height)},"
+                f"scale=in_range=full:out_range=tv,format=yuv420p,setsar=1"
+            )
+
+        # Progreso 0..1 a lo largo del clip; zoompan emite 'frames' fotogramas de la única imagen
+        span = max(frames - 1, 1)
+        progress = f"(on/{span})"
+
+        def interpolate(values):
+            start, end = values
+            return f"({start}+({end}-{start})*{progress})"
+
+        zoom = interpolate(motion['zoom'])
+        x = f"(iw-iw/zoom)*{interpolate(motion['x'])}"
+        y = f"(ih-ih/zoom)*{interpolate(motion['y'])}"
+
+        return (
+            f"[0:v]{fit.format(w=self.width * MOTION_SUPERSAMPLE, h=self.height * MOTION_SUPERSAMPLE)},"
+            f"zoompan=z='{zoom}':x='{x}':y='{y}':d={frames}:s={self.width}x{self.height}:fps={self.fps},"
+            f"scale=in_range=full:out_range=tv,format=yuv420p,setsar=1"
+        )
+
+    def _concat(self, segment_paths: List[str], audio_path: str, total_duration: float, output_path: str,
+                work_dir: str, audio_args: List[str], output_args: List[str]) -> Tuple[bool, str]:
+        """Unir los segmentos copiando el video y codificar el audio una sola vez"""
+        list_path = os.path.join(work_dir, 'segments.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in segment_paths:
+                escaped = path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-i', audio_path,
+            '-map', '0:v:0', '-map', '1:a:0',
+            '-c:v', 'copy'
+        ]
+        cmd.extend(audio_args)
+        cmd.extend(output_args)
+        cmd.extend(['-t', f"{total_duration:.3f}", output_path])
+
+        result = ffmpeg_runner.run(cmd, duration=total_duration)
+        if result.returncode == 0 and os.path.exists(output_path):
+            return True, output_path
+
+        return False, f"Error uniendo segmentos: {result.stderr}"
+
+# Crear instancia global
+transition_renderer = TransitionRenderer()
@@ -4,13 +4,17 @@ Sistema de Text-to-Speech LOCAL usando Google TTS
 Completamente GRATUITO sin tarjeta de crédito
 """
 
+import io
 import os
-import requests
+import shutil
 import tempfile
 from pathlib import Path
 import subprocess
 import platform
 
+from utils.audio_cache import audio_cache
+from utils.tracing import tracer
+
 class LocalTTS:
     def __init__(self):
         # Usar carpeta del proyecto para audios generados
@@ -99,66 +103,114 @@ class LocalTTS:
         return engines
     
     def text_to_speech_gtts(self, text: str, language: str = 'es', output_path: str = None, speed: str = 'normal') -> tuple[bool, str]:
-        """Convertir texto a voz usando Google TTS (gratuito)"""
+        """Convertir texto a voz usando Google TTS (gratuito), reutilizando audio en caché"""
         if not self.gtts_available:
             return False, "gTTS no está instalado. Instala con: pip install gtts"
         
         try:
-            from gtts import gTTS
             from datetime import datetime
             import subprocess
             
             # Limpiar texto de emojis y caracteres especiales
             clean_text = self._clean_text_for_tts(text)
             
-            # Configurar velocidad (gTTS no tiene velocidad nativa, pero podemos usar slow=False siempre)
-            slow_speech = False  # Siempre rápido para mejor fluidez
-            
-            # Crear objeto gTTS
-            tts = gTTS(text=clean_text, lang=language, slow=slow_speech)
-            
             # Generar nombre de archivo si no se proporciona
             if not output_path:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 filename = f"audio_{language}_{speed}_{timestamp}.mp3"
                 output_path = str(self.audio_dir / filename)
             
-            # Guardar archivo de audio temporal
-            temp_output = output_path.replace('.mp3', '_temp.mp3')
-            tts.save(temp_output)
-            
-            # Ajustar velocidad usando FFmpeg si está disponible
-            if speed != 'normal' and self._check_ffmpeg():
-                speed_factor = {
-                    'slow': '0.8',
-                    'normal': '1.0', 
-                    'fast': '1.3',
-                    'very_fast': '1.5'
-                }.get(speed, '1.0')
+            with tracer.span('tts gtts', kind='provider', provider='gtts', language=language, speed=speed,
+                             prompt_hash=tracer.prompt_hash(clean_text)) as span:
+                # Locución completa ya generada con el mismo texto, idioma y velocidad
+                full_key = audio_cache.make_key(clean_text, language, 'gtts', speed)
+                cached_path = audio_cache.get(full_key)
                 
-                cmd = [
-                    'ffmpeg', '-i', temp_output, 
-                    '-filter:a', f'atempo={speed_factor}',
-                    '-y', output_path
-                ]
+                if cached_path:
+                    shutil.copyfile(cached_path, output_path)
+                    span['attributes'].update(cached=True, bytes=os.path.getsize(output_path))
+                    return True, output_path
                 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+                adjust_speed = speed != 'normal' and self._check_ffmpeg()
                 
-                if result.returncode == 0:
-                    # Eliminar archivo temporal
-                    os.remove(temp_output)
-                else:
-                    # Si falla FFmpeg, usar el archivo original
-                    os.rename(temp_output, output_path)
-            else:
-                # Sin FFmpeg, usar archivo original
-                os.rename(temp_output, output_path)
-            
+                # Guardar archivo de audio temporal solo si hay que ajustar la velocidad
+                temp_output = output_path.replace('.mp3', '_temp.mp3') if adjust_speed else output_path
+                self._synthesize_gtts(clean_text, language, temp_output)
+                
+                # Ajustar velocidad usando FFmpeg si está disponible
+                if adjust_speed:
+                    speed_factor = {
+                        'slow': '0.8',
+                        'normal': '1.0', 
+                        'fast': '1.3',
+                        'very_fast': '1.5'
+                    }.get(speed, '1.0')
+                    
+                    cmd = [
+                        'ffmpeg', '-i', temp_output, 
+                        '-filter:a', f'atempo={speed_factor}',
+                        '-y', output_path
+                    ]
+                    
+                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+                    
+                    if result.returncode == 0:
+                        # Eliminar archivo temporal
+                        os.remove(temp_output)
+                    else:
+                        # Si falla FFmpeg, usar el archivo original
+                        os.replace(temp_output, output_path)
+                
+                audio_cache.put(full_key, output_path, {'language': language, 'speed': speed, 'engine': 'gtts'})
+                span['attributes'].update(cached=False, bytes=os.path.getsize(output_path))
+
             return True, output_path
         
         except Exception as e:
             return False, f"Error con Google TTS: {str(e)}"
     
+    def _synthesize_gtts(self, clean_text: str, language: str, output_path: str):
+        """
+        Sintetizar con gTTS frase por frase, reutilizando las frases ya cacheadas
+        
+        gTTS ya divide el texto en fragmentos y concatena los MP3 resultantes,
+        así que ensamblar frases cacheadas produce el mismo tipo de archivo.
+        """
+        from gtts import gTTS
+        
+        # Velocidad nativa siempre normal (slow=False) para mejor fluidez
+        if not audio_cache.enabled:
+            gTTS(text=clean_text, lang=language, slow=False).save(output_path)
+            return
+        
+        audio_parts = []
+        
+        for sentence in self._split_sentences(clean_text):
+            sentence_key = audio_cache.make_key(sentence, language, 'gtts', 'sentence')
+            cached_path = audio_cache.get(sentence_key)
+            
+            if cached_path:
+                with open(cached_path, 'rb') as f:
+                    audio_parts.append(f.read())
+                continue
+            
+            buffer = io.BytesIO()
+            gTTS(text=sentence, lang=language, slow=False).write_to_fp(buffer)
+            audio_parts.append(buffer.getvalue())
+            
+            audio_cache.put_bytes(sentence_key, buffer.getvalue(), '.mp3', {'language': language, 'engine': 'gtts'})
+        
+        with open(output_path, 'wb') as f:
+            for part in audio_parts:
+                f.write(part)
+    
+    def _split_sentences(self, clean_text: str) -> list:
+        """Dividir el texto en frases para la caché de audio"""
+        import re
+        
+        sentences = re.split(r'(?<=[.!?…])\s+', clean_text)
+        return [sentence.strip() for sentence in sentences if sentence.strip()]
+    
     def _clean_text_for_tts(self, text: str) -> str:
         """Limpiar texto para TTS removiendo emojis y caracteres problemáticos"""
         import re
@@ -280,8 +332,6 @@ class LocalTTS:
             # Descomenta y configura cuando tengas la API key
             
             """
-            import requests
-            
             elevenlabs_api_key = os.getenv('ELEVENLABS_API_KEY')
             
             # Limpiar texto
@@ -307,7 +357,7 @@ class LocalTTS:
                 }
             }
             
-            response = requests.post(url, json=data, headers=headers, timeout=60)
+            response = http_client.post(url, json=data, headers=headers, timeout=60)
             
             if response.status_code == 200:
                 # Generar nombre de archivo si no se proporciona
@@ -499,4 +549,4 @@ class LocalTTS:
             }
         }
 # Crear instancia global
-local_tts = LocalTTS()
\ No newline at end of file
+local_tts = LocalTTS()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Compositor de video en una sola pasada para Instagram Video Dashboard
+Combina imagen, audio, subtítulos, marca de agua y template en un único render de FFmpeg
+"""
+
+import os
+import time
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Tuple, Optional
+
+from utils.video_processor import VideoProcessor
+from utils.video_templates import VideoTemplates
+from utils.ass_subtitles import karaoke_subtitles
+from utils.forced_alignment import forced_aligner
+from utils.ffmpeg_runner import ffmpeg_runner
+from utils.render_profiles import render_profiles
+
+class VideoComposer:
+    def __init__(self, video_processor: Optional[VideoProcessor] = None,
+                 video_templates: Optional[VideoTemplates] = None):
+        self.video_processor = video_processor or VideoProcessor()
+        self.video_templates = video_templates or VideoTemplates()
+
+        self.output_dir = Path('videos/processed')
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        # Configuración de video
+        self.video_config = {
+            'width': 1080,
+            'height': 1920,
+            'fps': 30
+        }
+
+    def compose_video(self,
+                      image_path: str,
+                      audio_path: str,
+                      script_text: str = "",
+                      output_path: str = None,
+                      subtitle_style: str = 'animated',
+                      add_watermark: bool = True,
+                      watermark_text: str = "@yourusername",
+                      watermark_position: str = "bottom-right",
+                      template_name: str = None,
+                      language: str = 'es',
+                      draft: bool = False) -> Tuple[bool, str, Dict]:
+        """
+        Renderizar el video final en una sola invocación de FFmpeg
+
+        Args:
+            image_path: Imagen de fondo
+            audio_path: Audio de la narración
+            script_text: Texto del guión para subtítulos y template
+            output_path: Ruta del MP4 final
+            subtitle_style: 'animated', 'none' o cualquier otro para SRT simple
+            add_watermark: Si se agrega la marca de agua
+            watermark_text: Texto de la marca de agua
+            watermark_position: Posición de la marca de agua
+            template_name: Template de VideoTemplates o None
+            language: Idioma de la locución, para alinear los subtítulos con ella
+            draft: Borrador rápido a baja resolución en videos/drafts, promovible a final
+
+        Returns:
+            (success, video_path_or_error, timings)
+        """
+        if draft:
+            return render_profiles.render_draft('compose', self.compose_video, {
+                'image_path': image_path,
+                'audio_path': audio_path,
+                'script_text': script_text,
+                'output_path': output_path,
+                'subtitle_style': subtitle_style,
+                'add_watermark': add_watermark,
+                'watermark_text': watermark_text,
+                'watermark_position': watermark_position,
+                'template_name': template_name,
+                'language': language
+            })
+
+        timings = {}
+        total_start = time.perf_counter()
+
+        # Paso 1: Validar entradas
+        stage_start = time.perf_counter()
+
+        if not os.path.exists(image_path) or not os.path.exists(audio_path):
+            return False, "Archivos no encontrados", timings
+
+        if not self.video_processor._is_valid_image(image_path):
+            image_path = self.video_processor._create_emergency_image()
+            if not image_path:
+                return False, "No se pudo crear imagen de respaldo", timings
+
+        if not self.video_processor._is_valid_audio(audio_path):
+            return False, "El archivo de audio no es válido", timings
+
+        if not output_path:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            output_path = str(self.output_dir / f"ai_video_{timestamp}.mp4")
+
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        timings['validate'] = round(time.perf_counter() - stage_start, 3)
+
+        # Sin FFmpeg no hay grafo que componer: usar el método de respaldo
+        if not self.video_processor.ffmpeg_available:
+            stage_start = time.perf_counter()
+            success, result = self.video_processor.create_video_from_image_and_audio(
+                image_path, audio_path, output_path=output_path
+            )
+            timings['render'] = round(time.perf_counter() - stage_start, 3)
+            timings['total'] = round(time.perf_counter() - total_start, 3)
+            return success, result, timings
+
+        # Paso 2: Duración del audio (un único ffprobe para todo el render)
+        stage_start = time.perf_counter()
+        duration = self.video_processor._get_video_duration(audio_path) or 30
+        timings['probe'] = round(time.perf_counter() - stage_start, 3)
+
+        # Paso 3: Construir el grafo de filtros combinado
+        stage_start = time.perf_counter()
+        subtitle_path = None
+
+        # Tiempos por palabra de la locución (se reutilizan desde el .timing.json junto al audio)
+        word_timings = None
+        if script_text and subtitle_style != 'none':
+            word_timings = forced_aligner.align(audio_path, script_text, language)
+
+        # 'animated' usa un ASS karaoke; cualquier otro estilo distinto de 'none', SRT simple
+        if script_text and subtitle_style == 'animated':
+            subtitle_path = output_path.replace('.mp4', '.ass')
+            karaoke_subtitles.write_ass_file(script_text, duration, subtitle_path, word_timings)
+        elif script_text and subtitle_style != 'none':
+            subtitle_path = output_path.replace('.mp4', '.srt')
+            self.video_processor._write_srt_file(script_text, duration, subtitle_path, word_timings)
+
+        # Textos del template como capa precompuesta (un overlay en lugar de un drawtext por tarjeta)
+        layer_dir = None
+        layers = None
+        if script_text and template_name and template_name != 'none':
+            layer_dir = tempfile.mkdtemp(prefix='template_')
+            layers = self.video_templates.build_template_layers(script_text, template_name, layer_dir)
+
+        filter_complex = self._build_filter_graph(
+            script_text, subtitle_path, subtitle_style,
+            add_watermark, watermark_text, watermark_position, template_name, layers
+        )
+        timings['build_graph'] = round(time.perf_counter() - stage_start, 3)
+
+        # Paso 4: Render único
+        stage_start = time.perf_counter()
+        cmd = self._build_render_command(image_path, audio_path, filter_complex, duration, output_path,
+                                         layers['layer'] if layers else None)
+
+        try:
+            print("🎬 Renderizando video en una sola pasada...")
+            result = ffmpeg_runner.run(cmd, duration=duration)
+        finally:
+            if subtitle_path and os.path.exists(subtitle_path):
+                os.remove(subtitle_path)
+            if layer_dir:
+                shutil.rmtree(layer_dir, ignore_errors=True)
+
+        timings['render'] = round(time.perf_counter() - stage_start, 3)
+        timings['total'] = round(time.perf_counter() - total_start, 3)
+
+        if result.returncode == 0 and os.path.exists(output_path):
+            print(f"✅ Video compuesto en {timings['total']}s")
+            return True, output_path, timings
+
+        print(f"❌ Error en FFmpeg: {result.stderr}")
+        return False, f"Error FFmpeg: {result.stderr}", timings
+
+    def _build_filter_graph(self, script_text: str, subtitle_path: Optional[str], subtitle_style: str,
+                            add_watermark: bool, watermark_text: str,
+                            watermark_position: str, template_name: Optional[str],
+                            template_layers: Optional[Dict] = None) -> str:
+        """Encadenar escalado, subtítulos, marca de agua y template en un solo grafo"""
+        width, height = self.video_config['width'], self.video_config['height']
+
+        # Base: ajustar imagen al formato vertical con rango de color TV
+        filters: List[str] = self.video_processor._build_scale_pad_filters(width, height)
+        filters.append("scale=in_range=full:out_range=tv,format=yuv420p")
+
+        # Subtítulos: un único nodo 'ass' o 'subtitles', sin importar el número de palabras
+        if subtitle_path and subtitle_style == 'animated':
+            filters.append(karaoke_subtitles.build_filter(subtitle_path))
+        elif subtitle_path:
+            filters.append(self.video_processor._build_simple_subtitle_filter(subtitle_path))
+
+        # Marca de agua
+        if add_watermark and watermark_text:
+            filters.append(self.video_processor._build_watermark_filter(watermark_text, watermark_position))
+
+        # Template: capa precompuesta (entrada 2) o, si no hay capa, drawtext en la misma cadena
+        output_filters: List[str] = []
+        if template_layers:
+            filters.extend(template_layers['before'])
+            output_filters.extend(template_layers['after'])
+        elif template_name and template_name != 'none':
+            filters.extend(self.video_templates.build_template_filters(script_text, template_name))
+
+        # Borrador: el grafo se dibuja sobre el lienzo final y solo se reduce el resultado
+        downscale = render_profiles.downscale_filter()
+        if downscale:
+            output_filters.append(downscale)
+
+        # Garantizar formato compatible a la salida
+        output_filters.append("format=yuv420p")
+
+        if template_layers:
+            return (
+                f"[0:v]{','.join(filters)}[base];"
+                f"[base][2:v]{template_layers['overlay']},{','.join(output_filters)}[final]"
+            )
+
+        return f"[0:v]{','.join(filters + output_filters)}[final]"
+
+    def _build_render_command(self, image_path: str, audio_path: str, filter_complex: str,
+                              duration: float, output_path: str, layer_path: Optional[str] = None) -> List[str]:
+        """Comando FFmpeg con la codificación ULTRA COMPATIBLE del resto del proyecto"""
+        return [
+            'ffmpeg', '-y',
+            '-loop', '1', '-i', image_path,
+            '-i', audio_path,
+            *(['-i', layer_path] if layer_path else []),
+
+            '-filter_complex', filter_complex,
+            '-map', '[final]',
+            '-map', '1:a',
+
+            # Configuración de video ULTRA COMPATIBLE
+            '-c:v', 'libx264',
+            '-preset', render_profiles.preset('fast'),
+            '-pix_fmt', 'yuv420p',
+            '-profile:v', 'baseline',
+            '-level', '3.0',
+            '-movflags', '+faststart',
+            '-colorspace', 'bt709',
+            '-color_primaries', 'bt709',
+            '-color_trc', 'bt709',
+            '-color_range', 'tv',
+
+            # Configuración de audio ULTRA COMPATIBLE (más ligera en borrador)
+            *render_profiles.audio_args([
+                '-c:a', 'aac',
+                '-b:a', '128k',
+                '-ar', '44100',
+                '-ac', '2',
+                '-aac_coder', 'twoloop'
+            ]),
+
+            # Configuración de video y timing
+            '-r', str(render_profiles.fps(self.video_config['fps'])),
+            '-t', str(duration),
+            '-shortest',
+            '-avoid_negative_ts', 'make_zero',
+            '-fflags', '+genpts',
+            '-max_muxing_queue_size', '1024',
+
+            output_path
+        ]
+
+# Crear instancia global
+video_composer = VideoComposer()
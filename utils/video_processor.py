@@ -5,13 +5,22 @@ Incluye redimensionado, marca de agua, optimización y conversión
 """
 
 import os
+import re
+import math
 import subprocess
-import json
 from pathlib import Path
 from datetime import datetime
 import tempfile
 import shutil
 
+from utils.media_metadata import media_metadata
+from utils.ass_subtitles import karaoke_subtitles
+from utils.forced_alignment import forced_aligner
+from utils.parallel_encoder import parallel_encoder
+from utils.ffmpeg_runner import ffmpeg_runner
+from utils.batch_engine import batch_engine
+from utils.render_profiles import render_profiles
+
 class VideoProcessor:
     def __init__(self):
         self.temp_dir = tempfile.mkdtemp()
@@ -35,6 +44,10 @@ class VideoProcessor:
         
         # Verificar si FFmpeg está disponible
         self.ffmpeg_available = self._check_ffmpeg()
+        
+        # Ruta rápida para imagen fija: codificar un segmento corto y repetirlo sin recodificar
+        self.still_fast_path = os.getenv('STILL_FAST_PATH', 'true').lower() != 'false'
+        self.still_segment_seconds = float(os.getenv('STILL_SEGMENT_SECONDS', '2'))
     
     def _check_ffmpeg(self):
         """Verificar si FFmpeg está instalado"""
@@ -52,16 +65,11 @@ class VideoProcessor:
         
         try:
             if self.ffmpeg_available:
-                # Usar FFprobe para obtener información detallada
-                cmd = [
-                    'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                    '-show_format', '-show_streams', video_path
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+                # Usar FFprobe (vía índice de metadatos) para obtener información detallada
+                data = media_metadata.probe(video_path)
                 
-                if result.returncode == 0:
-                    data = json.loads(result.stdout)
-                    video_stream = next((s for s in data['streams'] if s['codec_type'] == 'video'), None)
+                if data:
+                    video_stream = media_metadata.get_stream(data, 'video')
                     
                     if video_stream:
                         return {
@@ -130,24 +138,11 @@ class VideoProcessor:
         # Redimensionar si es necesario
         if resize and aspect_ratio in self.instagram_formats:
             dimensions = self.instagram_formats[aspect_ratio]
-            width, height = dimensions['width'], dimensions['height']
-            filters.append(f"scale={width}:{height}:force_original_aspect_ratio=decrease")
-            filters.append(f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black")
+            filters.extend(self._build_scale_pad_filters(dimensions['width'], dimensions['height']))
         
         # Agregar marca de agua
         if add_watermark and watermark_text:
-            # Posiciones de marca de agua
-            positions = {
-                'top-left': 'x=10:y=10',
-                'top-right': 'x=w-tw-10:y=10',
-                'bottom-left': 'x=10:y=h-th-10',
-                'bottom-right': 'x=w-tw-10:y=h-th-10',
-                'center': 'x=(w-tw)/2:y=(h-th)/2'
-            }
-            
-            pos = positions.get(watermark_position, positions['bottom-right'])
-            watermark_filter = f"drawtext=text='{watermark_text}':fontsize=24:fontcolor=white:bordercolor=black:borderw=2:{pos}"
-            filters.append(watermark_filter)
+            filters.append(self._build_watermark_filter(watermark_text, watermark_position))
         
         # Aplicar filtros
         if filters:
@@ -155,6 +150,20 @@ class VideoProcessor:
         
         # Configuración de calidad
         quality_config = self.quality_settings.get(quality, self.quality_settings['Medium'])
+        
+        # Videos largos: cortar en fotogramas clave y codificar los segmentos en paralelo
+        if parallel_encoder.should_split(input_path):
+            success, result = parallel_encoder.encode(
+                input_path, output_path,
+                video_args=['-c:v', 'libx264', '-crf', str(quality_config['crf']), '-preset', quality_config['preset']],
+                audio_args=['-c:a', 'aac', '-b:a', '128k'],
+                video_filter=','.join(filters) if filters else None
+            )
+            
+            if success:
+                return output_path
+            print(f"Codificación paralela falló, usando un solo proceso: {result}")
+        
         cmd.extend(['-crf', str(quality_config['crf'])])
         cmd.extend(['-preset', quality_config['preset']])
         
@@ -164,8 +173,8 @@ class VideoProcessor:
         # Archivo de salida
         cmd.append(output_path)
         
-        # Ejecutar comando
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        # Ejecutar comando (con progreso y límite de hilos si corre dentro de un lote)
+        result = ffmpeg_runner.run(cmd, duration=media_metadata.get_duration(input_path))
         
         if result.returncode == 0 and os.path.exists(output_path):
             return output_path
@@ -173,8 +182,37 @@ class VideoProcessor:
             print(f"FFmpeg error: {result.stderr}")
             return None
     
-    def create_video_from_image_and_audio(self, image_path, audio_path, output_path=None, duration=None):
-        """Crear video a partir de imagen y audio"""
+    def _build_scale_pad_filters(self, width, height):
+        """Filtros para ajustar el video al lienzo sin deformarlo"""
+        return [
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black"
+        ]
+    
+    def _build_watermark_filter(self, watermark_text, watermark_position="bottom-right"):
+        """Filtro drawtext para la marca de agua"""
+        # Posiciones de marca de agua
+        positions = {
+            'top-left': 'x=10:y=10',
+            'top-right': 'x=w-tw-10:y=10',
+            'bottom-left': 'x=10:y=h-th-10',
+            'bottom-right': 'x=w-tw-10:y=h-th-10',
+            'center': 'x=(w-tw)/2:y=(h-th)/2'
+        }
+        
+        pos = positions.get(watermark_position, positions['bottom-right'])
+        return f"drawtext=text='{watermark_text}':fontsize=24:fontcolor=white:bordercolor=black:borderw=2:{pos}"
+    
+    def create_video_from_image_and_audio(self, image_path, audio_path, output_path=None, duration=None, draft=False):
+        """Crear video a partir de imagen y audio (draft=True: borrador rápido en videos/drafts)"""
+        
+        if draft:
+            return render_profiles.render_draft('image_audio', self.create_video_from_image_and_audio, {
+                'image_path': image_path,
+                'audio_path': audio_path,
+                'output_path': output_path,
+                'duration': duration
+            })
         
         if not os.path.exists(image_path) or not os.path.exists(audio_path):
             return False, "Archivos no encontrados"
@@ -335,7 +373,7 @@ class VideoProcessor:
                 '-frames:v', '1', '-y', emergency_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            result = ffmpeg_runner.run(cmd, timeout=30)
             
             if result.returncode == 0 and os.path.exists(emergency_path):
                 return emergency_path
@@ -347,17 +385,25 @@ class VideoProcessor:
             return None
     
     def _create_video_with_ffmpeg(self, image_path, audio_path, output_path, duration=None):
-        """Crear video usando FFmpeg"""
+        """Crear video usando FFmpeg (ruta rápida de imagen fija si está activada)"""
+        # Obtener duración del audio si no se especifica
+        if not duration:
+            duration = media_metadata.get_duration(audio_path) or 30  # Duración por defecto
+        
+        if self.still_fast_path:
+            success, result = self._create_still_video_fast(image_path, audio_path, output_path, duration)
+            if success:
+                return success, result
+            print(f"⚠️ Ruta rápida de imagen fija falló, codificando completo: {result[-300:]}")
+        
+        return self._create_video_full_encode(image_path, audio_path, output_path, duration)
+    
+    def _create_video_full_encode(self, image_path, audio_path, output_path, duration):
+        """Codificar todos los fotogramas de la imagen en bucle durante la duración del audio"""
         try:
-            # Obtener duración del audio si no se especifica
-            if not duration:
-                cmd_duration = ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
-                              '-of', 'csv=p=0', audio_path]
-                result = subprocess.run(cmd_duration, capture_output=True, text=True, timeout=30)
-                if result.returncode == 0:
-                    duration = float(result.stdout.strip())
-                else:
-                    duration = 30  # Duración por defecto
+            # Resolución, fps y preset del perfil actual (final o borrador)
+            width, height = render_profiles.size(1080, 1920)
+            fps = render_profiles.fps(30)
             
             # Comando para crear video optimizado para Instagram con codificación ULTRA COMPATIBLE
             cmd = [
@@ -366,11 +412,11 @@ class VideoProcessor:
                 '-i', audio_path,
                 
                 # Filtros de video mejorados para máxima compatibilidad
-                '-vf', 'scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2:black,scale=in_range=full:out_range=tv,format=yuv420p',
+                '-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,scale=in_range=full:out_range=tv,format=yuv420p',
                 
                 # Configuración de video ULTRA COMPATIBLE
                 '-c:v', 'libx264',
-                '-preset', 'fast',
+                '-preset', render_profiles.preset('fast'),
                 '-tune', 'stillimage',  # Optimización para imágenes estáticas
                 '-pix_fmt', 'yuv420p',  # CRÍTICO: Formato compatible
                 '-profile:v', 'baseline',  # Perfil más compatible
@@ -381,15 +427,17 @@ class VideoProcessor:
                 '-color_trc', 'bt709',
                 '-color_range', 'tv',  # Rango de color TV (limitado)
                 
-                # Configuración de audio ULTRA COMPATIBLE
-                '-c:a', 'aac',
-                '-b:a', '128k',  # Bitrate fijo
-                '-ar', '44100',  # Sample rate estándar
-                '-ac', '2',  # Estéreo forzado
-                '-aac_coder', 'twoloop',  # Codificador AAC más compatible
+                # Configuración de audio ULTRA COMPATIBLE (más ligera en borrador)
+                *render_profiles.audio_args([
+                    '-c:a', 'aac',
+                    '-b:a', '128k',  # Bitrate fijo
+                    '-ar', '44100',  # Sample rate estándar
+                    '-ac', '2',  # Estéreo forzado
+                    '-aac_coder', 'twoloop'  # Codificador AAC más compatible
+                ]),
                 
                 # Configuración de video y timing
-                '-r', '30',
+                '-r', str(fps),
                 '-t', str(duration),
                 
                 # Optimizaciones adicionales
@@ -401,7 +449,7 @@ class VideoProcessor:
                 output_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = ffmpeg_runner.run(cmd)
             
             if result.returncode == 0 and os.path.exists(output_path):
                 return True, output_path
@@ -411,6 +459,102 @@ class VideoProcessor:
         except Exception as e:
             return False, f"Error con FFmpeg: {str(e)}"
     
+    def _create_still_video_fast(self, image_path, audio_path, output_path, duration):
+        """
+        Video de imagen fija sin codificar miles de fotogramas idénticos
+        
+        Se codifica una sola vez un segmento corto (un GOP que empieza en IDR) con la
+        configuración ULTRA COMPATIBLE, se repite con el demuxer concat copiando el
+        stream y se multiplexa el audio AAC recortando a la duración exacta.
+        """
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        
+        try:
+            width, height = render_profiles.size(1080, 1920)
+            fps = render_profiles.fps(30)
+            segment_seconds = min(self.still_segment_seconds, duration)
+            segment_frames = max(1, int(round(segment_seconds * fps)))
+            segment_path = os.path.join(work_dir, 'segment.mp4')
+            
+            # Paso 1: un único GOP con la imagen (sin audio)
+            cmd = [
+                'ffmpeg', '-y',
+                '-loop', '1', '-framerate', str(fps), '-i', image_path,
+                '-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,scale=in_range=full:out_range=tv,format=yuv420p',
+                '-frames:v', str(segment_frames),
+                
+                '-c:v', 'libx264',
+                '-preset', render_profiles.preset('fast'),
+                '-tune', 'stillimage',
+                '-pix_fmt', 'yuv420p',
+                '-profile:v', 'baseline',
+                '-level', '3.0',
+                '-colorspace', 'bt709',
+                '-color_primaries', 'bt709',
+                '-color_trc', 'bt709',
+                '-color_range', 'tv',
+                
+                # Todo el segmento en un GOP: cada repetición arranca en un fotograma clave
+                '-g', str(segment_frames),
+                '-keyint_min', str(segment_frames),
+                '-sc_threshold', '0',
+                '-r', str(fps),
+                '-an',
+                segment_path
+            ]
+            
+            result = ffmpeg_runner.run(cmd)
+            if result.returncode != 0 or not os.path.exists(segment_path):
+                return False, f"Error codificando segmento: {result.stderr}"
+            
+            # Paso 2: lista concat con el segmento repetido hasta cubrir el audio
+            repeats = max(1, math.ceil(duration / (segment_frames / fps)))
+            list_path = os.path.join(work_dir, 'segments.txt')
+            escaped_segment = segment_path.replace("'", "'\\''")
+            
+            with open(list_path, 'w', encoding='utf-8') as f:
+                f.write(f"file '{escaped_segment}'\n" * repeats)
+            
+            # Paso 3: copiar el video, codificar solo el audio y recortar a la duración
+            cmd = [
+                'ffmpeg', '-y',
+                '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-i', audio_path,
+                '-map', '0:v:0',
+                '-map', '1:a:0',
+                
+                '-c:v', 'copy',
+                
+                # Configuración de audio ULTRA COMPATIBLE (más ligera en borrador)
+                *render_profiles.audio_args([
+                    '-c:a', 'aac',
+                    '-b:a', '128k',
+                    '-ar', '44100',
+                    '-ac', '2',
+                    '-aac_coder', 'twoloop'
+                ]),
+                
+                '-t', str(duration),
+                '-movflags', '+faststart',
+                '-avoid_negative_ts', 'make_zero',
+                '-max_muxing_queue_size', '1024',
+                
+                output_path
+            ]
+            
+            result = ffmpeg_runner.run(cmd)
+            
+            if result.returncode == 0 and os.path.exists(output_path):
+                return True, output_path
+            
+            return False, f"Error FFmpeg: {result.stderr}"
+        
+        except Exception as e:
+            return False, f"Error con FFmpeg: {str(e)}"
+        
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
     def _create_video_fallback(self, image_path, audio_path, output_path):
         """Crear video sin FFmpeg (método de respaldo)"""
         try:
@@ -474,8 +618,9 @@ class VideoProcessor:
         except Exception as e:
             return False, f"Error creando placeholder: {str(e)}"
     
-    def add_subtitles_to_video(self, video_path, script_text, output_path=None, style='animated'):
-        """Agregar subtítulos automáticos al video"""
+    def add_subtitles_to_video(self, video_path, script_text, output_path=None, style='animated', audio_path=None,
+                               language='es'):
+        """Agregar subtítulos automáticos al video (alineados con la locución de audio_path si se indica)"""
         if not output_path:
             base, ext = os.path.splitext(video_path)
             output_path = f"{base}_subtitled{ext}"
@@ -487,69 +632,116 @@ class VideoProcessor:
         
         try:
             if style == 'animated':
-                return self._add_animated_subtitles(video_path, script_text, output_path)
+                return self._add_animated_subtitles(video_path, script_text, output_path, audio_path, language)
             else:
-                return self._add_simple_subtitles(video_path, script_text, output_path)
+                return self._add_simple_subtitles(video_path, script_text, output_path, audio_path, language)
         
         except Exception as e:
             # En caso de error, copiar el original
             shutil.copy2(video_path, output_path)
             return True, output_path
     
-    def _add_animated_subtitles(self, video_path, script_text, output_path):
-        """Agregar subtítulos animados palabra por palabra"""
+    def _add_animated_subtitles(self, video_path, script_text, output_path, audio_path=None, language='es'):
+        """Agregar subtítulos animados palabra por palabra (un único archivo ASS karaoke)"""
+        ass_path = os.path.splitext(video_path)[0] + '.ass'
+        
         try:
             # Obtener duración del video
             duration = self._get_video_duration(video_path)
             if not duration:
                 duration = 30  # Fallback
             
-            # Limpiar texto y dividir en palabras
-            clean_text = self._clean_text_for_subtitles(script_text)
-            words = clean_text.split()
-            
-            # Calcular timing por palabra
-            words_per_second = len(words) / duration
-            time_per_word = duration / len(words)
-            
-            # Crear filtro de texto animado para FFmpeg
-            text_filters = []
-            
-            for i, word in enumerate(words):
-                start_time = i * time_per_word
-                end_time = min((i + 3) * time_per_word, duration)  # Mostrar 3 palabras a la vez
-                
-                # Posición Y que varía ligeramente
-                y_pos = 1600 + (i % 3) * 40  # Variación sutil en altura
-                
-                # Efecto de aparición y desaparición
-                text_filter = f"drawtext=text='{word}':fontfile=arial.ttf:fontsize=48:fontcolor=white:bordercolor=black:borderw=3:x=(w-text_w)/2:y={y_pos}:enable='between(t,{start_time},{end_time})'"
-                
-                text_filters.append(text_filter)
-            
-            # Combinar todos los filtros
-            if text_filters:
-                video_filter = ','.join(text_filters)
+            # Un solo filtro 'ass' en lugar de un drawtext por palabra, con tiempos de la locución
+            if karaoke_subtitles.estimate_word_timings(script_text, duration):
+                word_timings = self._align_words(video_path, script_text, audio_path, language)
+                karaoke_subtitles.write_ass_file(script_text, duration, ass_path, word_timings)
                 
                 cmd = [
                     'ffmpeg', '-i', video_path,
-                    '-vf', video_filter,
+                    '-vf', karaoke_subtitles.build_filter(ass_path),
                     '-c:a', 'copy', '-y', output_path
                 ]
                 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                result = ffmpeg_runner.run(cmd)
                 
                 if result.returncode == 0 and os.path.exists(output_path):
                     return True, output_path
             
             # Si falla, usar subtítulos simples
-            return self._add_simple_subtitles(video_path, script_text, output_path)
+            return self._add_simple_subtitles(video_path, script_text, output_path, audio_path, language)
         
         except Exception as e:
             print(f"Error con subtítulos animados: {e}")
-            return self._add_simple_subtitles(video_path, script_text, output_path)
+            return self._add_simple_subtitles(video_path, script_text, output_path, audio_path, language)
+        
+        finally:
+            # Limpiar archivo ASS temporal
+            if os.path.exists(ass_path):
+                os.remove(ass_path)
+    
+    def _align_words(self, video_path, script_text, audio_path=None, language='es'):
+        """
+        Tiempos por palabra para subtitular un video ya renderizado
+        
+        Se alinea con la locución original (su .timing.json ya suele existir desde el render).
+        Sin ella se usa la pista del video, pero los tiempos van a la carpeta temporal:
+        un .timing.json en videos/processed lo verían el gestor de archivos y el programador.
+        """
+        if audio_path and os.path.exists(audio_path):
+            return forced_aligner.align(audio_path, script_text, language)
+        
+        return forced_aligner.align(video_path, script_text, language, timing_dir=tempfile.gettempdir())
+    
+    def _build_animated_subtitle_filters(self, script_text, duration):
+        """
+        Construir los filtros drawtext de subtítulos palabra por palabra
+        
+        Render heredado: un nodo por palabra, el coste crece con el guión.
+        Se mantiene como referencia para benchmark_subtitles.py.
+        """
+        # Limpiar texto y dividir en palabras
+        clean_text = self._clean_text_for_subtitles(script_text)
+        words = clean_text.split()
+        
+        if not words:
+            return []
+        
+        # Calcular timing por palabra
+        time_per_word = duration / len(words)
+        
+        text_filters = []
+        
+        for i, word in enumerate(words):
+            start_time = i * time_per_word
+            end_time = min((i + 3) * time_per_word, duration)  # Mostrar 3 palabras a la vez
+            
+            # Posición Y que varía ligeramente
+            y_pos = 1600 + (i % 3) * 40  # Variación sutil en altura
+            
+            # Efecto de aparición y desaparición
+            text_filter = f"drawtext=text='{word}':fontfile=arial.ttf:fontsize=48:fontcolor=white:bordercolor=black:borderw=3:x=(w-text_w)/2:y={y_pos}:enable='between(t,{start_time},{end_time})'"
+            
+            text_filters.append(text_filter)
+        
+        return text_filters
+    
+    def _write_srt_file(self, script_text, duration, srt_path, word_timings=None):
+        """Escribir archivo SRT con segmentos inteligentes"""
+        segments = self._create_smart_segments(script_text, duration, word_timings)
+        
+        with open(srt_path, 'w', encoding='utf-8') as f:
+            for i, segment in enumerate(segments):
+                f.write(f"{i + 1}\n")
+                f.write(f"{self._seconds_to_srt_time(segment['start'])} --> {self._seconds_to_srt_time(segment['end'])}\n")
+                f.write(f"{segment['text']}\n\n")
+        
+        return srt_path
+    
+    def _build_simple_subtitle_filter(self, srt_path):
+        """Filtro subtitles con el estilo simple mejorado"""
+        return f"subtitles={srt_path}:force_style='Fontsize=36,PrimaryColour=&Hffffff,OutlineColour=&H000000,Outline=3,Bold=1,Alignment=2'"
     
-    def _add_simple_subtitles(self, video_path, script_text, output_path):
+    def _add_simple_subtitles(self, video_path, script_text, output_path, audio_path=None, language='es'):
         """Agregar subtítulos simples mejorados"""
         try:
             # Crear archivo de subtítulos SRT
@@ -560,24 +752,18 @@ class VideoProcessor:
             if not duration:
                 duration = 30
             
-            # Dividir texto en segmentos inteligentes
-            segments = self._create_smart_segments(script_text, duration)
-            
-            # Crear archivo SRT
-            with open(srt_path, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(segments):
-                    f.write(f"{i + 1}\n")
-                    f.write(f"{self._seconds_to_srt_time(segment['start'])} --> {self._seconds_to_srt_time(segment['end'])}\n")
-                    f.write(f"{segment['text']}\n\n")
+            # Dividir texto en segmentos inteligentes, alinearlos con la voz y crear archivo SRT
+            word_timings = self._align_words(video_path, script_text, audio_path, language)
+            self._write_srt_file(script_text, duration, srt_path, word_timings)
             
             # Agregar subtítulos con estilo mejorado
             cmd = [
                 'ffmpeg', '-i', video_path, '-vf', 
-                f"subtitles={srt_path}:force_style='Fontsize=36,PrimaryColour=&Hffffff,OutlineColour=&H000000,Outline=3,Bold=1,Alignment=2'",
+                self._build_simple_subtitle_filter(srt_path),
                 '-c:a', 'copy', '-y', output_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = ffmpeg_runner.run(cmd)
             
             # Limpiar archivo SRT temporal
             if os.path.exists(srt_path):
@@ -596,14 +782,7 @@ class VideoProcessor:
     
     def _get_video_duration(self, video_path):
         """Obtener duración del video"""
-        try:
-            cmd = ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', '-of', 'csv=p=0', video_path]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                return float(result.stdout.strip())
-        except:
-            pass
-        return None
+        return media_metadata.get_duration(video_path)
     
     def _clean_text_for_subtitles(self, text):
         """Limpiar texto para subtítulos"""
@@ -631,8 +810,8 @@ class VideoProcessor:
         
         return clean_text
     
-    def _create_smart_segments(self, text, duration):
-        """Crear segmentos inteligentes para subtítulos"""
+    def _create_smart_segments(self, text, duration, word_timings=None):
+        """Crear segmentos inteligentes para subtítulos (tiempos de la alineación forzada si los hay)"""
         clean_text = self._clean_text_for_subtitles(text)
         
         # Dividir por oraciones primero
@@ -668,6 +847,9 @@ class VideoProcessor:
                     'end': (i + 1) * time_per_sentence
                 })
         
+        if word_timings:
+            return forced_aligner.time_segments([segment['text'] for segment in segments], word_timings) or segments
+        
         return segments
     
     def _seconds_to_srt_time(self, seconds):
@@ -696,27 +878,47 @@ class VideoProcessor:
             output_path=output_path
         )
     
-    def batch_process(self, video_paths, settings):
-        """Procesar múltiples videos en lote"""
-        results = []
+    def batch_process(self, video_paths, settings, on_result=None):
+        """
+        Procesar múltiples videos en lote con un pool de workers acotado
+        
+        video_paths admite rutas o diccionarios {'path', 'priority'}; los de mayor
+        prioridad se procesan antes. Relanzar el mismo lote tras un corte reanuda
+        los videos pendientes. on_result recibe cada resultado en cuanto termina.
+        """
+        jobs = []
+        for item in video_paths:
+            path = item['path'] if isinstance(item, dict) else item
+            priority = item.get('priority', 0) if isinstance(item, dict) else 0
+            jobs.append({'id': path, 'input': path, 'priority': priority})
+        
+        def handler(job):
+            output_path = self.process_video(job['input'], **settings)
+            return output_path is not None, output_path
+        
+        def report(job):
+            result = self._batch_result(job)
+            if on_result:
+                on_result(result)
+        
+        batch_id = batch_engine.make_batch_id('process_video', [job['input'] for job in jobs], settings)
+        finished = batch_engine.run(batch_id, jobs, handler, on_result=report)
+        
+        return [self._batch_result(job) for job in finished]
+    
+    def _batch_result(self, job):
+        """Resultado de un trabajo de lote en el formato histórico de batch_process"""
+        result = {
+            'input': job['input'],
+            'output': job.get('result'),
+            'success': job['status'] == 'done',
+            'priority': job['priority']
+        }
         
-        for video_path in video_paths:
-            try:
-                output_path = self.process_video(video_path, **settings)
-                results.append({
-                    'input': video_path,
-                    'output': output_path,
-                    'success': output_path is not None
-                })
-            except Exception as e:
-                results.append({
-                    'input': video_path,
-                    'output': None,
-                    'success': False,
-                    'error': str(e)
-                })
+        if job.get('error'):
+            result['error'] = job['error']
         
-        return results
+        return result
     
     def get_supported_formats(self):
         """Obtener formatos soportados"""
@@ -5,9 +5,15 @@ Diferentes estilos visuales para crear contenido atractivo
 """
 
 import os
+import shutil
+import tempfile
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from utils.ffmpeg_runner import ffmpeg_runner
+from utils.render_profiles import render_profiles
+from utils.template_layers import template_layers
 
 class VideoTemplates:
     def __init__(self):
@@ -127,8 +133,17 @@ class VideoTemplates:
         """Obtener templates disponibles"""
         return self.templates
     
-    def apply_template_to_video(self, video_path: str, script_text: str, template_name: str, output_path: str = None) -> Tuple[bool, str]:
-        """Aplicar template a un video"""
+    def apply_template_to_video(self, video_path: str, script_text: str, template_name: str, output_path: str = None,
+                                draft: bool = False) -> Tuple[bool, str]:
+        """Aplicar template a un video (draft=True: borrador rápido en videos/drafts)"""
+        if draft:
+            return render_profiles.render_draft('template', self.apply_template_to_video, {
+                'video_path': video_path,
+                'script_text': script_text,
+                'template_name': template_name,
+                'output_path': output_path
+            })
+        
         if template_name not in self.templates:
             return False, f"Template '{template_name}' no encontrado"
         
@@ -152,54 +167,124 @@ class VideoTemplates:
             return False, f"Error aplicando template: {str(e)}"
     
     def _apply_template_with_ffmpeg(self, video_path: str, script_text: str, template: Dict, output_path: str) -> Tuple[bool, str]:
-        """Aplicar template usando FFmpeg"""
+        """Aplicar template usando FFmpeg: capa precompuesta con un overlay, o drawtext si no hay capa"""
+        work_dir = tempfile.mkdtemp(prefix='template_')
+        
         try:
-            import subprocess
-            
-            # Crear filtros de video basados en el template
-            video_filters = []
-            
-            # Filtro de fondo
-            bg_filter = self._create_background_filter(template)
-            if bg_filter:
-                video_filters.append(bg_filter)
+            # Borrador: el template se dibuja sobre el lienzo final (posiciones absolutas) y se reduce
+            downscale = render_profiles.downscale_filter()
             
-            # Filtros de texto animado
-            text_filters = self._create_text_filters(script_text, template)
-            video_filters.extend(text_filters)
+            layers = self._build_template_layers(script_text, template, work_dir)
             
-            # Efectos adicionales
-            effect_filters = self._create_effect_filters(template)
-            video_filters.extend(effect_filters)
-            
-            # Combinar todos los filtros
-            if video_filters:
-                filter_complex = ','.join(video_filters)
+            if layers:
+                before = (['scale=1080:1920'] if downscale else []) + layers['before']
+                after = layers['after'] + ([downscale] if downscale else []) + ['format=yuv420p']
+                
+                filter_complex = (
+                    f"[0:v]{','.join(before) or 'null'}[base];"
+                    f"[base][1:v]{layers['overlay']},{','.join(after)}[v]"
+                )
                 
                 cmd = [
                     'ffmpeg', '-i', video_path,
-                    '-vf', filter_complex,
-                    '-c:a', 'copy', '-y', output_path
+                    '-i', layers['layer'],
+                    '-filter_complex', filter_complex,
+                    '-map', '[v]', '-map', '0:a?'
                 ]
+            else:
+                # Crear filtros de video basados en el template
+                video_filters = self._build_template_filters(script_text, template)
+                if not video_filters:
+                    return False, "No se pudieron crear filtros"
                 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                if downscale:
+                    video_filters = ['scale=1080:1920'] + video_filters + [downscale]
                 
-                if result.returncode == 0 and os.path.exists(output_path):
-                    return True, output_path
-                else:
-                    print(f"FFmpeg error: {result.stderr}")
-                    return False, f"Error FFmpeg: {result.stderr}"
+                # Combinar todos los filtros
+                cmd = [
+                    'ffmpeg', '-i', video_path,
+                    '-vf', ','.join(video_filters)
+                ]
             
-            return False, "No se pudieron crear filtros"
+            if render_profiles.is_draft():
+                cmd.extend(['-preset', 'ultrafast', '-r', str(render_profiles.fps(30))])
+            cmd.extend(['-c:a', 'copy', '-y', output_path])
+            
+            result = ffmpeg_runner.run(cmd)
+            
+            if result.returncode == 0 and os.path.exists(output_path):
+                return True, output_path
+            else:
+                print(f"FFmpeg error: {result.stderr}")
+                return False, f"Error FFmpeg: {result.stderr}"
         
         except Exception as e:
             return False, f"Error con FFmpeg: {str(e)}"
+        
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def build_template_layers(self, script_text: str, template_name: str, work_dir: str) -> Optional[Dict]:
+        """Capa precompuesta de un template para componerla en otro render (None: usar drawtext)"""
+        if template_name not in self.templates:
+            return None
+        
+        return self._build_template_layers(script_text, self.templates[template_name], work_dir)
+    
+    def _build_template_layers(self, script_text: str, template: Dict, work_dir: str) -> Optional[Dict]:
+        """
+        Textos animados como capa QTRLE cacheada y filtros que siguen yendo sobre el video
+        
+        Returns:
+            {'layer', 'before', 'overlay', 'after'} o None si la capa no está disponible
+        """
+        segments = self._create_text_segments(self._clean_text(script_text).split())
+        layer = template_layers.get_layer(template['name'], template, segments, work_dir)
+        if not layer:
+            return None
+        
+        bg_filter = self._create_background_filter(template, layered=True)
+        
+        return {
+            'layer': layer,
+            'before': [bg_filter] if bg_filter else [],
+            'overlay': template_layers.overlay_filter(),
+            'after': self._create_effect_filters(template, layered=True)
+        }
+    
+    def build_template_filters(self, script_text: str, template_name: str) -> List[str]:
+        """Obtener la cadena de filtros de un template para componerla en otro render"""
+        if template_name not in self.templates:
+            return []
+        
+        return self._build_template_filters(script_text, self.templates[template_name])
+    
+    def _build_template_filters(self, script_text: str, template: Dict) -> List[str]:
+        """Construir fondo, texto animado y efectos del template"""
+        video_filters = []
+        
+        # Filtro de fondo
+        bg_filter = self._create_background_filter(template)
+        if bg_filter:
+            video_filters.append(bg_filter)
+        
+        # Filtros de texto animado
+        video_filters.extend(self._create_text_filters(script_text, template))
+        
+        # Efectos adicionales
+        video_filters.extend(self._create_effect_filters(template))
+        
+        return video_filters
     
-    def _create_background_filter(self, template: Dict) -> str:
+    def _create_background_filter(self, template: Dict, layered: bool = False) -> str:
         """Crear filtro de fondo basado en el template"""
         colors = template['colors']
         animation = template['animations']['background']
         
+        # colorkey solo escribe alfa, que la salida yuv420p descarta: con capas no se calcula
+        if animation == 'gradient_shift' and layered:
+            return ""
+        
         if animation == 'gradient_shift':
             return f"colorkey={colors['background']}:0.3:0.1"
         elif animation == 'matrix_rain':
@@ -257,7 +342,7 @@ class VideoTemplates:
         
         return filters
     
-    def _create_effect_filters(self, template: Dict) -> List[str]:
+    def _create_effect_filters(self, template: Dict, layered: bool = False) -> List[str]:
         """Crear filtros de efectos adicionales"""
         filters = []
         
@@ -266,6 +351,8 @@ class VideoTemplates:
         
         if emphasis == 'glow':
             filters.append("unsharp=5:5:1.0:5:5:0.0")
+        elif emphasis == 'pulse' and layered:
+            pass  # El pulso va dibujado en la capa de texto, sin reescalar el video
         elif emphasis == 'pulse':
             filters.append("scale=1080+20*sin(t):1920+20*sin(t)")
         elif emphasis == 'fire_effect':
@@ -294,6 +381,18 @@ class VideoTemplates:
     
     def _clean_text_for_ffmpeg(self, text: str) -> str:
         """Limpiar texto para FFmpeg"""
+        clean_text = self._clean_text(text)
+        
+        # Escapar caracteres especiales para FFmpeg
+        clean_text = clean_text.replace("'", "\\'")
+        clean_text = clean_text.replace('"', '\\"')
+        clean_text = clean_text.replace(':', '\\:')
+        clean_text = clean_text.replace(',', '\\,')
+        
+        return clean_text
+    
+    def _clean_text(self, text: str) -> str:
+        """Quitar emojis y espacios repetidos (texto sin escapar, para dibujar con PIL)"""
         import re
         
         # Remover emojis
@@ -308,12 +407,6 @@ class VideoTemplates:
         
         clean_text = emoji_pattern.sub('', text)
         
-        # Escapar caracteres especiales para FFmpeg
-        clean_text = clean_text.replace("'", "\\'")
-        clean_text = clean_text.replace('"', '\\"')
-        clean_text = clean_text.replace(':', '\\:')
-        clean_text = clean_text.replace(',', '\\,')
-        
         # Remover múltiples espacios
         clean_text = re.sub(r'\s+', ' ', clean_text).strip()
         